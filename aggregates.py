@@ -0,0 +1,222 @@
+import threading
+from sqlalchemy import or_
+from cache import catalog_version
+from models import Books, CatalogBooks
+
+# Bancos em que ORDER BY rating (ASC) põe NULL antes dos demais; no Snowflake e no PostgreSQL, NULL vem por último
+NULLS_FIRST_DIALECTS = ("sqlite",)
+
+
+class CategoryAggregate:
+    """Contadores de uma categoria: linhas, livros, soma/mín/máx de preço."""
+
+    __slots__ = ("rows", "total_livros", "price_count", "price_sum", "price_min", "price_max")
+
+    def __init__(self):
+        self.rows = 0
+        self.total_livros = 0
+        self.price_count = 0
+        self.price_sum = 0.0
+        self.price_min = None
+        self.price_max = None
+
+    def add(self, title, price):
+        self.rows += 1
+        if title is not None:
+            self.total_livros += 1
+        if price is not None:
+            self.price_count += 1
+            self.price_sum += price
+            self.price_min = price if self.price_min is None else min(self.price_min, price)
+            self.price_max = price if self.price_max is None else max(self.price_max, price)
+
+    def remove(self, title, price):
+        """Tira uma linha somada antes; True se o mín/máx precisa ser recalculado."""
+        self.rows -= 1
+        if title is not None:
+            self.total_livros -= 1
+        if price is None:
+            return False
+        self.price_count -= 1
+        self.price_sum -= price
+        return price == self.price_min or price == self.price_max
+
+    def reset_extremes(self, prices):
+        self.price_min = min(prices, default=None)
+        self.price_max = max(prices, default=None)
+
+
+class CatalogAggregates:
+    """
+    Agregados pré-calculados de /stats/overview e /stats/categories.
+
+    Mantém contagens, somas, mínimos e máximos por categoria e por rating,
+    então as duas rotas respondem em O(categorias) sem consultar o banco.
+    A cada carga apenas as linhas com LOAD_TIMESTAMP acima da marca d'água
+    já processada são lidas. No histórico (CATALOG_TABLE=history), que só
+    recebe linhas novas, elas são somadas. Em tb_books_latest o merge
+    substitui a versão anterior de cada id com um LOAD_TIMESTAMP novo: a
+    contribuição da versão anterior (guardada por id) é subtraída antes de
+    somar a nova, e só as categorias que perderam o mín/máx são recalculadas.
+    Um recálculo completo só acontece se a tabela "voltar no tempo".
+
+    A leitura do banco é feita fora do lock das rotas: um recálculo completo
+    é montado em outra instância e trocado de uma vez, e as linhas novas de
+    uma carga são aplicadas sob o lock só depois de lidas.
+    """
+
+    def __init__(self, append_only=CatalogBooks is Books, nulls_first=True):
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self.append_only = append_only
+        self.nulls_first = nulls_first
+        self.reset()
+
+    def reset(self):
+        self.total_livros = 0
+        self.price_count = 0
+        self.price_sum = 0.0
+        self.ratings = {}
+        self.categories = {}
+        # Última versão somada de cada id (só em tb_books_latest, para subtraí-la quando o id for substituído)
+        self.books = {}
+        self.high_water_mark = None
+        self.version = None
+
+    @classmethod
+    def from_rows(cls, rows, nulls_first=True):
+        """Constrói os agregados a partir de registros (dicts com as colunas de Books)."""
+        aggregates = cls(nulls_first=nulls_first)
+        aggregates.add_rows(
+            (row["id"], row["title"], row["price"], row["rating"], row["category"]) for row in rows
+        )
+        return aggregates
+
+    def _add(self, book_id, title, price, rating, category):
+        if book_id is not None:
+            self.total_livros += 1
+        if price is not None:
+            self.price_count += 1
+            self.price_sum += price
+        # O grupo NULL também é contado: aparece (com COUNT(rating) = 0) enquanto houver livro sem rating
+        self.ratings[rating] = self.ratings.get(rating, 0) + 1
+        aggregate = self.categories.get(category)
+        if aggregate is None:
+            aggregate = self.categories[category] = CategoryAggregate()
+        aggregate.add(title, price)
+
+    def _remove(self, book_id, title, price, rating, category):
+        """Subtrai uma linha somada antes; True se o mín/máx da categoria precisa ser recalculado."""
+        if book_id is not None:
+            self.total_livros -= 1
+        if price is not None:
+            self.price_count -= 1
+            self.price_sum -= price
+        self.ratings[rating] -= 1
+        if not self.ratings[rating]:
+            del self.ratings[rating]
+        aggregate = self.categories[category]
+        if aggregate.remove(title, price) and aggregate.rows:
+            return True
+        if not aggregate.rows:
+            del self.categories[category]
+        return False
+
+    def add_rows(self, rows):
+        """Soma linhas (id, title, price, rating, category), substituindo a versão anterior do id se não for histórico."""
+        stale = set()
+        for row in rows:
+            row = tuple(row)
+            book_id, category = row[0], row[4]
+            if not self.append_only and book_id is not None:
+                previous = self.books.get(book_id)
+                if previous is not None and self._remove(*previous):
+                    stale.add(previous[4])
+                self.books[book_id] = row
+            self._add(*row)
+        stale &= self.categories.keys()
+        if stale:
+            prices = {category: [] for category in stale}
+            for _, _, price, _, category in self.books.values():
+                if category in prices and price is not None:
+                    prices[category].append(price)
+            for category, values in prices.items():
+                self.categories[category].reset_extremes(values)
+
+    def _adopt(self, other):
+        """Troca o estado pelo de outra instância (chamado sob o lock)."""
+        for name in ("total_livros", "price_count", "price_sum", "ratings", "categories", "books"):
+            setattr(self, name, getattr(other, name))
+
+    def sync(self, db):
+        """Atualiza os agregados se houve carga nova desde a última sincronização."""
+        version = catalog_version.check(db)
+        nulls_first = db.get_bind().dialect.name in NULLS_FIRST_DIALECTS
+        with self._sync_lock:
+            if version == self.version:
+                self.nulls_first = nulls_first
+                return
+            load_timestamp = version[0]
+            query = db.query(
+                CatalogBooks.id, CatalogBooks.title, CatalogBooks.price, CatalogBooks.rating, CatalogBooks.category
+            )
+            incremental = (self.high_water_mark is not None and load_timestamp is not None
+                           and load_timestamp > self.high_water_mark)
+            if incremental:
+                query = query.filter(CatalogBooks.load_timestamp > self.high_water_mark)
+            if load_timestamp is not None:
+                # Limita à versão lida, para que cargas concorrentes entrem só na próxima sincronização
+                query = query.filter(or_(CatalogBooks.load_timestamp <= load_timestamp,
+                                         CatalogBooks.load_timestamp.is_(None)))
+            if incremental:
+                rows = query.all()
+                with self._lock:
+                    self.add_rows(rows)
+                    self.nulls_first = nulls_first
+            else:
+                fresh = CatalogAggregates(append_only=self.append_only)
+                fresh.add_rows(query.yield_per(5000))
+                with self._lock:
+                    self._adopt(fresh)
+                    self.nulls_first = nulls_first
+            self.high_water_mark = load_timestamp
+            self.version = version
+
+    def _rating_distribution(self):
+        """Contagem por rating na ordem do ORDER BY rating original, com o grupo NULL onde o banco o põe."""
+        ratings = sorted((rating, count) for rating, count in self.ratings.items() if rating is not None)
+        if None in self.ratings:
+            # COUNT(rating) do GROUP BY original: o grupo NULL aparece com contagem 0
+            null_bucket = [(None, 0)]
+            ratings = null_bucket + ratings if self.nulls_first else ratings + null_bucket
+        return dict(ratings)
+
+    def overview(self):
+        with self._lock:
+            avg_price = self.price_sum / self.price_count if self.price_count else None
+            return {
+                "total_livros": self.total_livros,
+                "preço_medio": round(avg_price, 2) if avg_price is not None else None,
+                "distribuição_ratings": self._rating_distribution(),
+            }
+
+    def category_stats(self):
+        def rounded(value):
+            return round(value, 2) if value is not None else None
+
+        # Sob o lock: as linhas de uma carga nova atualizam os CategoryAggregate no lugar
+        with self._lock:
+            categories = sorted(self.categories.items(), key=lambda item: (item[0] is None, item[0] or ""))
+            return [
+                {
+                    "category": category,
+                    "total_livros": aggregate.total_livros,
+                    "preco_medio": rounded(aggregate.price_sum / aggregate.price_count if aggregate.price_count else None),
+                    "preco_minimo": rounded(aggregate.price_min),
+                    "preco_maximo": rounded(aggregate.price_max),
+                }
+                for category, aggregate in categories
+            ]
+
+
+catalog_aggregates = CatalogAggregates()
@@ -0,0 +1,60 @@
+import atexit
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+# Nível mínimo das mensagens (DEBUG, INFO, WARNING, ERROR); DEBUG inclui o passo a passo do login
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Mensagens aguardando escrita; com a fila cheia, as novas são descartadas (e contadas)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_FORMAT = os.getenv("LOG_FORMAT", "[%(levelname)s] %(message)s")
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler que nunca bloqueia quem loga: com a fila cheia, descarta a mensagem."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_queue = queue.Queue(LOG_QUEUE_SIZE)
+_handler = DroppingQueueHandler(_queue)
+_stream = logging.StreamHandler(sys.stdout)
+_stream.setFormatter(logging.Formatter(LOG_FORMAT))
+# A escrita no stdout acontece na thread do listener, fora do event loop e das threads do banco
+_listener = QueueListener(_queue, _stream, respect_handler_level=False)
+
+logger = logging.getLogger("bookscraper")
+logger.setLevel(LOG_LEVEL)
+logger.addHandler(_handler)
+logger.propagate = False
+_listener.start()
+
+
+def get_logger(name=None):
+    """Logger da API (ou um filho, ex.: get_logger("auth")), com saída pela fila."""
+    return logger.getChild(name) if name else logger
+
+
+def stop_logging():
+    """Escreve as mensagens pendentes e encerra a thread do listener."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_stats():
+    return {"level": logging.getLevelName(logger.level), "queued": _queue.qsize(), "dropped": _handler.dropped}
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,67 @@
+import os
+import time
+from cache import TTLCache
+
+# Tokens JWT já verificados: guardados até o próprio "exp"
+AUTH_TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_TOKEN_CACHE_MAX_ENTRIES", "10000"))
+# Linhas de USERS (id, username, hashed_password) por username
+AUTH_USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60"))
+AUTH_USER_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", "1024"))
+# Usernames inexistentes: evita uma consulta ao Snowflake por tentativa de login
+AUTH_NEGATIVE_CACHE_TTL_SECONDS = float(os.getenv("AUTH_NEGATIVE_CACHE_TTL_SECONDS", "30"))
+AUTH_NEGATIVE_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_NEGATIVE_CACHE_MAX_ENTRIES", "10000"))
+
+
+class AuthCache:
+    """
+    Caches da autenticação.
+
+    - tokens: token completo -> claims (username, id), expirando no "exp"
+      do token, então um token vencido nunca é servido do cache;
+    - users: linha do usuário por username, com TTL curto;
+    - unknown_users: usernames não encontrados (cache negativo).
+
+    Criar um usuário remove o username dos caches de usuário.
+    """
+
+    def __init__(self):
+        self.tokens = TTLCache(AUTH_TOKEN_CACHE_MAX_ENTRIES, ttl=0)
+        self.users = TTLCache(AUTH_USER_CACHE_MAX_ENTRIES, AUTH_USER_CACHE_TTL_SECONDS)
+        self.unknown_users = TTLCache(AUTH_NEGATIVE_CACHE_MAX_ENTRIES, AUTH_NEGATIVE_CACHE_TTL_SECONDS)
+
+    def get_token(self, token):
+        found, claims = self.tokens.get(token)
+        return claims if found else None
+
+    def set_token(self, token, claims, exp):
+        ttl = exp - time.time() if exp is not None else 0
+        if ttl > 0:
+            self.tokens.set(token, claims, ttl=ttl)
+
+    def get_user(self, username):
+        """Retorna (encontrado, linha); linha None = username sabidamente inexistente."""
+        found, row = self.users.get(username)
+        if found:
+            return True, row
+        found, _ = self.unknown_users.get(username)
+        return found, None
+
+    def set_user(self, username, row):
+        if row is None:
+            self.unknown_users.set(username, True)
+        else:
+            self.users.set(username, row)
+
+    def forget_user(self, username):
+        self.users.delete(username)
+        self.unknown_users.delete(username)
+
+    def stats(self):
+        return {
+            "tokens": self.tokens.stats(),
+            "users": self.users.stats(),
+            "unknown_users": self.unknown_users.stats(),
+        }
+
+
+auth_cache = AuthCache()
@@ -0,0 +1,116 @@
+"""
+Teste de carga das rotas principais da API: lista de livros, busca, stats,
+features de ML e login, com --concurrency clientes simultâneos por cenário.
+
+Sem --url, a API roda no mesmo processo (httpx.ASGITransport) sobre um
+SQLite com o catálogo de data/books.csv replicado até --rows linhas, e o
+usuário do login é colocado direto no cache de usuários (o SQL de USERS é
+específico do Snowflake). Com --url, mede um servidor já rodando; o login
+usa --username/--password de um usuário existente.
+
+Ids, cursores e termos de busca variam a cada requisição, então boa parte
+das respostas não sai pronta do cache HTTP. O resultado (req/s, p50/p95/p99
+e status por cenário) é salvo em JSON com --output; --compare mostra a
+variação em relação a um JSON de uma execução anterior.
+
+Uso
+---
+python benchmarks/bench_api_load.py --rows 100000 --concurrency 16 --seconds 10 --output antes.json
+python benchmarks/bench_api_load.py --rows 100000 --concurrency 16 --seconds 10 --compare antes.json
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixture_db import seed_books, use_sqlite  # noqa: E402
+from load_driver import make_client, print_results, run_metadata, run_scenario, save_results  # noqa: E402
+
+DEFAULT = "/api/v1/Default/api/v1"
+OPTIONAL = "/api/v1/optional/api/v1"
+SEARCH_TERMS = ["light", "the", "love", "harry", "history", "girl", "night", "world", "poems", "secret"]
+
+
+def scenarios(rows, username, password):
+    """Nome -> função (client, i) que faz a i-ésima requisição do cenário."""
+    return {
+        "books_page": lambda client, i: client.get(
+            f"{DEFAULT}/books", params={"limit": 100, "after_id": i * 7919 % rows}),
+        "book_detail": lambda client, i: client.get(f"{DEFAULT}/books/{i * 7919 % rows + 1}"),
+        "search": lambda client, i: client.get(
+            f"{DEFAULT}/books/search", params={"title": SEARCH_TERMS[i % len(SEARCH_TERMS)], "limit": 20,
+                                               "offset": i // len(SEARCH_TERMS) % 5 * 20}),
+        "stats_overview": lambda client, i: client.get(f"{OPTIONAL}/stats/overview"),
+        "stats_categories": lambda client, i: client.get(f"{OPTIONAL}/stats/categories"),
+        "ml_features": lambda client, i: client.get(
+            "/api/v1/ml/features", params={"limit": 100, "after_id": i * 7919 % rows}),
+        "login": lambda client, i: client.post("/auth/login", data={"username": username, "password": password}),
+    }
+
+
+async def run_all(app, args, rows):
+    results = {}
+    selected = scenarios(rows, args.username, args.password)
+    async with make_client(app=app, url=args.url) as client:
+        for name in args.scenarios:
+            request = selected[name]
+            # Aquecimento: índices em memória, caches e conexões
+            await request(client, 0)
+            results[name] = await run_scenario(client, request, args.concurrency, args.seconds)
+            print(f"  {name}: {results[name]['rps']} req/s", file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="livros no SQLite; com --url, o maior id usado nas requisições")
+    parser.add_argument("--url", help="servidor já rodando, ex.: http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10, help="duração de cada cenário")
+    parser.add_argument("--scenarios", nargs="+", default=list(scenarios(1, "", "")),
+                        choices=list(scenarios(1, "", "")))
+    parser.add_argument("--username", default="bench")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--output", help="arquivo JSON com os resultados")
+    parser.add_argument("--compare", help="JSON de uma execução anterior")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = None
+        if args.url is None:
+            seed_books(use_sqlite(f"{tmp}/books.db"), args.rows)
+
+            import main as api
+            from auth_cache import auth_cache
+            from password_pool import hash_password
+
+            auth_cache.users.ttl = 24 * 3600
+            auth_cache.set_user(args.username, (1, args.username, hash_password(args.password)))
+            app = api.app
+
+        async def run():
+            if app is None:
+                return await run_all(None, args, args.rows)
+            # O lifespan (aquecimento do pool, modelo, snapshot) roda como no uvicorn
+            async with app.router.lifespan_context(app):
+                return await run_all(app, args, args.rows)
+
+        results = {
+            "meta": run_metadata(
+                target=args.url or "in-process", rows=args.rows, concurrency=args.concurrency, seconds=args.seconds,
+            ),
+            "scenarios": asyncio.run(run()),
+        }
+
+    baseline = json.loads(Path(args.compare).read_text(encoding="utf-8")) if args.compare else None
+    print_results(results, baseline)
+    if args.output:
+        save_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Teste de carga: latência de uma rota do catálogo enquanto /auth/login é
+martelado por clientes concorrentes.
+
+A API roda no mesmo processo e event loop do cliente (ASGITransport), como
+no uvicorn com um worker. Cada cenário é medido com o bcrypt executado no
+próprio event loop (--workers 0, comportamento anterior) e no pool dedicado
+de password_pool. O usuário de teste é colocado direto no cache de usuários
+(o SQL de USERS é específico do Snowflake); o catálogo vem de um SQLite.
+
+Uso
+---
+python benchmarks/bench_auth_load.py --seconds 5 --logins 16 --catalog 4
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixture_db import seed_books, use_sqlite  # noqa: E402
+
+CATALOG_URL = "/api/v1/Default/api/v1/books/{book_id}"
+USERNAME, PASSWORD = "bench", "bench-password"
+
+
+def percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+async def catalog_client(client, deadline, latencies, offset):
+    book_id = offset
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get(CATALOG_URL.format(book_id=book_id % 1000 + 1))
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+        book_id += 7
+
+
+async def login_client(client, deadline, counters):
+    while time.perf_counter() < deadline:
+        response = await client.post("/auth/login", data={"username": USERNAME, "password": PASSWORD})
+        counters[response.status_code] = counters.get(response.status_code, 0) + 1
+
+
+async def _run_scenario(app, seconds, logins, catalog):
+    import httpx
+
+    latencies, counters = [], {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        await client.get(CATALOG_URL.format(book_id=1))
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(
+            *(catalog_client(client, deadline, latencies, i) for i in range(catalog)),
+            *(login_client(client, deadline, counters) for _ in range(logins)),
+        )
+    return latencies, counters
+
+
+def run_scenario(app, seconds, logins, catalog):
+    return asyncio.run(_run_scenario(app, seconds, logins, catalog))
+
+
+def report(name, latencies, counters, seconds):
+    ms = [latency * 1000 for latency in latencies]
+    logins_ok = counters.get(200, 0)
+    print(f"{name:<42} catálogo p50 {percentile(ms, 50):7.1f} ms  p95 {percentile(ms, 95):7.1f} ms  "
+          f"p99 {percentile(ms, 99):7.1f} ms  ({len(ms) / seconds:6.0f} req/s)   "
+          f"logins {logins_ok / seconds:5.1f}/s  503: {counters.get(503, 0)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--logins", type=int, default=16, help="clientes de login concorrentes")
+    parser.add_argument("--catalog", type=int, default=4, help="clientes do catálogo concorrentes")
+    parser.add_argument("--workers", type=int, default=4, help="workers do pool de senhas")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed_books(use_sqlite(f"{tmp}/books.db"))
+
+        import main as api
+        from auth_cache import auth_cache
+        from password_pool import PasswordPool, hash_password
+        from routers import auth
+
+        auth_cache.users.ttl = 24 * 3600
+        auth_cache.set_user(USERNAME, (1, USERNAME, hash_password(PASSWORD)))
+
+        latencies, counters = run_scenario(api.app, args.seconds, 0, args.catalog)
+        report("só catálogo", latencies, counters, args.seconds)
+        for name, workers in (("bcrypt no event loop", 0), (f"pool de senhas ({args.workers} workers)", args.workers)):
+            auth.password_pool = PasswordPool(workers=workers)
+            latencies, counters = run_scenario(api.app, args.seconds, args.logins, args.catalog)
+            report(f"{name} + {args.logins} logins", latencies, counters, args.seconds)
+            auth.password_pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Vazão das rotas do catálogo em função do número de requisições simultâneas,
+com o SQLite local no lugar do Snowflake.
+
+Cada consulta recebe uma espera artificial de --latency-ms (evento
+before_cursor_execute da engine), simulando a ida e volta até o warehouse.
+Compara o acesso ao banco no próprio event loop (DB_THREAD_POOL_SIZE=0,
+comportamento anterior) com o pool de threads dedicado de database.py.
+No event loop, acima da capacidade do pool de conexões da engine a API
+trava: o loop fica bloqueado esperando uma conexão que só seria devolvida
+pelo próprio loop. Esses casos aparecem como "trava" e não são executados.
+
+Uso
+---
+python benchmarks/bench_db_concurrency.py --latency-ms 20 --concurrency 1 4 16 64
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixture_db import seed_books, use_sqlite  # noqa: E402
+
+URL = "/api/v1/optional/api/v1/books/top-rated?limit={limit}"
+
+
+async def drive(app, requests, concurrency):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def one(i):
+            async with semaphore:
+                response = await client.get(URL.format(limit=i % 20 + 1))
+                assert response.status_code == 200, response.text
+
+        await client.get(URL.format(limit=1))
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--pool-size", type=int, default=15, help="threads do pool do banco")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed_books(use_sqlite(f"{tmp}/books.db"))
+
+        from sqlalchemy import event
+
+        import database
+        import main as api
+
+        @event.listens_for(database.engine, "before_cursor_execute")
+        def simulated_latency(*_):
+            time.sleep(args.latency_ms / 1000)
+
+        print(f"{args.requests} requisições, {args.latency_ms:g} ms de latência simulada por consulta\n")
+        print(f"{'em voo':>7} {'no event loop':>16} {f'pool ({args.pool_size} threads)':>20} {'ganho':>7}")
+        capacity = database.DB_POOL_SIZE + database.DB_MAX_OVERFLOW
+        for concurrency in args.concurrency:
+            results = []
+            for size in (0, args.pool_size):
+                if size == 0 and concurrency > capacity:
+                    results.append(None)
+                    continue
+                database.db_pool = database.DbThreadPool(size)
+                seconds = asyncio.run(drive(api.app, args.requests, concurrency))
+                database.db_pool.shutdown()
+                results.append(args.requests / seconds)
+            inline, pooled = results
+            if inline is None:
+                print(f"{concurrency:>7} {'trava':>16} {pooled:>16.1f} r/s {'-':>7}")
+            else:
+                print(f"{concurrency:>7} {inline:>12.1f} r/s {pooled:>16.1f} r/s {pooled / inline:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
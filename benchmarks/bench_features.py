@@ -0,0 +1,88 @@
+"""
+Compara o caminho linha a linha de routers/ml.py (parse_price,
+convert_rating, to_availability_flag e um FeatureOut por linha) com o
+módulo vetorizado features.py, em linhas sintéticas com preços em texto
+("£53.74"), ratings por extenso e numéricos e disponibilidade variada.
+
+Uso
+---
+python benchmarks/bench_features.py --rows 1000 100000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+# routers.ml importa database; a engine não é usada no benchmark
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from features import build_feature_frame, build_feature_matrix  # noqa: E402
+from routers.ml import FeatureOut, convert_rating, parse_price, to_availability_flag  # noqa: E402
+
+RATINGS = ["One", "Two", "Three", "Four", "Five", 3, None]
+AVAILABILITY = ["In stock (22 available)", "In stock", "Out of stock", None]
+
+
+def synthetic_books(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    categories = pd.read_csv(ROOT / "data" / "books.csv")["category"].unique()
+    prices = rng.uniform(10, 60, rows).round(2)
+    return pd.DataFrame({
+        "title": [f"Book {i}" for i in range(rows)],
+        "price": [f"£{price:.2f}" if i % 10 else None for i, price in enumerate(prices)],
+        "rating": pd.Series([RATINGS[i] for i in rng.integers(0, len(RATINGS), rows)], dtype=object),
+        "availability": pd.Series([AVAILABILITY[i] for i in rng.integers(0, len(AVAILABILITY), rows)], dtype=object),
+        "category": rng.choice(categories, rows),
+    })
+
+
+def per_row(books):
+    return [
+        FeatureOut(
+            title=title,
+            price=parse_price(price),
+            rating=convert_rating(rating),
+            availability=to_availability_flag(availability),
+            category=category,
+        )
+        for title, price, rating, availability, category in books.itertuples(index=False)
+    ]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'linhas':>9} {'linha a linha':>16} {'frame':>16} {'matriz one-hot':>16} {'ganho':>7}")
+    for rows in args.rows:
+        books = synthetic_books(rows)
+        expected, per_row_seconds = timed(per_row, books)
+        frame, frame_seconds = timed(build_feature_frame, books)
+        (matrix, _columns, _vocabulary), matrix_seconds = timed(build_feature_matrix, books)
+
+        # Os dois caminhos precisam produzir as mesmas features
+        expected_prices = np.array([f.price if f.price is not None else np.nan for f in expected])
+        np.testing.assert_array_equal(frame["price"].to_numpy(), expected_prices)
+        np.testing.assert_array_equal(frame["rating"].to_numpy(), [f.rating for f in expected])
+        np.testing.assert_array_equal(frame["availability"].to_numpy(), [f.availability for f in expected])
+        assert matrix.shape[0] == rows
+
+        print(f"{rows:>9} {rows / per_row_seconds:>12,.0f} l/s {rows / frame_seconds:>12,.0f} l/s "
+              f"{rows / matrix_seconds:>12,.0f} l/s {per_row_seconds / frame_seconds:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
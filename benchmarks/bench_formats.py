@@ -0,0 +1,74 @@
+"""
+Compara tamanho em disco e tempo de leitura do CSV atual com o Parquet
+tipado (BOOKS_SCHEMA), para data/books.csv replicado até --rows linhas.
+A repetição das linhas favorece a compressão do Parquet; com --rows 1000
+a comparação usa exatamente o catálogo real.
+
+Uso
+---
+python benchmarks/bench_formats.py --rows 1000000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from sinks import LocalCsvSink, LocalParquetSink  # noqa: E402
+
+
+def scaled_books(rows):
+    base = pd.read_csv(ROOT / "data" / "books.csv").drop(columns="id").to_dict(orient="records")
+    for i in range(rows):
+        yield base[i % len(base)]
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, parquet_path = Path(tmp) / "books.csv", Path(tmp) / "books.parquet"
+        with LocalCsvSink(csv_path) as sink:
+            sink.write_many(scaled_books(args.rows))
+        with LocalParquetSink(parquet_path) as sink:
+            sink.write_many(scaled_books(args.rows))
+
+        from_csv = pd.read_csv(csv_path)
+        from_parquet = pd.read_parquet(parquet_path)
+        pd.testing.assert_frame_equal(from_csv, from_parquet, check_dtype=False)
+
+        results = {
+            "csv": (csv_path.stat().st_size, best_of(lambda: pd.read_csv(csv_path), args.repeat)),
+            "parquet": (parquet_path.stat().st_size, best_of(lambda: pd.read_parquet(parquet_path), args.repeat)),
+            "parquet (3 colunas)": (
+                parquet_path.stat().st_size,
+                best_of(lambda: pd.read_parquet(parquet_path, columns=["price", "rating", "category"]), args.repeat),
+            ),
+        }
+
+    print(f"{args.rows} linhas\n")
+    csv_size, csv_time = results["csv"]
+    for name, (size, seconds) in results.items():
+        print(f"{name:<20} {size / 1024 / 1024:8.2f} MiB ({csv_size / size:4.1f}x menor)   "
+              f"leitura {seconds * 1000:8.1f} ms ({csv_time / seconds:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
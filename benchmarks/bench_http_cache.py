@@ -0,0 +1,105 @@
+"""
+Cache HTTP das rotas do catálogo (http_cache.py): latência e tamanho da
+lista completa de livros sem cache, com o corpo guardado (identidade e
+gzip) e na revalidação com If-None-Match (304).
+
+Antes de medir, confere que o 304 leva o mesmo ETag do 200 que ele
+revalida (em cada codificação), que o ETag de uma codificação não
+revalida outra e que If-None-Match: * não transforma um 404 ou um 401 em
+304. Falha com AssertionError se algum desses casos mudar.
+
+Uso
+---
+python benchmarks/bench_http_cache.py --rows 1000
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixture_db import seed_books, use_sqlite  # noqa: E402
+from load_driver import make_client  # noqa: E402
+
+BOOKS_URL = "/api/v1/Default/api/v1/books"
+# Corpo abaixo de HTTP_COMPRESS_MIN_BYTES: sai sem compressão mesmo com gzip aceito
+SMALL_URL = "/api/v1/Default/api/v1/books?limit=1"
+ENCODINGS = ["identity", "gzip"]
+
+
+async def check_correctness(client, encodings):
+    for url in (BOOKS_URL, SMALL_URL):
+        for encoding in encodings:
+            first = await client.get(url, headers={"accept-encoding": encoding})
+            assert first.status_code == 200, (url, encoding, first.status_code)
+            etag = first.headers["etag"]
+            again = await client.get(url, headers={"accept-encoding": encoding, "if-none-match": etag})
+            assert again.status_code == 304, (url, encoding, again.status_code)
+            assert again.headers["etag"] == etag, f"{url} ({encoding}): 200 {etag}, 304 {again.headers['etag']}"
+
+    gzip_etag = (await client.get(BOOKS_URL, headers={"accept-encoding": "gzip"})).headers["etag"]
+    other = await client.get(BOOKS_URL, headers={"accept-encoding": "identity", "if-none-match": gzip_etag})
+    assert other.status_code == 200, "ETag da variante gzip revalidou a resposta sem compressão"
+
+    missing = await client.get(f"{BOOKS_URL}/99999999", headers={"if-none-match": "*"})
+    assert missing.status_code == 404, f"livro inexistente com If-None-Match: *: {missing.status_code}"
+    unauthorized = await client.get("/api/v1/optional/api/v1/books/price-range?min=0&max=100",
+                                    headers={"if-none-match": "*"})
+    assert unauthorized.status_code == 401, f"price-range sem token com If-None-Match: *: {unauthorized.status_code}"
+
+
+async def timed(client, headers, repeat):
+    samples, size = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = await client.get(BOOKS_URL, headers=headers)
+        samples.append(time.perf_counter() - start)
+        # Bytes transferidos (o httpx descomprime o corpo)
+        size = int(response.headers.get("content-length", 0))
+    return statistics.median(samples) * 1000, size
+
+
+async def run(app, args):
+    from http_cache import http_cache
+
+    async with app.router.lifespan_context(app):
+        async with make_client(app=app) as client:
+            encodings = ENCODINGS + (["br"] if http_cache.stats()["brotli"] else [])
+            await check_correctness(client, encodings)
+            print(f"correção: 304 com o mesmo ETag do 200 ({', '.join(encodings)}); * não vira 304 em 404/401")
+
+            results = {}
+            http_cache.bodies.clear()
+            results["sem cache (1ª requisição)"] = await timed(client, {"accept-encoding": "identity"}, 1)
+            for encoding in encodings:
+                results[f"guardado, {encoding}"] = await timed(client, {"accept-encoding": encoding}, args.repeat)
+            etag = (await client.get(BOOKS_URL, headers={"accept-encoding": "gzip"})).headers["etag"]
+            results["304 (If-None-Match)"] = await timed(
+                client, {"accept-encoding": "gzip", "if-none-match": etag}, args.repeat
+            )
+            return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed_books(use_sqlite(f"{tmp}/books.db"), args.rows)
+        import main as api
+
+        results = asyncio.run(run(api.app, args))
+
+    print(f"\nGET {BOOKS_URL} ({args.rows} livros)")
+    for name, (ms, size) in results.items():
+        print(f"{name:<28} {ms:>8.2f} ms {size:>10,} bytes")
+
+
+if __name__ == "__main__":
+    main()
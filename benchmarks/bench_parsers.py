@@ -0,0 +1,68 @@
+"""
+Mede páginas/segundo de cada backend de extração do scraper.
+
+Por padrão usa as páginas geradas por fixture_site a partir de data/books.csv;
+com --pages-dir usa arquivos .html salvos do site real (listagens com nome
+page-*.html, o restante tratado como página de detalhe).
+
+Uso
+---
+python benchmarks/bench_parsers.py --repeat 3
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from extractors import available_extractors, get_extractor  # noqa: E402
+from fixture_site import build_site  # noqa: E402
+from scraper import parse_detail, parse_listing  # noqa: E402
+
+
+def load_pages(pages_dir=None):
+    if pages_dir is None:
+        pages = build_site()
+    else:
+        pages = {str(p): p.read_text(encoding="utf-8") for p in Path(pages_dir).rglob("*.html")}
+    listings = [html for path, html in pages.items() if Path(path).name.startswith("page-")]
+    details = [html for path, html in pages.items() if not Path(path).name.startswith("page-")]
+    return listings, details
+
+
+def run(extractor, listings, details):
+    return (
+        [parse_listing(html, extractor=extractor) for html in listings],
+        [parse_detail(html, extractor=extractor) for html in details],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages-dir", default=None, help="diretório com páginas .html salvas")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    listings, details = load_pages(args.pages_dir)
+    total = len(listings) + len(details)
+    print(f"{len(listings)} listagens + {len(details)} páginas de detalhe\n")
+
+    reference = None
+    baseline = None
+    for name in available_extractors():
+        extractor = get_extractor(name)
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = run(extractor, listings, details)
+            best = min(best, time.perf_counter() - start)
+        reference = reference or result
+        assert result == reference, f"backend {name} extraiu valores diferentes"
+        baseline = baseline or best
+        print(f"{name:<12} {total / best:9.0f} páginas/s   ({baseline / best:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Vazão de POST /ml/predictions/batch (array JSON e NDJSON) e latência das
+outras rotas enquanto um lote grande é pontuado.
+
+Antes de medir, confere que o lote devolve o mesmo resultado que
+/ml/predictions item a item, que corpos quebrados (JSON/NDJSON inválido,
+tipos errados) são respondidos com 422 e que um lote acima de
+PREDICTION_MAX_BATCH é recusado com 413. Falha com AssertionError se algum
+desses casos mudar.
+
+Uso
+---
+python benchmarks/bench_predictions.py --rows 100000
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixture_db import seed_books, use_sqlite  # noqa: E402
+from load_driver import make_client, percentile  # noqa: E402
+
+BATCH_URL = "/api/v1/ml/predictions/batch"
+CATEGORIES = ["Poetry", "Travel", "Mystery", "Fiction", "Romance", "Default"]
+BROKEN_PAYLOADS = [
+    (b"not json", "application/x-ndjson"),
+    (b'{"price": 10, "rating": 3, "availability": 1, "category": "Poetry"}\n{"price": ', "application/x-ndjson"),
+    (b"[1,", "application/json"),
+    (b"not json", "application/json"),
+    (b'{"price": 10}', "application/json"),
+    (b'[{"price": "caro", "rating": 3, "availability": 1, "category": "Poetry"}]', "application/json"),
+]
+
+
+def make_rows(count, seed=42):
+    rng = random.Random(seed)
+    return [
+        {"price": round(rng.uniform(5, 60), 2), "rating": rng.randint(0, 5),
+         "availability": rng.randint(0, 1), "category": rng.choice(CATEGORIES)}
+        for _ in range(count)
+    ]
+
+
+def ndjson_body(rows):
+    return "\n".join(json.dumps(row) for row in rows).encode()
+
+
+async def check_correctness(client, ml):
+    rows = make_rows(200, seed=7)
+    single = [(await client.post("/api/v1/ml/predictions", json=row)).json() for row in rows]
+    batch = (await client.post(BATCH_URL, json=rows)).json()
+    assert batch == single, "lote JSON diferente de /predictions item a item"
+    response = await client.post(BATCH_URL, content=ndjson_body(rows), headers={"content-type": "application/x-ndjson"})
+    assert [json.loads(line) for line in response.text.splitlines()] == single, "lote NDJSON diferente"
+
+    for body, content_type in BROKEN_PAYLOADS:
+        response = await client.post(BATCH_URL, content=body, headers={"content-type": content_type})
+        assert response.status_code == 422, f"{body[:30]!r} ({content_type}): {response.status_code}"
+        assert response.json()["detail"], "422 sem detalhe"
+
+    limit, ml.PREDICTION_MAX_BATCH = ml.PREDICTION_MAX_BATCH, 10
+    try:
+        too_many = make_rows(11)
+        for body, content_type in ((json.dumps(too_many).encode(), "application/json"),
+                                   (ndjson_body(too_many), "application/x-ndjson")):
+            response = await client.post(BATCH_URL, content=body, headers={"content-type": content_type})
+            assert response.status_code == 413, f"{content_type} acima do limite: {response.status_code}"
+    finally:
+        ml.PREDICTION_MAX_BATCH = limit
+
+
+async def measure(client, rows, repeat):
+    results = {}
+    bodies = {"application/json": json.dumps(rows).encode(), "application/x-ndjson": ndjson_body(rows)}
+    for content_type, body in bodies.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = await client.post(BATCH_URL, content=body, headers={"content-type": content_type})
+            timings.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text[:200]
+        results[content_type] = len(rows) / min(timings)
+
+    # Latência de outra rota enquanto o lote é validado e pontuado
+    latencies = []
+    batch = asyncio.create_task(client.post(BATCH_URL, content=bodies["application/json"],
+                                            headers={"content-type": "application/json"}))
+    while not batch.done():
+        start = time.perf_counter()
+        await client.get("/api/v1/ml/predictions/stats")
+        latencies.append(time.perf_counter() - start)
+        # No ASGITransport a rota responde sem suspender; sem a pausa o lote nunca seria agendado
+        await asyncio.sleep(0.001)
+    await batch
+    return results, latencies
+
+
+async def run(app, args):
+    import routers.ml as ml
+
+    async with app.router.lifespan_context(app):
+        async with make_client(app=app) as client:
+            await check_correctness(client, ml)
+            print("correção: lote == item a item; corpos quebrados -> 422; acima do limite -> 413")
+            return await measure(client, make_rows(args.rows), args.repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="linhas por lote")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed_books(use_sqlite(f"{tmp}/books.db"), 1000)
+        import main as api
+
+        throughput, latencies = asyncio.run(run(api.app, args))
+
+    for content_type, rows_per_second in throughput.items():
+        print(f"{content_type:<22} {rows_per_second:>12,.0f} linhas/s")
+    ms = [latency * 1000 for latency in latencies]
+    print(f"GET /predictions/stats durante o lote: {len(ms)} respostas, "
+          f"p50 {percentile(ms, 50):.1f} ms, máx {max(ms):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
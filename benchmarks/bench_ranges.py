@@ -0,0 +1,95 @@
+"""
+Latência de /books/price-range e /books/top-rated: consulta ao banco
+(SQLite local no lugar do Snowflake) contra o índice de preço/rating de
+price_index.py, para o catálogo replicado até --rows linhas. Cada
+consulta do índice precisa devolver os mesmos títulos, na mesma ordem,
+que a do banco (top-rated: rating desc, depois id).
+
+Uso
+---
+python benchmarks/bench_ranges.py --rows 100000
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixture_db import seed_books, use_sqlite  # noqa: E402
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed_books(use_sqlite(f"{tmp}/books.db"), args.rows)
+
+        from database import session_local
+        from models import Books
+        from price_index import PriceRatingIndex
+
+        def top(query, offset=0):
+            return [b.title for b in query.order_by(Books.rating.desc(), Books.id).offset(offset).limit(10).all()]
+
+        with session_local() as db:
+            records = [book.to_dict() for book in db.query(Books).all()]
+            index, build_seconds = timed(lambda: PriceRatingIndex(records), 1)
+            print(f"{args.rows} livros; índice construído em {build_seconds:.2f} s\n")
+
+            cases = [
+                ("preço 10-12", lambda: [b.title for b in db.query(Books).filter(
+                    Books.price >= 10, Books.price <= 12).order_by(Books.price, Books.id).all()],
+                 lambda: index.price_range(10, 12)[1]),
+                ("preço 50.5-51 + Poetry + rating>=3", lambda: [b.title for b in db.query(Books).filter(
+                    Books.price >= 50.5, Books.price <= 51, Books.category == "Poetry", Books.rating >= 3
+                ).order_by(Books.price, Books.id).all()],
+                 lambda: index.price_range(50.5, 51, "Poetry", 3)[1]),
+                ("top 10", lambda: top(db.query(Books)),
+                 lambda: index.top_rated(10)[1]),
+                ("top 10, página 50", lambda: top(db.query(Books), 500),
+                 lambda: index.top_rated(10, offset=500)[1]),
+                ("top 10 Poetry", lambda: top(db.query(Books).filter(Books.category == "Poetry")),
+                 lambda: index.top_rated(10, category="Poetry")[1]),
+                ("top 10 Poetry + preço 20-30", lambda: top(db.query(Books).filter(
+                    Books.category == "Poetry", Books.price >= 20, Books.price <= 30)),
+                 lambda: index.top_rated(10, category="Poetry", min_price=20, max_price=30)[1]),
+                ("top 10 preço 10-11, página 20", lambda: top(db.query(Books).filter(
+                    Books.price >= 10, Books.price <= 11), 200),
+                 lambda: index.top_rated(10, offset=200, min_price=10, max_price=11)[1]),
+            ]
+            print(f"{'consulta':<36} {'resultados':>10} {'banco':>11} {'índice':>11} {'ganho':>7}")
+            for name, sql, indexed in cases:
+                expected, sql_seconds = timed(sql, args.repeat)
+                found, index_seconds = timed(indexed, args.repeat)
+                assert [book["title"] for book in found] == expected, name
+                print(f"{name:<36} {len(found):>10} {sql_seconds * 1000:>8.2f} ms "
+                      f"{index_seconds * 1000:>8.3f} ms {sql_seconds / index_seconds:>6.0f}x")
+
+            # Total com faixa de preço: só com count=True, e igual ao COUNT do banco
+            assert index.top_rated(10, min_price=10, max_price=11)[0] is None
+            expected = db.query(Books).filter(Books.price >= 10, Books.price <= 11).count()
+            total, count_seconds = timed(lambda: index.top_rated(10, min_price=10, max_price=11, count=True)[0],
+                                         args.repeat)
+            assert total == expected, (total, expected)
+            assert index.top_rated(10, category="Poetry")[0] == db.query(Books).filter(
+                Books.category == "Poetry").count()
+            print(f"\ntotal de 'preço 10-11' (count=True): {total} em {count_seconds * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Sincronização da réplica de leitura (replica.py): cópia inteira de
+tb_books_latest contra a sincronização incremental pela marca d'água,
+depois de uma carga nova de poucas linhas.
+
+Antes de medir, confere a marca d'água com um LOAD_TIMESTAMP com fuso
+(como o TIMESTAMP_TZ do Snowflake ou o timestamptz do PostgreSQL): a marca
+é guardada em UTC, uma nova sincronização não copia nada e a carga
+seguinte, sem fuso, é copiada. Falha com AssertionError se algum desses
+casos mudar.
+
+Uso
+---
+python benchmarks/bench_replica.py --rows 100000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixture_db import LOAD_TIMESTAMP, seed_books, use_sqlite  # noqa: E402
+
+# Linha com fuso: 12:00 em UTC+2 são 10:00 em UTC
+TZ_AWARE_TIMESTAMP = "2025-01-02 12:00:00+02:00"
+TZ_AWARE_UTC = datetime(2025, 1, 2, 10)
+
+
+def add_book(engine, book_id, load_timestamp, metadata_filename):
+    """Acrescenta em tb_books_latest uma cópia do livro 1 com outro id e outra carga."""
+    from models import BooksLatest
+
+    table = BooksLatest.__tablename__
+    columns = [column.key for column in BooksLatest.__table__.columns]
+    copied = ", ".join("?" if name in ("id", "load_timestamp", "metadata_filename") else name for name in columns)
+    with engine.begin() as connection:
+        # Direto no driver: o texto com fuso é gravado como está, como viria de uma coluna com fuso
+        connection.exec_driver_sql(
+            f"INSERT INTO {table} ({', '.join(columns)}) SELECT {copied} FROM {table} WHERE id = 1",
+            tuple({"id": book_id, "load_timestamp": load_timestamp, "metadata_filename": metadata_filename}[name]
+                  for name in columns if name in ("id", "load_timestamp", "metadata_filename")),
+        )
+
+
+def replica_ids(replica):
+    import sqlite3
+
+    with sqlite3.connect(replica.path) as connection:
+        return {row[0] for row in connection.execute("SELECT id FROM tb_books_latest")}
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed_books(use_sqlite(f"{tmp}/books.db"), args.rows)
+
+        from sqlalchemy import create_engine
+        from database import engine
+        from replica import ReadReplica
+
+        target = create_engine(f"sqlite:///{tmp}/replica.db")
+        replica = ReadReplica(path=Path(tmp) / "replica.db", source=engine, target=target)
+
+        copied, full_seconds = timed(replica.sync)
+        assert copied == args.rows, copied
+        assert replica.high_water_mark() == LOAD_TIMESTAMP, replica.high_water_mark()
+
+        add_book(engine, args.rows + 1, TZ_AWARE_TIMESTAMP, "books_2025_01_02.csv")
+        assert replica.sync() == 1
+        assert replica.high_water_mark() == TZ_AWARE_UTC, replica.high_water_mark()
+        assert replica.sync() == 0, "sincronização sem carga nova copiou linhas"
+
+        add_book(engine, args.rows + 2, "2025-01-03 00:00:00.000000", "books_2025_01_03.csv")
+        copied, incremental_seconds = timed(replica.sync)
+        assert args.rows + 2 in replica_ids(replica), "carga sem fuso depois da marca com fuso não foi copiada"
+        assert len(replica_ids(replica)) == args.rows + 2
+        print("correção: marca com fuso guardada em UTC; sem carga nova nada é copiado; carga seguinte copiada")
+
+        target.dispose()
+
+    print(f"{args.rows} livros")
+    print(f"sincronização inteira     {full_seconds * 1000:>10.1f} ms")
+    print(f"incremental ({copied} linhas) {incremental_seconds * 1000:>10.1f} ms "
+          f"({full_seconds / incremental_seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
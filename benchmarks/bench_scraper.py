@@ -0,0 +1,100 @@
+"""
+Compara a coleta sequencial com a coleta concorrente contra o site local e
+mede o ganho do modo incremental (cache de páginas + requisições condicionais).
+
+O repositório não tem suíte de testes: este script é a verificação. Ele
+falha (AssertionError) se o modo concorrente devolver registros diferentes
+do sequencial ou não for mais rápido, ou se os ids deixarem de ser os da
+posição no site quando uma página de detalhe ou de listagem falha. Não
+precisa de rede: o site é servido localmente por fixture_site.py.
+
+Uso
+---
+python benchmarks/bench_scraper.py --latency 0.02 --workers 16
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixture_site import FixtureSite, build_site, load_books  # noqa: E402
+from page_cache import PageCache  # noqa: E402
+from scraper import scrape_books  # noqa: E402
+
+
+def timed_scrape(base_url, workers, cache=None):
+    start = time.perf_counter()
+    books = scrape_books(base_url=base_url, max_workers=workers, cache=cache)
+    return books, time.perf_counter() - start
+
+
+def check_stable_ids(workers):
+    """Sem um detalhe e uma listagem (404), os demais livros mantêm o id da coleta completa."""
+    books = load_books()
+    with FixtureSite(pages=build_site(books)) as site:
+        complete = {book["id"]: book for book in scrape_books(base_url=site.base_url, max_workers=workers)}
+        assert sorted(complete) == [int(book["id"]) for book in books], "ids diferentes da posição no site"
+
+        del site.pages[f"/catalogue/book_{books[5]['id']}/index.html"]
+        del site.pages["/catalogue/page-3.html"]
+        partial = scrape_books(base_url=site.base_url, max_workers=workers)
+
+    lost = {int(books[5]["id"])} | {int(book["id"]) for book in books[40:60]}
+    assert {book["id"] for book in partial} == set(complete) - lost, "falha deslocou os ids dos livros seguintes"
+    assert all(book == complete[book["id"]] for book in partial), "livro com o registro de outro id"
+    return len(lost)
+
+
+def bench_incremental(latency, workers, changed_books=5):
+    """Primeira execução fria, segunda com o cache quente e alguns livros alterados."""
+    books = load_books()
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = f"{tmp}/page_cache.json"
+        with FixtureSite(pages=build_site(books), latency=latency) as site:
+            cache = PageCache(cache_path)
+            _, t_cold = timed_scrape(site.base_url, workers, cache)
+            cache.save()
+
+            for book in books[:changed_books]:
+                book["price"] = str(float(book["price"]) + 1)
+            site.pages.update(build_site(books))
+
+            cache = PageCache(cache_path)
+            _, t_warm = timed_scrape(site.base_url, workers, cache)
+            not_modified = site.not_modified_count
+
+    assert len(cache.delta) == changed_books, f"delta com {len(cache.delta)} livros"
+    return t_cold, t_warm, not_modified, len(cache.delta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.02, help="latência artificial por requisição (s)")
+    parser.add_argument("--workers", type=int, default=16, help="threads do modo concorrente")
+    args = parser.parse_args()
+
+    with FixtureSite(latency=args.latency) as site:
+        sequential, t_seq = timed_scrape(site.base_url, 1)
+        concurrent, t_conc = timed_scrape(site.base_url, args.workers)
+
+    assert sequential == concurrent, "modo concorrente retornou registros diferentes"
+    assert t_conc < t_seq, f"modo concorrente não foi mais rápido ({t_conc:.2f}s contra {t_seq:.2f}s)"
+    print(f"\nlivros: {len(concurrent)}")
+    print(f"sequencial:            {t_seq:8.2f}s")
+    print(f"concorrente ({args.workers:>2} thr): {t_conc:8.2f}s")
+    print(f"speedup:               {t_seq / t_conc:8.1f}x")
+
+    lost = check_stable_ids(args.workers)
+    print(f"\nids estáveis: {lost} livros sem página, os demais com o mesmo id")
+
+    t_cold, t_warm, not_modified, delta = bench_incremental(args.latency, args.workers)
+    print(f"\nincremental (cache frio):  {t_cold:8.2f}s")
+    print(f"incremental (cache quente): {t_warm:7.2f}s  ({not_modified} respostas 304, {delta} livros no delta)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Latência da busca por título/categoria: ILIKE '%termo%' no banco (SQLite
+local no lugar do Snowflake) contra o índice de trigramas de search_index.py.
+O catálogo de data/books.csv é replicado até --rows linhas; os títulos se
+repetem, então o número de resultados cresce junto com a tabela.
+
+Uso
+---
+python benchmarks/bench_search.py --rows 100000
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixture_db import seed_books, use_sqlite  # noqa: E402
+
+QUERIES = [
+    ("light", None),
+    ("harry potter", None),
+    ("the", None),
+    ("requiem", None),
+    (None, "poetry"),
+    ("love", "romance"),
+    ("zzzz", None),
+]
+# Erros de digitação numa palavra só (letras vizinhas trocadas) e o trecho que o resultado precisa conter
+TYPOS = [
+    ("ligth", "light"),
+    ("lihgt", "light"),
+    ("sapeins", "sapiens"),
+    ("harry poter", "harry potter"),
+]
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed_books(use_sqlite(f"{tmp}/books.db"), args.rows)
+
+        from database import session_local
+        from models import Books
+        from search_index import SearchIndex
+
+        with session_local() as db:
+            def ilike(title, category):
+                query = db.query(Books)
+                if title:
+                    query = query.filter(Books.title.ilike(f"%{title}%"))
+                if category:
+                    query = query.filter(Books.category.ilike(f"%{category}%"))
+                return [book.to_dict() for book in query.all()]
+
+            records = [book.to_dict() for book in db.query(Books).all()]
+            index, build_seconds = timed(lambda: SearchIndex(records), 1)
+            print(f"{args.rows} livros; índice construído em {build_seconds:.2f} s\n")
+            print(f"{'título':<14} {'categoria':<10} {'resultados':>10} {'ILIKE':>11} {'índice':>11} {'ganho':>7}")
+            for title, category in QUERIES:
+                expected, sql_seconds = timed(lambda: ilike(title, category), args.repeat)
+                (total, found), index_seconds = timed(lambda: index.search(title, category), args.repeat)
+                assert sorted(r["id"] for r in found) == sorted(r["id"] for r in expected), (title, category)
+                print(f"{title or '-':<14} {category or '-':<10} {total:>10} {sql_seconds * 1000:>8.2f} ms "
+                      f"{index_seconds * 1000:>8.2f} ms {sql_seconds / index_seconds:>6.1f}x")
+
+            print()
+            for typo, expected in TYPOS:
+                (total, found), fuzzy_seconds = timed(lambda: index.search(typo, fuzzy=True, limit=20), args.repeat)
+                assert total and expected in found[0]["title"].lower(), (typo, found[:1])
+                print(f"fuzzy {typo!r:<14} {total:>6} resultados (1º: {found[0]['title'][:40]!r}) "
+                      f"{fuzzy_seconds * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Tempo de serialização das respostas JSON grandes, por 10 mil linhas:
+
+- books: lista de livros (dicts) pelo jsonable_encoder + JSONResponse,
+  como o FastAPI faz sem response_model, contra fast_json.FastJSONResponse;
+- features / training-data: registros do DataFrame de features validados e
+  convertidos de volta pelo response_model (List[FeatureOut]) contra os
+  registros montados por coluna (column_records) + FastJSONResponse.
+
+As features são calculadas antes (bench_features.py mede essa etapa); aqui
+só entra a montagem dos registros e a serialização.
+
+Uso
+---
+python benchmarks/bench_serialization.py --rows 10000 100000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixture_db import scaled_books  # noqa: E402
+
+# routers.ml importa database; a engine não é usada no benchmark
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+import fast_json  # noqa: E402
+from features import build_feature_frame  # noqa: E402
+from routers.ml import FeatureOut, TrainingOut  # noqa: E402
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"orjson: {'sim' if fast_json.orjson is not None else 'não (json da biblioteca padrão)'}\n")
+    print(f"{'resposta':<14} {'linhas':>8} {'antes/10k':>12} {'depois/10k':>12} {'ganho':>7}")
+    for rows in args.rows:
+        books = scaled_books(rows)
+        records = books.astype(object).where(books.notna(), None).to_dict(orient="records")
+        frame = build_feature_frame(books)
+        cases = [("books", None, lambda: records)]
+        for name, model in (("features", FeatureOut), ("training-data", TrainingOut)):
+            columns = list(model.model_fields)
+            cases.append((name, TypeAdapter(List[model]), lambda columns=columns: frame[columns]))
+
+        for name, adapter, source in cases:
+            if adapter is None:
+                def before():
+                    return JSONResponse(jsonable_encoder(source())).body
+
+                def after():
+                    return fast_json.FastJSONResponse(source()).body
+            else:
+                def before(adapter=adapter):
+                    selected = source().astype(object)
+                    items = selected.where(selected.notna(), None).to_dict(orient="records")
+                    return JSONResponse(adapter.dump_python(adapter.validate_python(items), mode="json")).body
+
+                def after():
+                    selected = source()
+                    return fast_json.FastJSONResponse(fast_json.column_records(selected, list(selected.columns))).body
+
+            expected, before_seconds = timed(before, args.repeat)
+            found, after_seconds = timed(after, args.repeat)
+            assert found == expected, name
+            scale = 10_000 / rows * 1000
+            print(f"{name:<14} {rows:>8} {before_seconds * scale:>9.1f} ms {after_seconds * scale:>9.1f} ms "
+                  f"{before_seconds / after_seconds:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
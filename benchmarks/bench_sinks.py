@@ -0,0 +1,103 @@
+"""
+Compara o pico de memória da gravação acumulada (lista + DataFrame) com a
+gravação em streaming dos sinks, e valida o sink do S3 contra o moto.
+
+Uso
+---
+python benchmarks/bench_sinks.py --rows 200000
+"""
+import argparse
+import io
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import boto3
+import pandas as pd
+from moto import mock_aws
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts"))
+sys.path.insert(0, str(ROOT / "scripts" / "AWS"))
+
+from scraper_lambda import S3CsvSink  # noqa: E402
+from sinks import LocalCsvSink  # noqa: E402
+
+
+def synthetic_books(rows):
+    for i in range(rows):
+        yield {
+            "title": f"Book {i} " + "x" * 40,
+            "price": round(10 + (i % 5000) / 100, 2),
+            "rating": i % 5 + 1,
+            "availability": f"In stock ({i % 23} available)",
+            "category": f"Category {i % 50}",
+            "image_url": f"https://books.toscrape.com/media/cache/{i:08x}.jpg",
+        }
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def accumulated(rows, output_path):
+    df = pd.DataFrame(list(synthetic_books(rows)))
+    df.index += 1
+    df.index.name = "id"
+    df.to_csv(output_path, encoding="utf-8")
+
+
+def streamed(rows, output_path, rows_per_part=None):
+    with LocalCsvSink(output_path, rows_per_part=rows_per_part) as sink:
+        sink.write_many(synthetic_books(rows))
+
+
+@mock_aws
+def check_s3(rows, rows_per_part):
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="bench")
+    buffer = io.StringIO()
+    with LocalCsvSink(Path(tempfile.mkdtemp()) / "books.csv") as local:
+        local.write_many(synthetic_books(rows))
+    expected = Path(local.parts[0]).read_text(encoding="utf-8")
+
+    with S3CsvSink("bench", "books_bench.csv", part_size=5 * 1024 * 1024, s3=s3) as sink:
+        sink.write_many(synthetic_books(rows))
+    body = s3.get_object(Bucket="bench", Key=sink.parts[0])["Body"].read().decode("utf-8")
+    assert body == expected, "objeto no S3 difere do CSV local"
+
+    with S3CsvSink("bench", "books_parts.csv", rows_per_part=rows_per_part, s3=s3) as sink:
+        sink.write_many(synthetic_books(rows))
+    for key in sink.parts:
+        buffer.write(s3.get_object(Bucket="bench", Key=key)["Body"].read().decode("utf-8"))
+    total_rows = sum(1 for line in buffer.getvalue().splitlines() if not line.startswith("id,"))
+    assert total_rows == rows, f"partes somam {total_rows} linhas"
+    return len(body.encode("utf-8")), len(sink.parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--rows-per-part", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        acc = peak_memory(lambda: accumulated(args.rows, f"{tmp}/acc.csv"))
+        stream = peak_memory(lambda: streamed(args.rows, f"{tmp}/stream.csv"))
+        assert Path(f"{tmp}/acc.csv").read_bytes() == Path(f"{tmp}/stream.csv").read_bytes()
+
+    print(f"{args.rows} livros sintéticos")
+    print(f"lista + DataFrame:  pico {acc:8.1f} MiB")
+    print(f"LocalCsvSink:       pico {stream:8.1f} MiB")
+
+    size, parts = check_s3(args.rows, args.rows_per_part)
+    print(f"S3CsvSink (moto):   {size / 1024 / 1024:.1f} MiB via multipart, {parts} objetos com rotação")
+
+
+if __name__ == "__main__":
+    main()
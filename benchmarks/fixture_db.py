@@ -0,0 +1,52 @@
+"""
+Banco SQLite local com tb_books_to_scrape para os benchmarks da API.
+
+O catálogo de data/books.csv é replicado até o número de linhas pedido
+(ids 1..n), com METADATA_FILENAME e LOAD_TIMESTAMP de uma carga fictícia.
+Como database.py cria a engine na importação, use_sqlite precisa ser
+chamada antes de importar main/routers.
+"""
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+LOAD_TIMESTAMP = datetime(2025, 1, 1)
+METADATA_FILENAME = "books_2025_01_01.csv"
+
+
+def use_sqlite(path):
+    """Aponta DATABASE_URL para o arquivo SQLite e retorna a URL."""
+    url = f"sqlite:///{Path(path).resolve()}"
+    os.environ["DATABASE_URL"] = url
+    return url
+
+
+def scaled_books(rows):
+    base = pd.read_csv(ROOT / "data" / "books.csv").drop(columns="id")
+    frame = base.iloc[[i % len(base) for i in range(rows)]].reset_index(drop=True)
+    frame.insert(0, "id", range(1, rows + 1))
+    frame["metadata_filename"] = METADATA_FILENAME
+    frame["load_timestamp"] = LOAD_TIMESTAMP
+    return frame
+
+
+def seed_books(url, rows=1000, chunksize=50_000):
+    """Recria tb_books_to_scrape em url com rows livros e consolida tb_books_latest."""
+    from latest import LatestCatalog
+    from models import Books, BooksLatest
+
+    engine = create_engine(url)
+    for table in (Books.__table__, BooksLatest.__table__):
+        table.drop(engine, checkfirst=True)
+    Books.__table__.create(engine)
+    scaled_books(rows).to_sql(Books.__tablename__, engine, if_exists="append", index=False, chunksize=chunksize)
+    LatestCatalog(engine).merge()
+    engine.dispose()
+    return rows
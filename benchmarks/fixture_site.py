@@ -0,0 +1,185 @@
+"""
+Réplica local do books.toscrape.com para benchmarks do scraper.
+
+As páginas de listagem e de detalhe são geradas a partir de data/books.csv
+com a mesma marcação HTML do site original, e servidas por um
+ThreadingHTTPServer com latência artificial opcional por requisição.
+"""
+import csv
+import hashlib
+import html
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BOOKS_CSV_PATH = PROJECT_ROOT / "data" / "books.csv"
+BOOKS_PER_PAGE = 20
+RATING_WORDS = {1: "One", 2: "Two", 3: "Three", 4: "Four", 5: "Five"}
+
+
+def load_books(csv_path=BOOKS_CSV_PATH):
+    with open(csv_path, encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def render_listing(books, page, total_pages):
+    articles = []
+    for book in books:
+        title = html.escape(book["title"], quote=True)
+        short_title = html.escape(book["title"][:20])
+        rating = RATING_WORDS.get(int(book["rating"]), "Zero")
+        articles.append(f"""
+        <li class="col-xs-6 col-sm-4 col-md-3 col-lg-3">
+            <article class="product_pod">
+                <p class="star-rating {rating}">
+                    <i class="icon-star"></i>
+                </p>
+                <h3><a href="book_{book['id']}/index.html" title="{title}">{short_title}...</a></h3>
+                <div class="product_price">
+                    <p class="price_color">£{float(book['price']):.2f}</p>
+                    <p class="instock availability"><i class="icon-ok"></i> In stock</p>
+                </div>
+            </article>
+        </li>""")
+    return f"""<!DOCTYPE html>
+<html lang="en-us">
+<head><title>All products | Books to Scrape - Sandbox</title></head>
+<body id="default" class="default">
+<div class="page_inner">
+    <ul class="breadcrumb"><li><a href="../index.html">Home</a></li><li class="active">All products</li></ul>
+    <section>
+        <ol class="row">{''.join(articles)}
+        </ol>
+        <ul class="pager"><li class="current">Page {page} of {total_pages}</li></ul>
+    </section>
+</div>
+</body>
+</html>"""
+
+
+def render_detail(book):
+    title = html.escape(book["title"])
+    category = html.escape(book["category"])
+    image_path = book["image_url"].split("books.toscrape.com/", 1)[-1]
+    return f"""<!DOCTYPE html>
+<html lang="en-us">
+<head><title>{title} | Books to Scrape - Sandbox</title></head>
+<body id="default" class="default">
+<div class="page_inner">
+    <ul class="breadcrumb">
+        <li><a href="../../index.html">Home</a></li>
+        <li><a href="../category/books_1/index.html">Books</a></li>
+        <li><a href="../category/books/category_2/index.html">{category}</a></li>
+        <li class="active">{title}</li>
+    </ul>
+    <article class="product_page">
+        <div class="row">
+            <div class="col-sm-6">
+                <div id="product_gallery" class="carousel">
+                    <div class="thumbnail">
+                        <div class="carousel-inner">
+                            <div class="item active">
+                                <img src="../../{image_path}" alt="{title}" />
+                            </div>
+                        </div>
+                    </div>
+                </div>
+            </div>
+            <div class="col-sm-6 product_main">
+                <h1>{title}</h1>
+                <p class="price_color">£{float(book['price']):.2f}</p>
+                <p class="instock availability">
+                    <i class="icon-ok"></i>
+                    {html.escape(book['availability'])}
+                </p>
+            </div>
+        </div>
+        <table class="table table-striped">
+            <tr><th>UPC</th><td>{int(book['id']):016x}</td></tr>
+            <tr><th>Product Type</th><td>Books</td></tr>
+        </table>
+    </article>
+</div>
+</body>
+</html>"""
+
+
+def build_site(books=None):
+    """Retorna um dicionário caminho -> HTML com todas as páginas do site."""
+    books = books if books is not None else load_books()
+    total_pages = (len(books) + BOOKS_PER_PAGE - 1) // BOOKS_PER_PAGE
+    pages = {}
+    for page in range(1, total_pages + 1):
+        chunk = books[(page - 1) * BOOKS_PER_PAGE: page * BOOKS_PER_PAGE]
+        pages[f"/catalogue/page-{page}.html"] = render_listing(chunk, page, total_pages)
+    for book in books:
+        pages[f"/catalogue/book_{book['id']}/index.html"] = render_detail(book)
+    return pages
+
+
+class FixtureSite:
+    """
+    Servidor HTTP local em thread própria. Responde com ETag e atende
+    If-None-Match com 304, como um servidor de conteúdo estático.
+
+    Uso
+    ---
+    with FixtureSite(latency=0.02) as site:
+        scrape_books(base_url=site.base_url)
+    """
+
+    def __init__(self, pages=None, latency=0.0, host="127.0.0.1", port=0):
+        self.pages = pages if pages is not None else build_site()
+        self.latency = latency
+        self.request_count = 0
+        self.not_modified_count = 0
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_GET(self):
+                site.request_count += 1
+                if site.latency:
+                    time.sleep(site.latency)
+                body = site.pages.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                payload = body.encode("utf-8")
+                etag = '"%s"' % hashlib.md5(payload).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    site.not_modified_count += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
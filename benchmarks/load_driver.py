@@ -0,0 +1,135 @@
+"""
+Gerador de carga HTTP concorrente para os benchmarks da API.
+
+Cada cenário roda com N clientes em malha fechada (cada um envia a próxima
+requisição assim que recebe a resposta) por um tempo fixo, contra a API no
+mesmo processo (httpx.ASGITransport) ou um servidor já rodando (--url).
+O resultado de cada cenário traz req/s, p50/p95/p99 e os status recebidos,
+em um dicionário pronto para salvar em JSON e comparar entre execuções.
+"""
+import asyncio
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def summarize(latencies, statuses, errors, seconds):
+    """Resumo de um cenário: vazão, percentis (ms) e contagem por status."""
+    ms = [latency * 1000 for latency in latencies]
+    ok = sum(count for status, count in statuses.items() if 200 <= int(status) < 400)
+    return {
+        "requests": len(ms),
+        "ok": ok,
+        "errors": errors + len(ms) - ok,
+        "rps": round(len(ms) / seconds, 1),
+        "p50_ms": _round(percentile(ms, 50)),
+        "p95_ms": _round(percentile(ms, 95)),
+        "p99_ms": _round(percentile(ms, 99)),
+        "mean_ms": _round(sum(ms) / len(ms) if ms else None),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+def make_client(app=None, url=None, timeout=120):
+    """Cliente httpx para a API no mesmo processo (app) ou em url."""
+    import httpx
+
+    if url is not None:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        return httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=timeout)
+
+
+async def run_scenario(client, request, concurrency, seconds):
+    """
+    Executa um cenário.
+
+    Parameters
+    ----------
+    client : httpx.AsyncClient
+    request : função (client, i) -> awaitable da resposta; i é o número da
+        requisição, para variar ids, cursores e termos entre as chamadas
+    concurrency : clientes simultâneos
+    seconds : duração da medição
+    """
+    latencies, statuses, errors = [], {}, 0
+    counter = iter(range(1 << 62))
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await request(client, next(counter))
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, errors, time.perf_counter() - start)
+
+
+def run_metadata(**extra):
+    """Contexto da execução salvo junto com os resultados."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **extra,
+    }
+
+
+def save_results(path, results):
+    Path(path).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def print_results(results, baseline=None):
+    """Tabela dos cenários; com baseline (outro JSON), a variação de req/s e p95."""
+    header = f"{'cenário':<18} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'erros':>7}"
+    if baseline is not None:
+        header += f" {'req/s Δ':>9} {'p95 Δ':>9}"
+    print(header)
+    for name, result in results["scenarios"].items():
+        line = (f"{name:<18} {result['rps']:>9.1f} {_ms(result['p50_ms'])} {_ms(result['p95_ms'])} "
+                f"{_ms(result['p99_ms'])} {result['errors']:>7}")
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        if previous:
+            line += f" {_delta(result['rps'], previous['rps'])} {_delta(result['p95_ms'], previous['p95_ms'])}"
+        print(line)
+
+
+def _ms(value):
+    return f"{'-':>9}" if value is None else f"{value:>6.1f} ms"
+
+
+def _delta(current, previous):
+    if not current or not previous:
+        return f"{'-':>9}"
+    return f"{(current / previous - 1) * 100:>+8.1f}%"
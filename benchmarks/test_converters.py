@@ -0,0 +1,92 @@
+"""
+Micro-benchmarks (pytest-benchmark) das conversões de routers/ml.py
+(parse_price, convert_rating, to_availability_flag) por chamada, e das
+versões vetorizadas de features.py sobre VECTOR_ROWS linhas, com os
+valores típicos do site.
+
+Cada benchmark também confere o resultado da conversão, e
+test_vectorized_matches_scalar confere que as versões vetorizadas
+concordam com as de routers/ml.py: uma conversão que mude falha o teste em
+vez de só mudar o tempo.
+
+Uso
+---
+pytest benchmarks/test_converters.py
+pytest benchmarks/test_converters.py --benchmark-json conversoes.json
+pytest benchmarks/test_converters.py --benchmark-autosave --benchmark-compare
+pytest benchmarks/test_converters.py --benchmark-disable   (só as verificações)
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# routers.ml importa database; a engine não é usada nos benchmarks
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from load_driver import ROOT  # noqa: E402
+
+sys.path.insert(0, str(ROOT))
+
+from features import availability_flags, convert_ratings, parse_prices  # noqa: E402
+from routers.ml import convert_rating, parse_price, to_availability_flag  # noqa: E402
+
+# Valor típico do site -> resultado esperado
+PRICES = [("£51.77", 51.77), ("  £ 53.74 ", 53.74), ("R$ 1,234.50", 1234.5), ("£0.00", 0.0),
+          ("sem preço", None), (53.74, 53.74), (None, None)]
+RATINGS = [("One", 1), ("Three", 3), ("Five", 5), ("Zero", 0), (4, 4), (9, 5), (None, 0)]
+AVAILABILITY = [("In stock (22 available)", 1), ("In stock", 1), ("Out of stock", 0), ("", 0), (None, 0)]
+VECTOR_ROWS = 100_000
+
+CONVERSIONS = [
+    pytest.param(parse_price, parse_prices, PRICES, id="price"),
+    pytest.param(convert_rating, convert_ratings, RATINGS, id="rating"),
+    pytest.param(to_availability_flag, availability_flags, AVAILABILITY, id="availability"),
+]
+
+
+def column(cases, rows=None):
+    """Series com os valores dos casos, repetidos até rows linhas."""
+    values = [value for value, _ in cases]
+    rows = rows or len(values)
+    return pd.Series([values[i % len(values)] for i in range(rows)], dtype=object)
+
+
+def as_python(series):
+    # NaN da versão vetorizada corresponde ao None da conversão por valor
+    return [None if pd.isna(value) else value for value in series.tolist()]
+
+
+@pytest.mark.benchmark(group="parse_price")
+@pytest.mark.parametrize("value, expected", PRICES, ids=[repr(value) for value, _ in PRICES])
+def test_parse_price(benchmark, value, expected):
+    assert benchmark(parse_price, value) == expected
+
+
+@pytest.mark.benchmark(group="convert_rating")
+@pytest.mark.parametrize("value, expected", RATINGS, ids=[repr(value) for value, _ in RATINGS])
+def test_convert_rating(benchmark, value, expected):
+    assert benchmark(convert_rating, value) == expected
+
+
+@pytest.mark.benchmark(group="to_availability_flag")
+@pytest.mark.parametrize("value, expected", AVAILABILITY, ids=[repr(value) for value, _ in AVAILABILITY])
+def test_to_availability_flag(benchmark, value, expected):
+    assert benchmark(to_availability_flag, value) == expected
+
+
+@pytest.mark.parametrize("scalar, vectorized, cases", CONVERSIONS)
+def test_vectorized_matches_scalar(scalar, vectorized, cases):
+    expected = [value for _, value in cases]
+    assert [scalar(value) for value, _ in cases] == expected
+    assert as_python(vectorized(column(cases))) == expected
+
+
+@pytest.mark.benchmark(group=f"vetorizado ({VECTOR_ROWS} linhas)")
+@pytest.mark.parametrize("scalar, vectorized, cases", CONVERSIONS)
+def test_vectorized(benchmark, scalar, vectorized, cases):
+    series = column(cases, VECTOR_ROWS)
+    result = benchmark(vectorized, series)
+    assert len(result) == VECTOR_ROWS
+    assert as_python(result[:len(cases)]) == [value for _, value in cases]
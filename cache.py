@@ -0,0 +1,209 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import func
+from models import CatalogBooks
+from app_logging import get_logger
+
+# Configuração do cache do catálogo
+CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "300"))
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "1024"))
+# Intervalo mínimo entre consultas da versão da carga no Snowflake
+CATALOG_VERSION_CHECK_SECONDS = float(os.getenv("CATALOG_VERSION_CHECK_SECONDS", "30"))
+
+log = get_logger("cache")
+
+
+class TTLCache:
+    """
+    Cache em memória com expiração por tempo (TTL) e limite de tamanho (LRU).
+
+    Seguro para uso entre threads; mantém contadores de hits, misses e
+    evictions para observabilidade.
+    """
+
+    def __init__(self, maxsize=CATALOG_CACHE_MAX_ENTRIES, ttl=CATALOG_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Retorna (encontrado, valor)."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._data[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value, ttl=None):
+        """Guarda value; ttl (segundos) substitui o TTL padrão para esta entrada."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 4) if total else None,
+            }
+
+
+class CatalogVersionProbe:
+    """
+    Versão da carga atual do catálogo.
+
+    O catálogo só muda quando o pipe do Snowflake carrega um novo arquivo,
+    então a "versão" dos dados é o par (MAX(LOAD_TIMESTAMP), MAX(METADATA_FILENAME))
+    da tabela do catálogo (models.CatalogBooks). A consulta é feita no máximo a cada
+    check_seconds; entre elas o último valor lido é reaproveitado por todos
+    os consumidores (cache, agregados, ...).
+    """
+
+    def __init__(self, check_seconds=CATALOG_VERSION_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self.version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def check(self, db):
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_seconds:
+                return self.version
+        version = tuple(db.query(
+            func.max(CatalogBooks.load_timestamp), func.max(CatalogBooks.metadata_filename)
+        ).one())
+        with self._lock:
+            self.version = version
+            self._checked_at = now
+        return version
+
+    def cached(self):
+        """Última versão lida, se ainda dentro de check_seconds; senão None."""
+        with self._lock:
+            if self._checked_at is not None and time.monotonic() - self._checked_at < self.check_seconds:
+                return self.version
+        return None
+
+    def reset(self):
+        with self._lock:
+            self._checked_at = None
+
+
+catalog_version = CatalogVersionProbe()
+
+
+class CatalogCache:
+    """
+    Cache read-through dos endpoints do catálogo.
+
+    Cada leitura confere a versão da carga (via CatalogVersionProbe); se ela
+    mudou desde a última vez, todo o cache é descartado.
+    """
+
+    def __init__(self, maxsize=CATALOG_CACHE_MAX_ENTRIES, ttl=CATALOG_CACHE_TTL_SECONDS,
+                 version_probe=catalog_version):
+        self.entries = TTLCache(maxsize, ttl)
+        self.version_probe = version_probe
+        self.version = None
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def current_version(self, db):
+        """Retorna a versão da carga atual, invalidando o cache se ela mudou."""
+        version = self.version_probe.check(db)
+        with self._lock:
+            if version != self.version:
+                if self.version is not None:
+                    self.invalidations += 1
+                self.entries.clear()
+                self.version = version
+        return version
+
+    def get_or_load(self, db, key, loader):
+        """Serve key do cache ou executa loader() e guarda o resultado."""
+        self.current_version(db)
+        found, value = self.entries.get(key)
+        if found:
+            return value
+        value = loader()
+        self.entries.set(key, value)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self.entries.clear()
+            self.invalidations += 1
+        self.version_probe.reset()
+
+    def stats(self):
+        with self._lock:
+            version = self.version
+            invalidations = self.invalidations
+        return {
+            **self.entries.stats(),
+            "invalidations": invalidations,
+            "version": {"load_timestamp": version[0], "metadata_filename": version[1]} if version else None,
+        }
+
+
+catalog_cache = CatalogCache()
+
+
+class CatalogIndex:
+    """
+    Índice em memória do catálogo no modo banco de dados.
+
+    factory recebe os registros de tb_books_to_scrape (dicts) e monta o
+    índice; ele é construído no primeiro uso e reconstruído quando a versão
+    da carga muda (a mesma usada pelo cache do catálogo).
+    """
+
+    def __init__(self, factory, name, cache=catalog_cache):
+        self.factory = factory
+        self.name = name
+        self.cache = cache
+        self.version = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    def index(self, db):
+        version = self.cache.current_version(db)
+        if self._index is not None and self.version == version:
+            return self._index
+        with self._lock:
+            if self._index is None or self.version != version:
+                records = [book.to_dict() for book in db.query(CatalogBooks).all()]
+                self._index = self.factory(records)
+                self.version = version
+                log.info("Índice de %s construído: %d livros", self.name, len(records))
+            return self._index
@@ -1,9 +1,17 @@
+import asyncio
+import functools
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm import sessionmaker, declarative_base
 from pathlib import Path
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session
+from app_logging import get_logger
+from metrics import instrument_engine
 
 # Diretório raiz do projeto
 PROJECT_ROOT = Path(__file__).resolve().parent
@@ -23,14 +31,227 @@ SQLALCHEMY_DATABASE_URL = os.getenv(
     f"snowflake://{user}:{password}@{account}/{database}/{schema}?warehouse={warehouse}&role={role}"
 )
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Pool de conexões da engine
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recicla conexões mais velhas que isso (segundos; -1 = nunca); o Snowflake encerra sessões ociosas
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Conexões abertas na inicialização da API, para o primeiro acesso não pagar o login no Snowflake
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "2"))
+
+# Threads dedicadas às chamadas síncronas do SQLAlchemy feitas pelas rotas async
+# (0 = executa no próprio event loop, como antes); por padrão, uma por conexão possível
+DB_THREAD_POOL_SIZE = int(os.getenv("DB_THREAD_POOL_SIZE", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+
+# Réplica local de leitura (replica.py): "off" (padrão) ou "sqlite". Ligada, as rotas do
+# catálogo leem do arquivo local; a autenticação continua lendo e gravando no banco principal
+READ_REPLICA = os.getenv("READ_REPLICA", "off").lower()
+READ_REPLICA_PATH = os.getenv("READ_REPLICA_PATH", "data/replica.db")
+
+log = get_logger("database")
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mede o tempo de espera por uma conexão livre."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self._stats_lock = threading.Lock()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.waits += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def recreate(self):
+        # Reaproveitado pelo SQLAlchemy em engine.dispose(); mantém os contadores
+        pool = super().recreate()
+        pool.waits, pool.wait_seconds = self.waits, self.wait_seconds
+        pool.max_wait_seconds, pool.timeouts = self.max_wait_seconds, self.timeouts
+        return pool
+
+
+def engine_options(url):
+    """Opções de pool para create_engine; SQLite em memória mantém o pool padrão."""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def replica_enabled():
+    # A réplica guarda uma linha por id: com CATALOG_TABLE=history ela juntaria as versões do
+    # histórico, então as leituras continuam no banco principal
+    return READ_REPLICA == "sqlite" and os.getenv("CATALOG_TABLE", "latest").lower() != "history"
+
+
+def replica_path():
+    path = Path(READ_REPLICA_PATH)
+    return path if path.is_absolute() else PROJECT_ROOT / path
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
+instrument_engine(engine)
 session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Engine das leituras do catálogo: a réplica local, se ligada, ou a própria engine principal
+if READ_REPLICA == "sqlite" and not replica_enabled():
+    log.warning("READ_REPLICA=sqlite ignorado com CATALOG_TABLE=history: a réplica só guarda a versão mais recente de cada id")
+if replica_enabled():
+    read_engine = create_engine(f"sqlite:///{replica_path()}", **engine_options(f"sqlite:///{replica_path()}"))
+    instrument_engine(read_engine)
+else:
+    read_engine = engine
+read_session_local = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 
 def get_db():
+    """Sessão do banco principal: autenticação e qualquer escrita."""
     db = session_local()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_read_db():
+    """Sessão das leituras do catálogo (réplica local quando READ_REPLICA=sqlite)."""
+    db = read_session_local()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def warm_up_pool(connections=DB_POOL_WARMUP):
+    """
+    Abre connections conexões de uma vez e as devolve ao pool.
+
+    Executada na inicialização da API: o handshake/login no Snowflake
+    acontece antes da primeira requisição e não durante ela.
+    """
+    connections = min(connections, DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = engine.connect()
+            opened.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in opened:
+            connection.close()
+    log.info("Pool de conexões aquecido com %d conexões", len(opened))
+    return len(opened)
+
+
+def pool_stats():
+    """Estado atual do pool de conexões da engine."""
+    pool = engine.pool
+    stats = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "max_overflow": DB_MAX_OVERFLOW,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+        })
+    if isinstance(pool, TimedQueuePool):
+        with pool._stats_lock:
+            stats.update({
+                "checkouts": pool.waits,
+                "avg_wait_ms": round(pool.wait_seconds / pool.waits * 1000, 3) if pool.waits else None,
+                "max_wait_ms": round(pool.max_wait_seconds * 1000, 3),
+                "timeouts": pool.timeouts,
+            })
+    return stats
+
+
+class DbThreadPool:
+    """
+    Pool de threads de tamanho fixo para o acesso ao banco.
+
+    As rotas async não podem chamar a sessão síncrona diretamente: uma
+    consulta lenta no Snowflake bloquearia o event loop para todas as outras
+    requisições do worker. Com run, a chamada vai para este pool e o loop
+    segue atendendo enquanto ela espera o banco.
+    """
+
+    def __init__(self, size=DB_THREAD_POOL_SIZE):
+        self.size = size
+        self.in_flight = 0
+        self.completed = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="db")
+        return self._executor
+
+    def _call(self, func, args, kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+
+    async def run(self, func, *args, **kwargs):
+        if self.size <= 0:
+            return func(*args, **kwargs)
+        with self._lock:
+            self.in_flight += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._get_executor(), functools.partial(self._call, func, args, kwargs))
+        except RuntimeError:
+            # Executor já encerrado (desligamento da API)
+            with self._lock:
+                self.in_flight -= 1
+            raise
+        return await future
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def stats(self):
+        with self._lock:
+            return {"size": self.size, "in_flight": self.in_flight, "completed": self.completed}
+
+
+db_pool = DbThreadPool()
+
+
+async def run_db(func, *args, **kwargs):
+    """Executa func(*args, **kwargs) no pool de threads do banco (ver DbThreadPool)."""
+    return await db_pool.run(func, *args, **kwargs)
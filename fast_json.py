@@ -0,0 +1,66 @@
+import json
+from datetime import date, datetime
+from typing import List, Sequence
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usa o json da biblioteca padrão
+    orjson = None
+
+ORJSON_OPTIONS = 0 if orjson is None else orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Tipo não serializável em JSON: {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    """
+    Serializa em JSON compacto (UTF-8), no mesmo formato da JSONResponse.
+
+    Com orjson instalado, a serialização é feita em C direto dos dicts e
+    listas, sem passar pelo jsonable_encoder do FastAPI.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse que serializa com fast_json.dumps.
+
+    Retornada diretamente pela rota, não passa pela validação do
+    response_model: o schema do OpenAPI continua o declarado no decorator,
+    mas cada linha deixa de virar uma instância Pydantic só para ser
+    convertida de volta em dict. Cabeçalhos definidos no parâmetro Response
+    da rota não são copiados; devem ser definidos nesta resposta.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def column_records(frame, columns: Sequence[str]) -> List[dict]:
+    """
+    Linhas de um DataFrame como dicts, montadas coluna a coluna.
+
+    Cada coluna é convertida uma vez para tipos nativos (tolist) e os NaN das
+    colunas numéricas viram None, sem o astype(object)/where/to_dict por linha.
+    """
+    values = []
+    for column in columns:
+        series = frame[column]
+        items = series.tolist()
+        if series.dtype.kind == "f" and series.isna().any():
+            items = [None if item != item else item for item in items]
+        values.append(items)
+    return [dict(zip(columns, row)) for row in zip(*values)]
@@ -0,0 +1,156 @@
+# Engenharia de features em lote para as rotas de ML: as mesmas transformações
+# de parse_price, convert_rating e to_availability_flag (routers/ml.py),
+# aplicadas por coluna com pandas/NumPy, mais a codificação de categoria.
+from typing import List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow é opcional; sem ele to_arrow não fica disponível
+    pa = None
+
+RATING_WORDS = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
+PRICE_NOISE = r"\xa0|£|R\$|,"
+PRICE_NUMBER = r"(\d+(?:\.\d+)?)"
+FEATURE_COLUMNS = ["title", "price", "rating", "availability", "category"]
+
+
+def _map_unique(series: pd.Series, func, missing):
+    """
+    Aplica func apenas aos valores distintos da coluna.
+
+    Preço, rating e disponibilidade têm poucos valores distintos no catálogo,
+    então interpretar cada valor uma vez e replicar por índice evita repetir
+    o trabalho com texto em milhões de linhas.
+    """
+    codes, uniques = pd.factorize(series)
+    mapped = np.append(func(pd.Series(uniques, dtype=object)), missing)
+    return mapped[codes]
+
+
+def parse_prices(values) -> np.ndarray:
+    """Versão vetorizada de parse_price: float64, NaN onde o preço é inválido."""
+    series = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return _map_unique(series, _parse_unique_prices, np.nan)
+
+
+def _parse_unique_prices(series: pd.Series) -> np.ndarray:
+    is_str = series.map(type).eq(str).to_numpy()
+    prices = pd.to_numeric(series.where(~is_str), errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+    if is_str.any():
+        text = series[is_str].str.replace(PRICE_NOISE, "", regex=True)
+        parsed = pd.to_numeric(text.str.extract(PRICE_NUMBER, expand=False), errors="coerce")
+        prices[is_str] = parsed.to_numpy(dtype=np.float64, na_value=np.nan)
+    return prices
+
+
+def convert_ratings(values) -> np.ndarray:
+    """
+    Versão vetorizada de convert_rating: int8 entre 0 e 5.
+
+    Valores numéricos são limitados a [0, 5] (nulos viram 0); textos usam o
+    nome do rating do site ("One".."Five"), com 0 para valores desconhecidos.
+    """
+    series = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.fillna(0).clip(0, 5).to_numpy(dtype=np.int8)
+    return _map_unique(series, _convert_unique_ratings, 0).astype(np.int8)
+
+
+def _convert_unique_ratings(series: pd.Series) -> np.ndarray:
+    numeric = pd.to_numeric(series.where(series.map(type).eq(int)), errors="coerce").clip(0, 5)
+    words = series.astype(str).map(RATING_WORDS)
+    return numeric.fillna(words).fillna(0).to_numpy(dtype=np.int8)
+
+
+def availability_flags(values) -> np.ndarray:
+    """Versão vetorizada de to_availability_flag: int8 (1 = 'in stock')."""
+    return _map_unique(pd.Series(values), _unique_availability_flags, 0).astype(np.int8)
+
+
+def _unique_availability_flags(series: pd.Series) -> np.ndarray:
+    text = series.where(series.map(type).eq(str), "")
+    return text.str.lower().str.contains("in stock", regex=False).to_numpy(dtype=np.int8)
+
+
+def build_feature_frame(books: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tabela de features no formato de FeatureOut (mais image_url, se existir).
+
+    Parameters
+    ----------
+    books : pd.DataFrame
+        Colunas de Books (title, price, rating, availability, category, ...)
+    """
+    frame = pd.DataFrame({
+        "title": books["title"].to_numpy(),
+        "price": parse_prices(books["price"]),
+        "rating": convert_ratings(books["rating"]),
+        "availability": availability_flags(books["availability"]),
+        "category": books["category"].to_numpy(),
+    })
+    if "image_url" in books:
+        frame["image_url"] = books["image_url"].to_numpy()
+    return frame
+
+
+def encode_categories(categories, vocabulary: Optional[Sequence[str]] = None, encoding: str = "onehot"):
+    """
+    Codifica a categoria.
+
+    Returns
+    -------
+    (matriz, vocabulário): para "ordinal" a matriz é um vetor int16 com o
+    índice no vocabulário (-1 = desconhecida); para "onehot" é uint8 n x k.
+    """
+    series = pd.Series(categories)
+    if vocabulary is None:
+        vocabulary = sorted(series.dropna().unique().tolist())
+    codes = pd.Categorical(series, categories=list(vocabulary)).codes.astype(np.int16)
+    if encoding == "ordinal":
+        return codes, list(vocabulary)
+    if encoding != "onehot":
+        raise ValueError(f"Codificação desconhecida: {encoding}")
+    onehot = np.zeros((len(codes), len(vocabulary)), dtype=np.uint8)
+    known = codes >= 0
+    onehot[np.flatnonzero(known), codes[known]] = 1
+    return onehot, list(vocabulary)
+
+
+def build_feature_matrix(books: pd.DataFrame, vocabulary: Optional[Sequence[str]] = None,
+                         encoding: str = "onehot"):
+    """
+    Matriz numérica compacta (float32) para treino/predição.
+
+    Colunas: price, rating, availability e a categoria codificada
+    (category=<nome> para one-hot, category_code para ordinal).
+
+    Returns
+    -------
+    (matriz, nomes das colunas, vocabulário de categorias)
+    """
+    prices = parse_prices(books["price"])
+    ratings = convert_ratings(books["rating"])
+    availability = availability_flags(books["availability"])
+    encoded, vocabulary = encode_categories(books["category"], vocabulary, encoding)
+    if encoding == "ordinal":
+        category_columns: List[str] = ["category_code"]
+        encoded = encoded.reshape(-1, 1)
+    else:
+        category_columns = [f"category={name}" for name in vocabulary]
+    matrix = np.empty((len(prices), 3 + encoded.shape[1]), dtype=np.float32)
+    matrix[:, 0] = prices
+    matrix[:, 1] = ratings
+    matrix[:, 2] = availability
+    matrix[:, 3:] = encoded
+    return matrix, ["price", "rating", "availability", *category_columns], vocabulary
+
+
+def to_arrow(feature_frame: pd.DataFrame):
+    """Converte a tabela de features em pyarrow.Table com tipos compactos."""
+    if pa is None:
+        raise RuntimeError("pyarrow não está instalado")
+    return pa.Table.from_pandas(feature_frame, preserve_index=False)
@@ -0,0 +1,224 @@
+import gzip
+import hashlib
+import os
+import threading
+from urllib.parse import parse_qsl, urlencode
+from cache import TTLCache, catalog_cache, catalog_version
+from database import run_db, read_session_local
+from snapshot import catalog_snapshot, snapshot_enabled
+from app_logging import get_logger
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele as respostas saem só em gzip
+    brotli = None
+
+# Rotas GET do catálogo cujas respostas dependem só da carga atual e dos parâmetros (sem autenticação:
+# requisições com Authorization nunca passam pelo cache)
+HTTP_CACHE_PATHS = (
+    "/api/v1/Default/api/v1/books",
+    "/api/v1/Default/api/v1/categories",
+    "/api/v1/optional/api/v1/stats/",
+    "/api/v1/optional/api/v1/books/top-rated",
+)
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "256"))
+HTTP_CACHE_TTL_SECONDS = float(os.getenv("HTTP_CACHE_TTL_SECONDS", "3600"))
+# Corpos maiores que isso não são guardados (a lista completa de 1000 livros tem ~300 KB)
+HTTP_CACHE_MAX_BODY_BYTES = int(os.getenv("HTTP_CACHE_MAX_BODY_BYTES", str(8 * 1024 * 1024)))
+HTTP_CACHE_CONTROL = os.getenv("HTTP_CACHE_CONTROL", "no-cache")
+HTTP_COMPRESS_MIN_BYTES = int(os.getenv("HTTP_COMPRESS_MIN_BYTES", "512"))
+GZIP_LEVEL = int(os.getenv("HTTP_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("HTTP_BROTLI_QUALITY", "5"))
+
+# Cabeçalhos da resposta original preservados no cache
+KEPT_HEADERS = (b"content-type", b"x-total-count", b"x-next-after-id")
+
+log = get_logger("http_cache")
+
+
+def _probe_version():
+    with read_session_local() as db:
+        return catalog_cache.current_version(db)
+
+
+async def current_version():
+    """Versão da carga em uso (snapshot ou banco); None se não puder ser lida."""
+    if snapshot_enabled():
+        return catalog_snapshot.version
+    version = catalog_version.cached()
+    if version is None:
+        version = await run_db(_probe_version)
+    return version
+
+
+def _accepted_encoding(accept_encoding):
+    accepted = {
+        part.split(";")[0].strip(): "q=0" not in part.replace(" ", "")
+        for part in accept_encoding.lower().split(",") if part.strip()
+    }
+    if brotli is not None and accepted.get("br"):
+        return "br"
+    if accepted.get("gzip"):
+        return "gzip"
+    return None
+
+
+def _etag(etag, encoding):
+    """ETag da variante enviada: as comprimidas têm o sufixo da codificação ("<digest>-gzip")."""
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+
+def _etag_matches(if_none_match, etag):
+    """Comparação fraca do If-None-Match com o ETag da variante que seria enviada (RFC 7232 §3.2)."""
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+class CachedBody:
+    """Corpo de uma resposta, com as versões comprimidas geradas sob demanda."""
+
+    __slots__ = ("headers", "body", "encoded", "lock")
+
+    def __init__(self, headers, body):
+        self.headers = headers
+        self.body = body
+        self.encoded = {}
+        self.lock = threading.Lock()
+
+    def encoding_for(self, encoding):
+        """Codificação aplicada de fato: corpos pequenos saem sem compressão."""
+        return None if encoding is None or len(self.body) < HTTP_COMPRESS_MIN_BYTES else encoding
+
+    def encode(self, encoding):
+        if self.encoding_for(encoding) is None:
+            return None, self.body
+        with self.lock:
+            data = self.encoded.get(encoding)
+            if data is None:
+                if encoding == "br":
+                    data = brotli.compress(self.body, quality=BROTLI_QUALITY)
+                else:
+                    data = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+                self.encoded[encoding] = data
+        return encoding, data
+
+
+class ResponseCache:
+    """Corpos das respostas do catálogo por rota+parâmetros, válidos para uma versão da carga."""
+
+    def __init__(self, maxsize=HTTP_CACHE_MAX_ENTRIES, ttl=HTTP_CACHE_TTL_SECONDS):
+        self.bodies = TTLCache(maxsize, ttl)
+        self.not_modified = 0
+        self.version = None
+
+    def use_version(self, version):
+        """Descarta os corpos guardados quando a versão da carga muda."""
+        if version != self.version:
+            self.bodies.clear()
+            self.version = version
+
+    def stats(self):
+        return {**self.bodies.stats(), "not_modified": self.not_modified, "brotli": brotli is not None}
+
+
+http_cache = ResponseCache()
+
+
+class HttpCacheMiddleware:
+    """
+    Cache HTTP das rotas GET do catálogo (ETag, 304 e corpos comprimidos).
+
+    O ETag é forte e derivado da versão da carga atual (a mesma do cache do
+    catálogo / snapshot), do caminho e dos parâmetros: enquanto não houver
+    carga nova e o corpo 200 da rota+parâmetros estiver guardado,
+    If-None-Match responde 304 sem executar a rota. Sem corpo guardado a rota
+    roda (e com ela a validação e a autenticação), então um 404 ou 401
+    nunca vira 304. Os corpos
+    200 ficam guardados por rota+parâmetros, junto com as versões gzip e
+    brotli, geradas uma única vez por versão da carga.
+    """
+
+    def __init__(self, app, paths=HTTP_CACHE_PATHS, cache=http_cache):
+        self.app = app
+        self.paths = paths
+        self.cache = cache
+
+    def _cacheable(self, scope, headers):
+        if scope["type"] != "http" or scope["method"] != "GET" or b"authorization" in headers:
+            return False
+        path = scope["path"]
+        if not any(path == prefix or path.startswith(prefix.rstrip("/") + "/") for prefix in self.paths):
+            return False
+        # O histórico de versões é lido do banco principal, fora da versão do catálogo
+        if path.endswith("/history"):
+            return False
+        # Exportações em streaming (ndjson/csv) não passam pelo cache
+        query = parse_qsl(scope["query_string"].decode("latin-1"))
+        return all(key != "format" or value == "json" for key, value in query)
+
+    async def __call__(self, scope, receive, send):
+        headers = dict(scope.get("headers") or []) if scope["type"] == "http" else {}
+        if not self._cacheable(scope, headers):
+            return await self.app(scope, receive, send)
+        try:
+            version = await current_version()
+        except Exception as e:
+            log.error("Cache HTTP: versão da carga indisponível: %s", e)
+            version = None
+        if version is None:
+            return await self.app(scope, receive, send)
+        self.cache.use_version(version)
+
+        query = urlencode(sorted(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)))
+        key = f"{scope['path']}?{query}"
+        digest = hashlib.sha256(repr((version, key)).encode()).hexdigest()[:32]
+        etag = f'"{digest}"'
+        encoding = _accepted_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+
+        found, cached = self.cache.bodies.get(key)
+        if not found:
+            status, response_headers, body = await self._capture(scope, receive)
+            if status != 200 or len(body) > HTTP_CACHE_MAX_BODY_BYTES:
+                return await self._send(send, status, response_headers, body, None, None, raw=True)
+            cached = CachedBody([(k, v) for k, v in response_headers if k in KEPT_HEADERS], body)
+            self.cache.bodies.set(key, cached)
+
+        # O 304 leva o mesmo ETag (e a mesma codificação) que o 200 desta requisição levaria
+        applied = cached.encoding_for(encoding)
+        if_none_match = headers.get(b"if-none-match")
+        if if_none_match and _etag_matches(if_none_match.decode("latin-1"), _etag(etag, applied)):
+            self.cache.not_modified += 1
+            return await self._send(send, 304, [], b"", etag, applied)
+        applied, data = cached.encode(encoding)
+        await self._send(send, 200, cached.headers, data, etag, applied)
+
+    async def _capture(self, scope, receive):
+        status, headers, chunks = 500, [], []
+
+        async def capture(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = [(k.lower(), v) for k, v in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        return status, headers, b"".join(chunks)
+
+    async def _send(self, send, status, headers, body, etag, encoding, raw=False):
+        if raw:
+            response_headers = [(k, v) for k, v in headers if k != b"content-length"]
+        else:
+            response_headers = list(headers)
+            response_headers.append((b"cache-control", HTTP_CACHE_CONTROL.encode()))
+            response_headers.append((b"vary", b"Accept-Encoding"))
+            if etag is not None:
+                response_headers.append((b"etag", _etag(etag, encoding).encode()))
+            if encoding is not None and status != 304:
+                response_headers.append((b"content-encoding", encoding.encode()))
+        if status != 304:
+            response_headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": response_headers})
+        await send({"type": "http.response.body", "body": body})
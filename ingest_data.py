@@ -0,0 +1,341 @@
+"""
+Ingestão em lote dos arquivos do scraper (CSV ou Parquet) no banco.
+
+Cada arquivo é lido em streaming, em lotes de --batch-size linhas. No
+histórico (tb_books_to_scrape, o padrão) as linhas só são acrescentadas,
+como no pipe: cada arquivo é uma versão do catálogo e o mesmo id aparece
+uma vez por arquivo. Repetir a ingestão de um arquivo troca as linhas dele
+(as de mesmo METADATA_FILENAME são apagadas antes), então não duplica nada.
+Em tb_books_latest (--table latest) a gravação é upsert por id. O commit acontece a cada --commit-every linhas, então uma
+falha no meio de um arquivo grande só desfaz a transação em aberto. Com
+--workers, vários arquivos (ex.: as partes books_part-NNNNN do scraper)
+são carregados em paralelo, cada um na sua conexão.
+
+Como no pipe do Snowflake, METADATA_FILENAME recebe o caminho do arquivo
+(relativo ao diretório atual, como o do stage é relativo ao stage: run1/books.csv
+e run2/books.csv são arquivos diferentes) e LOAD_TIMESTAMP o horário da
+carga, em UTC. Carregando o histórico
+(tb_books_to_scrape), tb_books_latest é consolidada no fim (latest.py).
+
+O banco padrão é um SQLite local (INGEST_DATABASE_URL); para gravar no
+banco da API é preciso passar --database-url.
+
+Por banco:
+- PostgreSQL: COPY (em latest, para uma tabela temporária + INSERT ... ON CONFLICT)
+- SQLite: INSERT em executemany, com ON CONFLICT em latest (um único
+  worker, já que o SQLite só aceita uma escrita por vez)
+- demais (Snowflake): INSERT; em latest, DELETE dos ids do lote + INSERT,
+  na mesma transação
+
+Uso
+---
+python ingest_data.py data/books.csv
+python ingest_data.py data/ --workers 4 --batch-size 20000 --commit-every 200000
+python ingest_data.py data/books.parquet --database-url postgresql://localhost/books --table latest
+"""
+import argparse
+import csv
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+import pandas as pd
+from sqlalchemy import Column, MetaData, Table, create_engine, inspect
+from app_logging import get_logger
+from latest import LatestCatalog
+from models import Books, BooksLatest
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional; sem ele só arquivos CSV podem ser carregados
+    pq = None
+
+# Linhas lidas do arquivo e gravadas por comando
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "10000"))
+# Linhas gravadas por transação (commit)
+INGEST_COMMIT_ROWS = int(os.getenv("INGEST_COMMIT_ROWS", "100000"))
+# Arquivos carregados em paralelo
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+# Banco de destino padrão: um SQLite local, nunca o banco da API (DATABASE_URL aponta para o Snowflake)
+INGEST_DATABASE_URL = os.getenv("INGEST_DATABASE_URL", "sqlite:///data/local.db")
+
+log = get_logger("ingest_data")
+
+# Histórico sem chave em id, como TB_BOOKS_TO_SCRAPE no Snowflake (o ORM exige uma chave primária em Books)
+HISTORY = Table(Books.__tablename__, MetaData(), *(Column(column.key, column.type) for column in Books.__table__.columns))
+TABLES = {"history": HISTORY, "latest": BooksLatest.__table__}
+SUFFIXES = (".csv", ".parquet")
+COLUMNS = [column.key for column in Books.__table__.columns]
+# Colunas que vêm do scraper; as demais são preenchidas na ingestão
+FILE_COLUMNS = [column for column in COLUMNS if column not in ("metadata_filename", "load_timestamp")]
+
+
+def input_files(paths):
+    """
+    Arquivos .csv/.parquet em paths (arquivos ou diretórios), em ordem de nome.
+
+    Um arquivo listado mais de uma vez (ex.: data/ e data/books.csv) entra
+    uma vez só: duas cargas paralelas do mesmo arquivo apagariam as linhas
+    uma da outra.
+    """
+    files, seen = [], set()
+    for path in map(Path, paths):
+        if path.is_dir():
+            found = sorted(child for child in path.iterdir() if child.suffix in SUFFIXES)
+        elif path.suffix in SUFFIXES and path.exists():
+            found = [path]
+        else:
+            raise ValueError(f"Arquivo não encontrado ou formato não suportado: {path}")
+        for child in found:
+            if child.resolve() not in seen:
+                seen.add(child.resolve())
+                files.append(child)
+    return files
+
+
+def metadata_filename(path):
+    """METADATA_FILENAME do arquivo: o caminho relativo ao diretório atual (absoluto se estiver fora dele)."""
+    resolved = path.resolve()
+    try:
+        return resolved.relative_to(Path.cwd().resolve()).as_posix()
+    except ValueError:
+        return resolved.as_posix()
+
+
+def read_batches(path, batch_size):
+    """DataFrames de até batch_size linhas, lidos do arquivo sem carregá-lo inteiro."""
+    if path.suffix == ".parquet":
+        if pq is None:
+            raise RuntimeError("pyarrow não está instalado; não é possível ler arquivos Parquet")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=batch_size)
+
+
+def prepare_rows(frame, metadata_filename, load_timestamp):
+    """
+    Converte um lote do arquivo em tuplas na ordem de COLUMNS.
+
+    Linhas sem id são descartadas e, se o mesmo id aparece mais de uma vez
+    no lote, a última ocorrência prevalece (como no upsert).
+    """
+    frame.columns = [column.lower() for column in frame.columns]
+    for column in FILE_COLUMNS:
+        if column not in frame.columns:
+            frame[column] = None
+    frame = frame.loc[frame["id"].notna(), FILE_COLUMNS].drop_duplicates("id", keep="last")
+    frame = frame.astype({"id": "int64"})
+    frame["metadata_filename"] = metadata_filename
+    frame["load_timestamp"] = load_timestamp
+    # Tipos nativos do Python e NaN -> None, como em snapshot.py
+    return list(frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None))
+
+
+def _upsert_sql(table, source):
+    """INSERT ... ON CONFLICT (id) com as linhas de source (VALUES ou SELECT), comum ao SQLite e ao PostgreSQL."""
+    updates = ", ".join(f"{column} = excluded.{column}" for column in COLUMNS if column != "id")
+    return f"INSERT INTO {table.name} ({', '.join(COLUMNS)}) {source} ON CONFLICT (id) DO UPDATE SET {updates}"
+
+
+def _copy(connection, table_name, rows):
+    """PostgreSQL: COPY do lote para a tabela."""
+    buffer = io.StringIO()
+    # Strings entre aspas: um campo vazio sem aspas é NULL para o COPY, "" continua string vazia
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    for row in rows:
+        writer.writerow(["" if value is None else value for value in row])
+    buffer.seek(0)
+    columns = ", ".join(COLUMNS)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def _copy_upsert(connection, table, rows):
+    """PostgreSQL: COPY do lote para uma tabela temporária e upsert a partir dela."""
+    staging = f"{table.name}_ingest"
+    connection.exec_driver_sql(f"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {table.name} INCLUDING DEFAULTS)")
+    connection.exec_driver_sql(f"TRUNCATE {staging}")
+    _copy(connection, staging, rows)
+    connection.exec_driver_sql(_upsert_sql(table, f"SELECT {', '.join(COLUMNS)} FROM {staging}"))
+
+
+def _insert(connection, table, rows):
+    """Grava um lote no histórico, só acrescentando linhas."""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        _copy(connection, table.name, rows)
+    elif dialect == "sqlite":
+        # executemany direto no driver: sem o processamento de parâmetros linha a linha do SQLAlchemy
+        connection.exec_driver_sql(
+            f"INSERT INTO {table.name} ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows
+        )
+    else:
+        connection.execute(table.insert(), [dict(zip(COLUMNS, row)) for row in rows])
+
+
+def write_batch(connection, table, rows):
+    """
+    Grava um lote (tuplas na ordem de COLUMNS) da forma mais rápida disponível no banco:
+    só INSERT no histórico, upsert por id em tb_books_latest.
+    """
+    dialect = connection.dialect.name
+    if table is HISTORY:
+        _insert(connection, table, rows)
+    elif dialect == "postgresql":
+        _copy_upsert(connection, table, rows)
+    elif dialect == "sqlite":
+        connection.exec_driver_sql(_upsert_sql(table, f"VALUES ({', '.join('?' * len(COLUMNS))})"), rows)
+    else:
+        # Sem ON CONFLICT (Snowflake não impõe chave primária): troca as linhas dos ids do lote
+        records = [dict(zip(COLUMNS, row)) for row in rows]
+        connection.execute(table.delete().where(table.c.id.in_([record["id"] for record in records])))
+        connection.execute(table.insert(), records)
+
+
+def ingest_file(engine, table, path, batch_size=INGEST_BATCH_SIZE, commit_every=INGEST_COMMIT_ROWS):
+    """
+    Carrega um arquivo na tabela.
+
+    Parameters
+    ----------
+    engine : engine do banco de destino
+    table : tabela de destino (tb_books_to_scrape ou tb_books_latest)
+    path : arquivo .csv ou .parquet
+    batch_size : linhas por comando de escrita
+    commit_every : linhas por transação
+
+    Returns
+    -------
+    Um dicionário com o arquivo, as linhas gravadas e o tempo gasto
+    """
+    start = time.perf_counter()
+    # UTC sem fuso, a mesma referência da marca d'água da réplica (replica.to_utc)
+    load_timestamp = datetime.now(timezone.utc).replace(tzinfo=None)
+    filename = metadata_filename(path)
+    if engine.dialect.name == "sqlite":
+        # Texto no mesmo formato que o SQLAlchemy grava no SQLite (o driver recebe os valores sem conversão)
+        load_timestamp = load_timestamp.strftime("%Y-%m-%d %H:%M:%S.%f")
+    rows = pending = 0
+    with engine.connect() as connection:
+        if table is HISTORY:
+            # Nova ingestão do mesmo arquivo: troca as linhas dele em vez de acrescentar outra cópia
+            connection.execute(table.delete().where(table.c.metadata_filename == filename))
+        for frame in read_batches(path, batch_size):
+            batch = prepare_rows(frame, filename, load_timestamp)
+            if not batch:
+                continue
+            write_batch(connection, table, batch)
+            rows += len(batch)
+            pending += len(batch)
+            if pending >= commit_every:
+                connection.commit()
+                pending = 0
+                log.info("%s: %d linhas gravadas", filename, rows)
+        connection.commit()
+    seconds = time.perf_counter() - start
+    log.info("%s: %d linhas em %.2f s (%.0f linhas/s)", filename, rows, seconds, rows / seconds if seconds else 0)
+    return {"file": str(path), "rows": rows, "seconds": round(seconds, 3)}
+
+
+def check_history_table(engine):
+    """
+    Recusa um histórico local com chave em id (ex.: criado por Books.__table__.create).
+
+    Com a chave, a segunda versão de um livro seria rejeitada pelo banco;
+    SQLite e PostgreSQL impõem a restrição, o Snowflake não.
+    """
+    if engine.dialect.name not in ("sqlite", "postgresql"):
+        return
+    inspector = inspect(engine)
+    if not inspector.has_table(HISTORY.name):
+        return
+    keys = [inspector.get_pk_constraint(HISTORY.name)["constrained_columns"]]
+    keys += [unique["column_names"] for unique in inspector.get_unique_constraints(HISTORY.name)]
+    keys += [index["column_names"] for index in inspector.get_indexes(HISTORY.name) if index["unique"]]
+    if ["id"] in keys:
+        raise RuntimeError(
+            f"{HISTORY.name} tem chave única em id e só guardaria uma versão de cada livro; "
+            f"recrie a tabela sem a chave ou carregue com --table latest"
+        )
+
+
+def ingest(paths, url=INGEST_DATABASE_URL, table="history", batch_size=INGEST_BATCH_SIZE,
+           commit_every=INGEST_COMMIT_ROWS, workers=INGEST_WORKERS, merge_latest=True):
+    """
+    Carrega os arquivos de paths no banco de url.
+
+    Parameters
+    ----------
+    paths : arquivos .csv/.parquet ou diretórios com eles
+    url : URL SQLAlchemy do banco de destino
+    table : "history" (tb_books_to_scrape) ou "latest" (tb_books_latest)
+    batch_size : linhas por comando de escrita
+    commit_every : linhas por transação
+    workers : arquivos carregados em paralelo
+    merge_latest : consolida tb_books_latest depois de carregar o histórico
+
+    Returns
+    -------
+    Um dicionário com o resultado de cada arquivo, o total de linhas,
+    o tempo total e as linhas por segundo
+    """
+    files = input_files(paths)
+    engine = create_engine(url)
+    if engine.dialect.name == "sqlite" and workers > 1:
+        log.info("SQLite aceita uma escrita por vez; carregando os arquivos com 1 worker")
+        workers = 1
+    target = TABLES[table]
+    if target is HISTORY:
+        check_history_table(engine)
+    target.create(engine, checkfirst=True)
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="ingest") as executor:
+            results = list(executor.map(
+                lambda path: ingest_file(engine, target, path, batch_size, commit_every), files
+            ))
+        rows = sum(result["rows"] for result in results)
+        if table == "history" and merge_latest and rows:
+            LatestCatalog(engine).merge()
+    finally:
+        engine.dispose()
+    seconds = time.perf_counter() - start
+    return {
+        "files": results,
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds, 1) if seconds else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", default=["data/books.csv"],
+                        help="arquivos .csv/.parquet ou diretórios (padrão: data/books.csv)")
+    parser.add_argument("--database-url", default=INGEST_DATABASE_URL,
+                        help=f"banco de destino (padrão: INGEST_DATABASE_URL, {INGEST_DATABASE_URL})")
+    parser.add_argument("--table", choices=list(TABLES), default="history",
+                        help="history = tb_books_to_scrape, latest = tb_books_latest")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="linhas por comando de escrita")
+    parser.add_argument("--commit-every", type=int, default=INGEST_COMMIT_ROWS, help="linhas por transação")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="arquivos carregados em paralelo")
+    parser.add_argument("--no-merge", action="store_true",
+                        help="não consolida tb_books_latest depois de carregar o histórico")
+    args = parser.parse_args()
+
+    result = ingest(
+        args.paths, url=args.database_url, table=args.table, batch_size=args.batch_size,
+        commit_every=args.commit_every, workers=args.workers, merge_latest=not args.no_merge,
+    )
+    log.info("Ingestão concluída: %d linhas de %d arquivos em %.2f s (%.0f linhas/s)",
+             result["rows"], len(result["files"]), result["seconds"], result["rows_per_second"] or 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import asyncio
+import os
+import threading
+import time
+from sqlalchemy import and_, func, or_, select
+from app_logging import get_logger
+from cache import catalog_version
+from database import engine
+from models import Books, BooksLatest, CATALOG_TABLE
+
+# Intervalo entre as consolidações de tb_books_latest feitas pela API (segundos). 0 (padrão) = só
+# na inicialização; no Snowflake a API não consolida, quem faz o MERGE é a TASK TASK_MERGE_BOOKS_LATEST
+# de scripts/snowflake/ingestion_ddl.sql
+LATEST_MERGE_SECONDS = float(os.getenv("LATEST_MERGE_SECONDS", "0"))
+
+log = get_logger("latest")
+
+COLUMN_NAMES = [column.key for column in Books.__table__.columns]
+
+
+def newest_versions(mark=None):
+    """SELECT da versão mais recente de cada id no histórico, só das cargas a partir de mark."""
+    ranked = select(
+        *Books.__table__.columns,
+        func.row_number().over(
+            partition_by=Books.id, order_by=(Books.load_timestamp.desc(), Books.metadata_filename.desc())
+        ).label("version_rank"),
+    ).where(Books.id.is_not(None))
+    if mark is not None:
+        ranked = ranked.where(Books.load_timestamp >= mark)
+    ranked = ranked.subquery()
+    return select(*(ranked.c[name] for name in COLUMN_NAMES)).where(ranked.c.version_rank == 1)
+
+
+def _newer(candidate, current):
+    """A versão candidate é mais nova que current: LOAD_TIMESTAMP maior ou, empatado, METADATA_FILENAME maior."""
+    return or_(
+        candidate.load_timestamp > current.load_timestamp,
+        and_(candidate.load_timestamp == current.load_timestamp,
+             candidate.metadata_filename > current.metadata_filename),
+    )
+
+
+def _upsert(connection, mark):
+    """
+    Grava em tb_books_latest as versões mais novas das cargas a partir de mark.
+
+    SQLite e PostgreSQL: INSERT ... ON CONFLICT, trocando a linha só se a
+    versão carregada for mais nova. Demais bancos: _replace.
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return _replace(connection, mark)
+    latest = BooksLatest.__table__
+    statement = insert(latest).from_select(COLUMN_NAMES, newest_versions(mark))
+    statement = statement.on_conflict_do_update(
+        index_elements=[latest.c.id],
+        set_={name: statement.excluded[name] for name in COLUMN_NAMES if name != "id"},
+        where=_newer(statement.excluded, latest.c),
+    )
+    return connection.execute(statement).rowcount
+
+
+def _replace(connection, mark):
+    """
+    Sem ON CONFLICT: DELETE dos ids com versão mais nova e INSERT dos que
+    faltam, na transação de connection (como ingest_data.write_batch faz em
+    tb_books_latest fora do SQLite e do PostgreSQL).
+    """
+    latest = BooksLatest.__table__
+    newest = newest_versions(mark).subquery()
+    current = latest.alias("current_version")
+    replaced = select(newest.c.id).join(current, current.c.id == newest.c.id).where(_newer(newest.c, current.c))
+    connection.execute(latest.delete().where(latest.c.id.in_(replaced)))
+    missing = select(*(newest.c[name] for name in COLUMN_NAMES)).where(
+        ~select(current.c.id).where(current.c.id == newest.c.id).exists()
+    )
+    return connection.execute(latest.insert().from_select(COLUMN_NAMES, missing)).rowcount
+
+
+class LatestCatalog:
+    """
+    Materialização da versão mais recente de cada livro (tb_books_latest).
+
+    O pipe acrescenta uma cópia do catálogo inteiro a cada arquivo, então
+    ler tb_books_to_scrape custa mais a cada carga e o mesmo id aparece
+    várias vezes. merge() consolida no histórico só as cargas a partir da
+    marca d'água (maior LOAD_TIMESTAMP já presente em tb_books_latest) e
+    atualiza um id apenas quando a versão carregada é mais nova, então
+    repetir o merge não muda nada. O histórico continua intacto.
+
+    No Snowflake a consolidação é da TASK TASK_MERGE_BOOKS_LATEST (mesma
+    regra, disparada pelo STREAM do histórico): merge() não cria nem grava
+    nada, o que também vale para um papel só com SELECT.
+    """
+
+    def __init__(self, source=engine):
+        self.source = source
+        self.merges = 0
+        self.rows_merged = 0
+        self.last_merge_at = None
+        self.last_merge_seconds = None
+        self._lock = threading.Lock()
+
+    def merge(self):
+        """
+        Consolida as cargas novas do histórico em tb_books_latest.
+
+        Returns
+        -------
+        Linhas inseridas ou atualizadas (0 no Snowflake, onde quem consolida é a TASK)
+        """
+        if self.source.dialect.name == "snowflake":
+            log.info("%s é consolidada pela TASK do Snowflake; nada a fazer na API", BooksLatest.__tablename__)
+            return 0
+        with self._lock:
+            start = time.perf_counter()
+            BooksLatest.__table__.create(self.source, checkfirst=True)
+            with self.source.begin() as connection:
+                mark = connection.execute(select(func.max(BooksLatest.load_timestamp))).scalar()
+                newest = connection.execute(select(func.max(Books.load_timestamp))).scalar()
+                if newest is None or (mark is not None and newest < mark):
+                    merged = 0
+                else:
+                    merged = _upsert(connection, mark)
+            self.merges += 1
+            self.rows_merged += max(merged or 0, 0)
+            self.last_merge_at = time.time()
+            self.last_merge_seconds = round(time.perf_counter() - start, 3)
+        if merged:
+            # Sem esperar o intervalo do probe: a próxima leitura já vê a versão nova
+            catalog_version.reset()
+            log.info("Catálogo consolidado: %d livros novos ou atualizados em %s", merged, BooksLatest.__tablename__)
+        return merged
+
+    def stats(self):
+        return {
+            "catalog_table": CATALOG_TABLE,
+            "merges": self.merges,
+            "rows_merged": self.rows_merged,
+            "last_merge_at": self.last_merge_at,
+            "last_merge_seconds": self.last_merge_seconds,
+        }
+
+
+latest_catalog = LatestCatalog()
+
+
+def latest_enabled():
+    return CATALOG_TABLE != "history"
+
+
+def app_merge_enabled():
+    """A API consolida tb_books_latest (na inicialização e a cada LATEST_MERGE_SECONDS) fora do Snowflake."""
+    return latest_enabled() and engine.dialect.name != "snowflake"
+
+
+async def merge_latest_periodically(catalog=latest_catalog, interval=LATEST_MERGE_SECONDS):
+    """Tarefa de fundo da API: consolida as cargas novas a cada interval segundos."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(catalog.merge)
+        except Exception as e:
+            log.error("Falha ao consolidar tb_books_latest: %s", e)
+
+
+if __name__ == "__main__":
+    # Consolidação avulsa (cron / job do deploy): python latest.py
+    log.info("Consolidação concluída: %d livros novos ou atualizados", latest_catalog.merge())
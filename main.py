@@ -1,7 +1,9 @@
 
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi import status
 from typing import Optional
 import pandas as pd
@@ -9,15 +11,119 @@ from sqlalchemy import create_engine, text
 import os
 import models as models 
 from routers import auth, src, ml, optional
-from database import Base, engine
+from database import Base, DB_POOL_WARMUP, db_pool, engine, replica_enabled, warm_up_pool
+from snapshot import catalog_snapshot, refresh_snapshot_periodically, snapshot_enabled
+from model_runtime import model_runtime
+from replica import read_replica, sync_replica_periodically
+from latest import LATEST_MERGE_SECONDS, app_merge_enabled, latest_catalog, merge_latest_periodically
+from password_pool import password_pool
+from http_cache import HttpCacheMiddleware, http_cache
+from cache import catalog_cache
+from auth_cache import auth_cache
+from database import pool_stats
+from app_logging import get_logger, logging_stats, stop_logging
+from metrics import MetricsMiddleware, registry
+
+log = get_logger()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Aquece o pool de conexões, carrega o modelo, consolida tb_books_latest (CATALOG_TABLE=latest), sincroniza a réplica de leitura (READ_REPLICA) e, quando CATALOG_BACKEND=snapshot, o snapshot do catálogo"""
+    if DB_POOL_WARMUP > 0:
+        try:
+            await asyncio.to_thread(warm_up_pool, DB_POOL_WARMUP)
+        except Exception as e:
+            log.error("Falha ao aquecer o pool de conexões: %s", e)
+    await asyncio.to_thread(model_runtime.load)
+    background = []
+    if app_merge_enabled():
+        # tb_books_latest precisa existir e estar em dia antes da réplica e do snapshot, que leem dela
+        # (no Snowflake quem consolida é a TASK; a API só lê)
+        try:
+            await asyncio.to_thread(latest_catalog.merge)
+        except Exception as e:
+            log.error("Falha ao consolidar tb_books_latest (servindo a versão atual): %s", e)
+        if LATEST_MERGE_SECONDS > 0:
+            background.append(asyncio.create_task(merge_latest_periodically()))
+    if replica_enabled():
+        # A réplica precisa estar em dia antes do snapshot, que também lê dela
+        try:
+            await asyncio.to_thread(read_replica.sync)
+        except Exception as e:
+            log.error("Falha ao sincronizar a réplica de leitura (servindo a cópia local atual): %s", e)
+        background.append(asyncio.create_task(sync_replica_periodically()))
+    if snapshot_enabled():
+        await asyncio.to_thread(catalog_snapshot.load)
+        background.append(asyncio.create_task(refresh_snapshot_periodically()))
+    yield
+    await ml.prediction_batcher.close()
+    password_pool.shutdown()
+    db_pool.shutdown()
+    for task in background:
+        task.cancel()
+    stop_logging()
+
 
 app = FastAPI(
     title="BookScraper API",
     version="1.0.0",
-    description="API para servir dados do Snowflake"
+    description="API para servir dados do Snowflake",
+    lifespan=lifespan
 )
 
+app.add_middleware(HttpCacheMiddleware)
+# Adicionado por último, fica por fora: mede também as respostas dadas pelo cache HTTP
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(auth.router)
 app.include_router(src.router)
 app.include_router(optional.router)
-app.include_router(ml.router)
\ No newline at end of file
+app.include_router(ml.router)
+
+
+@registry.add_collector
+def collect_service_stats():
+    """Gauges lidos dos stats() dos caches, pools e filas no momento do /metrics."""
+    caches = {
+        "catalog": catalog_cache.stats(),
+        "http": http_cache.stats(),
+        **{f"auth_{name}": stats for name, stats in auth_cache.stats().items()},
+    }
+    samples = []
+    for field, help_text in (("hits", "Acertos do cache"), ("misses", "Faltas do cache"),
+                             ("evictions", "Entradas removidas por limite de tamanho"),
+                             ("entries", "Entradas no cache"), ("hit_ratio", "Taxa de acerto do cache")):
+        samples.append((f"cache_{field}", help_text, {(("cache", name),): stats[field] for name, stats in caches.items()}))
+    samples.append(("http_cache_not_modified", "Respostas 304 do cache HTTP", http_cache.stats()["not_modified"]))
+
+    pool = pool_stats()
+    for field in ("checked_out", "checked_in", "overflow", "timeouts", "avg_wait_ms", "max_wait_ms"):
+        samples.append((f"db_pool_{field}", "Pool de conexões da engine", pool.get(field)))
+    samples.append(("db_threads_in_flight", "Chamadas ao banco em execução nas threads dedicadas",
+                    db_pool.stats()["in_flight"]))
+    passwords = password_pool.stats()
+    for field in ("pending", "rejected", "timeouts"):
+        samples.append((f"password_pool_{field}", "Pool de hash/verificação de senhas", passwords[field]))
+    predictions = ml.prediction_batcher.stats()
+    samples.append(("prediction_queue_depth", "Itens aguardando o micro-batch de /predictions",
+                    predictions["queue_depth"]))
+    samples.append(("prediction_avg_batch_size", "Tamanho médio dos lotes de /predictions",
+                    predictions["avg_batch_size"]))
+    logs = logging_stats()
+    samples.append(("log_queue_size", "Mensagens de log aguardando escrita", logs["queued"]))
+    samples.append(("log_dropped", "Mensagens de log descartadas com a fila cheia", logs["dropped"]))
+    return samples
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """
+    Métricas no formato de texto do Prometheus
+
+    Returns
+    -------
+    Histogramas de latência por rota e das consultas SQL, requisições em
+    andamento e os contadores de caches, pools e filas
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
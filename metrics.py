@@ -0,0 +1,269 @@
+import bisect
+import os
+import threading
+import time
+from sqlalchemy import event
+from starlette.routing import compile_path
+
+# Limites (segundos) dos buckets dos histogramas de latência
+LATENCY_BUCKETS = tuple(
+    float(bound) for bound in os.getenv(
+        "METRICS_LATENCY_BUCKETS", "0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10"
+    ).split(",")
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Histograma com buckets cumulativos no formato do Prometheus.
+
+    Cada combinação de labels guarda as contagens por bucket, a soma e o
+    total de observações; observe() é uma busca binária e um incremento.
+    """
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self):
+        """{labels: (contagens cumulativas por bucket, soma, total)}"""
+        with self._lock:
+            items = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        result = {}
+        for labels, counts, total, count in items:
+            cumulative, running = [], 0
+            for value in counts:
+                running += value
+                cumulative.append(running)
+            result[labels] = (cumulative, total, count)
+        return result
+
+    def quantile(self, q, *labels):
+        """Estimativa de um quantil pelo limite superior do bucket que o contém."""
+        cumulative, _total, count = self.snapshot().get(labels, ([], 0.0, 0))
+        if not count:
+            return None
+        rank = q * count
+        for bound, running in zip(self.buckets + (float("inf"),), cumulative):
+            if running >= rank:
+                return bound
+        return float("inf")
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (cumulative, total, count) in sorted(self.snapshot().items()):
+            for bound, running in zip(self.buckets + (float("inf"),), cumulative):
+                label_text = _labels(self.label_names + ("le",), labels + (_number(bound),))
+                lines.append(f"{self.name}_bucket{label_text} {running}")
+            label_text = _labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_number(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class Counter:
+    """Contador monotônico por labels."""
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}" for labels, value in items)
+        return lines
+
+
+class Gauge(Counter):
+    """Valor que sobe e desce (ex.: requisições em andamento)."""
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Métricas da API e coletores chamados na hora da leitura.
+
+    Os coletores leem os contadores que os caches e pools já mantêm
+    (stats()) e os expõem como gauges, sem custo no caminho das requisições.
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, func):
+        """func() -> lista de (nome, ajuda, {labels: valor} ou valor)"""
+        self.collectors.append(func)
+        return func
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            try:
+                samples = collect()
+            except Exception as e:
+                samples = [("metrics_collector_errors", f"Falha ao coletar métricas: {type(e).__name__}", 1)]
+            for name, help_text, values in samples:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                if not isinstance(values, dict):
+                    values = {(): values}
+                for labels, value in values.items():
+                    if value is None:
+                        continue
+                    label_names = tuple(label for label, _ in labels)
+                    label_values = tuple(value for _, value in labels)
+                    lines.append(f"{name}{_labels(label_names, label_values)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP por rota", ("method", "route", "status"),
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Requisições HTTP em andamento", ("method",),
+))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Tempo de execução das consultas SQL por tipo de comando", ("operation",),
+))
+db_query_errors = registry.register(Counter(
+    "db_query_errors_total", "Consultas SQL que terminaram em erro", ("operation",),
+))
+
+
+def _operation(statement):
+    word = statement.lstrip().split(None, 1)
+    return word[0].upper() if word else "OTHER"
+
+
+def instrument_engine(engine):
+    """
+    Mede cada consulta da engine com os eventos do SQLAlchemy.
+
+    before_cursor_execute guarda o início em conn.info (uma pilha, pois a
+    mesma conexão pode executar comandos aninhados) e after_cursor_execute
+    registra a duração no histograma, por tipo de comando (SELECT, INSERT...).
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start"].pop()
+        db_query_duration.observe(time.perf_counter() - started, _operation(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start"):
+            connection.info["query_start"].pop()
+        db_query_errors.inc(_operation(exception_context.statement or ""))
+
+    return engine
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede a latência de cada requisição HTTP.
+
+    A rota é identificada pelo template (ex.: /api/v1/books/{book_id}), que o
+    roteador deixa em scope["route"], para não criar uma série por id; o
+    tempo vai até o fim do corpo da resposta, inclusive em streaming.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._templates = None
+
+    def _route_template(self, scope):
+        route = scope.get("route")
+        if route is not None and getattr(route, "path", None):
+            return route.path
+        # Respostas dadas antes do roteamento (ex.: 304 do cache HTTP): procura o
+        # template entre os caminhos do OpenAPI, os sem parâmetros primeiro
+        if self._templates is None:
+            paths = sorted(scope["app"].openapi()["paths"], key=lambda path: path.count("{"))
+            self._templates = [(compile_path(path)[0], path) for path in paths]
+        for regex, path in self._templates:
+            if regex.match(scope["path"]):
+                return path
+        return "desconhecida"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        method = scope["method"]
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec(method)
+            http_request_duration.observe(time.perf_counter() - start, method, self._route_template(scope), str(status))
@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from database import PROJECT_ROOT
+from features import encode_categories
+from app_logging import get_logger
+
+# Artefato serializado do modelo de recomendação (JSON, ver LinearModel.save)
+MODEL_ARTIFACT_PATH = os.getenv("MODEL_ARTIFACT_PATH", "data/model.json")
+
+log = get_logger("model")
+
+
+class LinearModel:
+    """
+    Modelo linear de recomendação: score = intercepto + pesos · features
+    + peso da categoria; recomendado quando score > threshold.
+
+    Os parâmetros padrão reproduzem a heurística original de /predictions
+    (0.30 + 0.10 * rating + 0.05 * availability, threshold 0.70), usada
+    enquanto não houver um artefato treinado.
+    """
+
+    kind = "linear"
+
+    def __init__(self, intercept=0.30, weights=None, category_weights=None, threshold=0.70):
+        self.intercept = float(intercept)
+        self.weights = {"price": 0.0, "rating": 0.10, "availability": 0.05, **(weights or {})}
+        self.category_weights = dict(category_weights or {})
+        self.threshold = float(threshold)
+        self._vocabulary = sorted(self.category_weights)
+        # Última posição = categoria desconhecida (código -1), peso zero
+        self._category_lookup = np.array(
+            [self.category_weights[name] for name in self._vocabulary] + [0.0], dtype=np.float64
+        )
+
+    @classmethod
+    def from_artifact(cls, artifact):
+        return cls(
+            intercept=artifact.get("intercept", 0.30),
+            weights=artifact.get("weights"),
+            category_weights=artifact.get("category_weights"),
+            threshold=artifact.get("threshold", 0.70),
+        )
+
+    def to_artifact(self):
+        return {
+            "type": self.kind,
+            "intercept": self.intercept,
+            "weights": self.weights,
+            "category_weights": self.category_weights,
+            "threshold": self.threshold,
+        }
+
+    def save(self, path):
+        Path(path).write_text(json.dumps(self.to_artifact(), indent=2, ensure_ascii=False), encoding="utf-8")
+
+    def score(self, prices, ratings, availability, categories):
+        """Scores de todas as linhas em uma passada NumPy (float64)."""
+        codes, _ = encode_categories(categories, self._vocabulary, encoding="ordinal")
+        score = np.full(len(ratings), self.intercept, dtype=np.float64)
+        score += np.nan_to_num(prices) * self.weights["price"]
+        score += ratings * self.weights["rating"]
+        score += availability * self.weights["availability"]
+        score += self._category_lookup[codes]
+        return score
+
+    def predict(self, frame: pd.DataFrame):
+        """
+        Predições em lote.
+
+        Parameters
+        ----------
+        frame : pd.DataFrame
+            Colunas de PredictionInput: price, rating, availability e category
+
+        Returns
+        -------
+        (recommended, score): arrays bool e float64 (score arredondado em 2 casas)
+        """
+        score = self.score(
+            frame["price"].to_numpy(dtype=np.float64, na_value=np.nan),
+            frame["rating"].to_numpy(dtype=np.int64),
+            frame["availability"].to_numpy(dtype=np.int64),
+            frame["category"],
+        )
+        return score > self.threshold, np.round(score, 2)
+
+
+MODEL_TYPES = {
+    LinearModel.kind: LinearModel,
+}
+
+
+class ModelRuntime:
+    """
+    Mantém o modelo carregado em memória entre as requisições.
+
+    O artefato é lido uma única vez (na inicialização da API ou no primeiro
+    uso); sem artefato, usa o modelo padrão. O tipo do modelo vem do campo
+    "type" do artefato (ver MODEL_TYPES).
+    """
+
+    def __init__(self, artifact_path=MODEL_ARTIFACT_PATH):
+        self.artifact_path = artifact_path
+        self.model = None
+        self.source = None
+        self._lock = threading.Lock()
+
+    def _path(self):
+        path = Path(self.artifact_path)
+        return path if path.is_absolute() else PROJECT_ROOT / path
+
+    def load(self):
+        path = self._path()
+        if path.exists():
+            artifact = json.loads(path.read_text(encoding="utf-8"))
+            kind = artifact.get("type", LinearModel.kind)
+            if kind not in MODEL_TYPES:
+                raise ValueError(f"Tipo de modelo desconhecido: {kind}")
+            model, source = MODEL_TYPES[kind].from_artifact(artifact), str(path)
+        else:
+            model, source = LinearModel(), "default"
+        with self._lock:
+            self.model = model
+            self.source = source
+        log.info("Modelo de recomendação carregado: %s (%s)", model.kind, source)
+        return model
+
+    def get(self):
+        model = self.model
+        return model if model is not None else self.load()
+
+    def stats(self):
+        return {"type": self.model.kind if self.model else None, "source": self.source}
+
+
+model_runtime = ModelRuntime()
@@ -1,3 +1,4 @@
+import os
 from sqlalchemy import Column, Integer, String, Float, Boolean, TIMESTAMP
 from sqlalchemy.sql import text
 from database import Base
@@ -16,8 +17,8 @@ class Users(Base):
     is_active = Column(Boolean, default=True)
     role = Column(String, default='user')
     
-class Books(Base):
-    __tablename__ = 'tb_books_to_scrape'
+class BookColumns:
+    """Colunas de um livro, comuns ao histórico de cargas e à versão mais recente"""
     id = Column(Integer, primary_key=True)
     title = Column(String)
     price = Column(Float)
@@ -26,4 +27,26 @@ class Books(Base):
     category = Column(String) 
     image_url = Column(String)
     metadata_filename = Column(String)
-    load_timestamp = Column(TIMESTAMP)
\ No newline at end of file
+    load_timestamp = Column(TIMESTAMP)
+
+    def to_dict(self):
+        """Colunas do livro como dicionário (sem o estado interno do SQLAlchemy)"""
+        return {column.key: getattr(self, column.key) for column in self.__table__.columns}
+
+class Books(BookColumns, Base):
+    """
+    Histórico completo: cada carga do pipe acrescenta uma cópia do catálogo,
+    então o mesmo id aparece uma vez por arquivo carregado
+    """
+    __tablename__ = 'tb_books_to_scrape'
+
+class BooksLatest(BookColumns, Base):
+    """
+    Versão mais recente de cada id (maior LOAD_TIMESTAMP, depois METADATA_FILENAME),
+    materializada a partir do histórico por latest.merge_latest
+    """
+    __tablename__ = 'tb_books_latest'
+
+# Tabela lida pelas rotas do catálogo: "latest" (uma linha por id) ou "history" (tb_books_to_scrape inteira)
+CATALOG_TABLE = os.getenv("CATALOG_TABLE", "latest").lower()
+CatalogBooks = Books if CATALOG_TABLE == "history" else BooksLatest
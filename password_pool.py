@@ -0,0 +1,113 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from passlib.context import CryptContext
+
+# Pool dedicado ao bcrypt (100–300 ms de CPU por chamada)
+# "thread" (padrão; o bcrypt libera o GIL) ou "process"; 0 workers = executa no próprio event loop
+PASSWORD_POOL_KIND = os.getenv("PASSWORD_POOL_KIND", "thread")
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Máximo de operações em execução + na fila; acima disso a requisição é recusada (503)
+PASSWORD_POOL_MAX_PENDING = int(os.getenv("PASSWORD_POOL_MAX_PENDING", "64"))
+PASSWORD_POOL_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_POOL_TIMEOUT_SECONDS", "5"))
+
+bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+
+
+def hash_password(password: str) -> str:
+    return bcrypt_context.hash(password)
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    return bcrypt_context.verify(password, hashed_password)
+
+
+class PasswordPoolBusy(Exception):
+    """Fila do pool cheia ou operação acima do tempo limite."""
+
+
+class PasswordPool:
+    """
+    Executa hash/verify do bcrypt fora do event loop, num pool limitado.
+
+    O número de operações pendentes (em execução + na fila) é limitado a
+    max_pending; quando o limite é atingido, ou a espera passa de timeout
+    segundos, PasswordPoolBusy é lançada e a rota responde 503, em vez de a
+    fila crescer sem limite durante uma rajada de logins.
+    """
+
+    def __init__(self, kind=PASSWORD_POOL_KIND, workers=PASSWORD_POOL_WORKERS,
+                 max_pending=PASSWORD_POOL_MAX_PENDING, timeout=PASSWORD_POOL_TIMEOUT_SECONDS):
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    executor_class = ProcessPoolExecutor if self.kind == "process" else ThreadPoolExecutor
+                    self._executor = executor_class(max_workers=self.workers)
+        return self._executor
+
+    def _release(self, _future=None):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    async def run(self, func, *args):
+        if self.workers <= 0:
+            return func(*args)
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordPoolBusy("Fila de verificação de senha cheia")
+            self.pending += 1
+        try:
+            future = self._get_executor().submit(func, *args)
+        except Exception:
+            self._release()
+            raise
+        # A vaga só é liberada quando o worker termina, mesmo após timeout
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise PasswordPoolBusy("Tempo limite da verificação de senha excedido")
+
+    async def hash(self, password: str) -> str:
+        return await self.run(hash_password, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, password, hashed_password)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "workers": self.workers,
+                "pending": self.pending,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+            }
+
+
+password_pool = PasswordPool()
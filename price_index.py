@@ -0,0 +1,133 @@
+import numpy as np
+from cache import CatalogIndex
+
+MAX_RATING = 5
+# Primeiro trecho de um balde conferido pelo filtro de preço do top-N; os seguintes dobram de tamanho
+TOP_RATED_CHUNK = 64
+
+
+class PriceRatingIndex:
+    """
+    Índices secundários de preço e rating do catálogo.
+
+    - preço: posições ordenadas por (preço, id), com o array de preços
+      ordenado ao lado; um intervalo [min, max] vira duas buscas binárias
+      (np.searchsorted) e uma fatia, O(log n + k);
+    - rating: um "balde" por nota (5..0), cada um em ordem de id, para o
+      catálogo inteiro e para cada categoria; o top-N percorre os baldes do
+      maior para o menor e para ao completar N, O(k).
+
+    Os filtros combinados são aplicados só sobre a fatia ou os baldes
+    percorridos. No top-N, a categoria escolhe os baldes e a faixa de preço
+    é conferida em trechos crescentes de cada balde, parando ao completar
+    a página; só o total com faixa de preço exige percorrer os baldes
+    inteiros, e ele só é calculado quando pedido.
+    """
+
+    def __init__(self, records):
+        self.records = records
+        n = len(records)
+        ids = np.array([r["id"] if r["id"] is not None else -1 for r in records], dtype=np.int64)
+        prices = np.array([r["price"] if r["price"] is not None else np.nan for r in records], dtype=np.float64)
+        self.ratings = np.clip(np.array([r["rating"] or 0 for r in records], dtype=np.int16), 0, MAX_RATING)
+        self.prices = prices
+        self.categories = np.array([(r["category"] or "").lower() for r in records], dtype=object)
+
+        priced = np.flatnonzero(~np.isnan(prices))
+        order = np.lexsort((ids[priced], prices[priced]))
+        self.by_price = priced[order]
+        self.sorted_prices = prices[self.by_price]
+
+        by_id = np.argsort(ids, kind="stable") if n else np.empty(0, dtype=np.int64)
+        self.buckets = self._rating_buckets(by_id)
+        # Baldes por categoria: posições ordenadas por (categoria, rating desc, id), fatiadas por categoria
+        names, codes = np.unique(self.categories, return_inverse=True)
+        grouped = by_id[np.lexsort((MAX_RATING - self.ratings[by_id], codes[by_id]))]
+        bounds = np.searchsorted(codes[grouped], np.arange(len(names) + 1))
+        self.category_buckets = {
+            name: self._rating_buckets(grouped[bounds[code]:bounds[code + 1]]) for code, name in enumerate(names)
+        }
+
+    def _rating_buckets(self, positions):
+        """Um array por nota, de MAX_RATING a 0, mantendo a ordem de positions."""
+        ratings = self.ratings[positions]
+        return [positions[ratings == rating] for rating in range(MAX_RATING, -1, -1)]
+
+    def __len__(self):
+        return len(self.records)
+
+    def _mask(self, positions, category=None, min_rating=None, min_price=None, max_price=None):
+        mask = np.ones(len(positions), dtype=bool)
+        if category:
+            mask &= self.categories[positions] == category.lower()
+        if min_rating is not None:
+            mask &= self.ratings[positions] >= min_rating
+        if min_price is not None:
+            mask &= self.prices[positions] >= min_price
+        if max_price is not None:
+            mask &= self.prices[positions] <= max_price
+        return mask
+
+    def price_range(self, min_price, max_price, category=None, min_rating=None, offset=0, limit=None):
+        """
+        Livros com preço em [min_price, max_price], do mais barato ao mais caro.
+
+        Returns
+        -------
+        (total, registros da página)
+        """
+        start = np.searchsorted(self.sorted_prices, min_price, side="left")
+        end = np.searchsorted(self.sorted_prices, max_price, side="right")
+        positions = self.by_price[start:end]
+        if category or min_rating is not None:
+            positions = positions[self._mask(positions, category, min_rating)]
+        stop = None if limit is None else offset + limit
+        return len(positions), [self.records[i] for i in positions[offset:stop].tolist()]
+
+    def _first_in_price(self, bucket, wanted, min_price, max_price):
+        """Até wanted posições do balde dentro da faixa de preço, conferindo o balde em trechos crescentes."""
+        found, start, size = [], 0, max(wanted, TOP_RATED_CHUNK)
+        while len(found) < wanted and start < len(bucket):
+            chunk = bucket[start:start + size]
+            found.extend(chunk[self._mask(chunk, None, None, min_price, max_price)][:wanted - len(found)].tolist())
+            start += size
+            size *= 2
+        return found
+
+    def top_rated(self, limit=10, offset=0, category=None, min_rating=None, min_price=None, max_price=None,
+                  count=False):
+        """
+        Livros de maior rating; empates em ordem de id.
+
+        Parameters
+        ----------
+        count : com faixa de preço, calcula também o total (percorre os
+            baldes inteiros); sem ela o total sai do tamanho dos baldes
+
+        Returns
+        -------
+        (total ou None, registros da página)
+        """
+        buckets = self.buckets if not category else self.category_buckets.get(category.lower(), [])
+        buckets = [bucket for rating, bucket in zip(range(MAX_RATING, -1, -1), buckets)
+                   if min_rating is None or rating >= min_rating]
+        by_price = min_price is not None or max_price is not None
+        wanted = offset + limit
+        page = []
+        for bucket in buckets:
+            if len(page) >= wanted:
+                break
+            if by_price:
+                page.extend(self._first_in_price(bucket, wanted - len(page), min_price, max_price))
+            else:
+                page.extend(bucket[:wanted - len(page)].tolist())
+        if not by_price:
+            total = sum(len(bucket) for bucket in buckets)
+        elif count:
+            total = sum(int(self._mask(bucket, None, None, min_price, max_price).sum()) for bucket in buckets)
+        else:
+            total = None
+        return total, [self.records[i] for i in page[offset:]]
+
+
+catalog_price_index = CatalogIndex(PriceRatingIndex, "preços e ratings")
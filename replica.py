@@ -0,0 +1,244 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, func, inspect, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app_logging import get_logger
+from database import engine, read_engine, replica_enabled, replica_path
+from models import Books, CatalogBooks
+
+# Intervalo entre sincronizações da réplica com o banco principal (segundos)
+REPLICA_SYNC_SECONDS = float(os.getenv("REPLICA_SYNC_SECONDS", "300"))
+# Linhas lidas do banco principal e gravadas na réplica por lote
+REPLICA_SYNC_BATCH_SIZE = int(os.getenv("REPLICA_SYNC_BATCH_SIZE", "10000"))
+
+log = get_logger("replica")
+
+# Marca d'água da réplica: maior LOAD_TIMESTAMP copiado (em UTC, sem fuso) e quantas linhas tinham esse timestamp
+replica_meta = Table(
+    "replica_meta", MetaData(),
+    Column("table_name", String, primary_key=True),
+    Column("high_water_mark", DateTime),
+    Column("rows_at_mark", Integer),
+    Column("synced_at", DateTime),
+)
+
+
+def to_utc(value):
+    """
+    LOAD_TIMESTAMP em UTC sem fuso, a forma guardada na marca d'água.
+
+    Um banco com TIMESTAMP_TZ/timestamptz devolve datetimes com fuso e o
+    SQLite da réplica devolve sem; comparar os dois levanta TypeError.
+    Valores sem fuso já são tratados como UTC.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class ReadReplica:
+    """
+    Cópia local (SQLite) de tb_books_latest para as leituras do catálogo.
+    Com CATALOG_TABLE=history a réplica fica desligada: o upsert por id
+    guardaria só uma versão de cada livro.
+
+    Toda linha nova ou atualizada pelo merge chega com um LOAD_TIMESTAMP
+    maior, então cada sincronização copia apenas as linhas acima da marca
+    d'água da réplica (upsert por id). Se a quantidade de linhas na própria
+    marca mudou (um arquivo do pipe carregado com o mesmo timestamp depois
+    da última sincronização), elas também são relidas.
+
+    A cópia é feita em um arquivo temporário (backup da réplica atual mais
+    as linhas novas) que substitui o arquivo em uso com os.replace: quem
+    está lendo continua na versão anterior até devolver a conexão, e as
+    novas conexões já abrem a réplica completa.
+    """
+
+    def __init__(self, path=None, source=engine, target=read_engine):
+        self.path = path or replica_path()
+        self.source = source
+        self.target = target
+        self.syncs = 0
+        self.swaps = 0
+        self.rows_copied = 0
+        self.last_sync_at = None
+        self.last_sync_seconds = None
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def _read_mark(self, path):
+        if not path.exists():
+            return None, 0
+        local = create_engine(f"sqlite:///{path}")
+        try:
+            if not inspect(local).has_table(replica_meta.name):
+                return None, 0
+            with local.connect() as connection:
+                row = connection.execute(
+                    select(replica_meta.c.high_water_mark, replica_meta.c.rows_at_mark)
+                    .where(replica_meta.c.table_name == CatalogBooks.__tablename__)
+                ).first()
+        finally:
+            local.dispose()
+        return (to_utc(row[0]), row[1]) if row else (None, 0)
+
+    def high_water_mark(self):
+        return self._read_mark(self.path)[0]
+
+    def _source_changes(self, connection, mark, rows_at_mark):
+        """
+        O que copiar do banco principal desde a marca d'água.
+
+        Returns
+        -------
+        None se nada mudou; senão (filtro das linhas a copiar, nova marca,
+        linhas na nova marca). As linhas da própria marca só são relidas se
+        a contagem delas mudou no banco principal.
+        """
+        newest = connection.execute(select(func.max(CatalogBooks.load_timestamp))).scalar()
+        if newest is None:
+            return None
+        # A marca é guardada em UTC sem fuso; nas consultas ela vai com fuso se a coluna do banco principal tem fuso
+        tz_aware = newest.tzinfo is not None
+        newest = to_utc(newest)
+
+        def count_at(timestamp):
+            if tz_aware:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            return connection.execute(
+                select(func.count()).select_from(CatalogBooks.__table__)
+                .where(CatalogBooks.load_timestamp == timestamp)
+            ).scalar()
+
+        if mark is None:
+            return None, newest, count_at(newest)
+        mark_changed = count_at(mark) != rows_at_mark
+        if newest <= mark and not mark_changed:
+            return None
+        bound = mark.replace(tzinfo=timezone.utc) if tz_aware else mark
+        condition = CatalogBooks.load_timestamp >= bound if mark_changed else CatalogBooks.load_timestamp > bound
+        return condition, newest, count_at(newest)
+
+    def _prepare_copy(self, tmp):
+        tmp.unlink(missing_ok=True)
+        if self.path.exists():
+            current, copy = sqlite3.connect(self.path), sqlite3.connect(tmp)
+            try:
+                current.backup(copy)
+            finally:
+                current.close()
+                copy.close()
+        local = create_engine(f"sqlite:///{tmp}")
+        CatalogBooks.__table__.create(local, checkfirst=True)
+        replica_meta.create(local, checkfirst=True)
+        return local
+
+    def _copy_rows(self, connection, local, condition):
+        # Em ordem de carga: lendo o histórico, a versão mais recente de cada id é gravada por último
+        query = select(CatalogBooks.__table__).order_by(CatalogBooks.load_timestamp, CatalogBooks.metadata_filename)
+        if condition is not None:
+            query = query.where(condition)
+        result = connection.execution_options(stream_results=True, yield_per=REPLICA_SYNC_BATCH_SIZE).execute(query)
+        insert = sqlite_insert(CatalogBooks.__table__)
+        # Mesma regra da réplica inteira: a linha da carga mais recente prevalece
+        upsert = insert.on_conflict_do_update(
+            index_elements=[CatalogBooks.id],
+            set_={column.key: insert.excluded[column.key]
+                  for column in CatalogBooks.__table__.columns if column.key != "id"},
+        )
+        copied = 0
+        with local.begin() as target:
+            for batch in result.mappings().partitions():
+                target.execute(upsert, [dict(row) for row in batch])
+                copied += len(batch)
+        return copied
+
+    def _write_mark(self, local, mark, rows_at_mark):
+        values = {"table_name": CatalogBooks.__tablename__, "high_water_mark": mark,
+                  "rows_at_mark": rows_at_mark,
+                  "synced_at": datetime.now(timezone.utc).replace(tzinfo=None)}
+        statement = sqlite_insert(replica_meta).values(**values)
+        with local.begin() as target:
+            target.execute(statement.on_conflict_do_update(index_elements=[replica_meta.c.table_name], set_=values))
+
+    def sync(self):
+        """
+        Traz as linhas novas do banco principal e troca a réplica.
+
+        Returns
+        -------
+        Quantidade de linhas copiadas (0 se a réplica já estava em dia)
+        """
+        if CatalogBooks is Books:
+            raise RuntimeError("A réplica de leitura não suporta CATALOG_TABLE=history: o upsert por id juntaria as versões")
+        with self._lock:
+            start = time.perf_counter()
+            mark, rows_at_mark = self._read_mark(self.path)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            try:
+                with self.source.connect() as connection:
+                    changes = self._source_changes(connection, mark, rows_at_mark)
+                    copied = 0
+                    if changes is not None:
+                        self.path.parent.mkdir(parents=True, exist_ok=True)
+                        local = self._prepare_copy(tmp)
+                        try:
+                            condition, newest, rows_at_newest = changes
+                            copied = self._copy_rows(connection, local, condition)
+                            self._write_mark(local, newest, rows_at_newest)
+                        finally:
+                            local.dispose()
+                        os.replace(tmp, self.path)
+                        # Conexões devolvidas ao pool depois da troca são fechadas; as novas abrem o arquivo novo
+                        self.target.dispose()
+                        self.swaps += 1
+                self.last_error = None
+            except Exception as e:
+                tmp.unlink(missing_ok=True)
+                self.last_error = str(e)
+                raise
+            finally:
+                self.syncs += 1
+                self.last_sync_at = time.time()
+                self.last_sync_seconds = round(time.perf_counter() - start, 3)
+            self.rows_copied += copied
+        if copied:
+            log.info("Réplica de leitura atualizada: %d linhas copiadas (%s)", copied, self.path)
+        return copied
+
+    def stats(self):
+        mark = self.high_water_mark() if self.path.exists() else None
+        return {
+            "enabled": replica_enabled(),
+            "path": str(self.path),
+            "high_water_mark": mark.isoformat() if mark else None,
+            "syncs": self.syncs,
+            "swaps": self.swaps,
+            "rows_copied": self.rows_copied,
+            "last_sync_at": self.last_sync_at,
+            "last_sync_seconds": self.last_sync_seconds,
+            "last_error": self.last_error,
+        }
+
+
+read_replica = ReadReplica()
+
+
+async def sync_replica_periodically(replica=read_replica, interval=REPLICA_SYNC_SECONDS):
+    """Tarefa de fundo da API: sincroniza a réplica a cada interval segundos."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(replica.sync)
+        except Exception as e:
+            log.error("Falha ao sincronizar a réplica de leitura: %s", e)
+
+
+if __name__ == "__main__":
+    # Sincronização avulsa (cron / job do deploy): python replica.py
+    copied = read_replica.sync()
+    log.info("Sincronização concluída: %d linhas copiadas, marca d'água %s", copied, read_replica.high_water_mark())
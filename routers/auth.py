@@ -3,13 +3,17 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from passlib.context import CryptContext
-from database import session_local, engine
+from database import engine, get_db, run_db
+from password_pool import PasswordPoolBusy, bcrypt_context, password_pool
+from auth_cache import auth_cache
+from app_logging import get_logger
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from typing import Annotated
 from jose import jwt, JWTError
 from datetime import timedelta, datetime, timezone
 
+log = get_logger("auth")
+
 router = APIRouter(
     prefix = '/auth', 
     tags = ['Auth']
@@ -18,7 +22,6 @@ router = APIRouter(
 SECRET_KEY = "long_string"
 ALGORITHM = "HS256"
 
-bcrypt_context = CryptContext(schemes = ['bcrypt'], deprecated = 'auto')
 oauth2_bearer = OAuth2PasswordBearer(
     tokenUrl='Auth/login',
     scheme_name="JWT"
@@ -41,32 +44,32 @@ class AccessToken(BaseModel):
     access_token:str
     token_type:str
     
-def get_db():
-    db = session_local()
-    try:
-        yield db 
-    finally:
-        db.close()
-        
 db_dependency = Annotated[Session, Depends(get_db)]
 
-def authenticate_user(username: str, password: str, db: Session):
+def password_pool_busy(e: PasswordPoolBusy):
+    log.error("Pool de senhas indisponível: %s", e)
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Serviço de autenticação sobrecarregado, tente novamente",
+        headers={"Retry-After": "1"}
+    )
+
+async def authenticate_user(username: str, password: str, db: Session):
     """Autentica usuário usando query SQL direta"""
-    print(f"[DEBUG] Iniciando autenticação para usuário: {username}")
+    log.debug("Iniciando autenticação para usuário: %s", username)
     
     try:
-        # Query SQL direta usando os mesmos campos do insert
-        result = db.execute(
-            text("SELECT ID, USERNAME, HASHED_PASSWORD FROM DB_SCRAPE.SC_SCRAPE.USERS WHERE USERNAME = :username AND IS_ACTIVE = TRUE"),
-            {"username": username}
-        )
-        user_data = result.fetchone()
+        found, user_data = auth_cache.get_user(username)
+        if not found:
+            # Query SQL direta usando os mesmos campos do insert
+            user_data = await run_db(lambda: db.execute(
+                text("SELECT ID, USERNAME, HASHED_PASSWORD FROM DB_SCRAPE.SC_SCRAPE.USERS WHERE USERNAME = :username AND IS_ACTIVE = TRUE"),
+                {"username": username}
+            ).fetchone())
+            auth_cache.set_user(username, tuple(user_data) if user_data else None)
         
         if not user_data:
-            print(f"[DEBUG] Usuário não encontrado: {username}")
-            # Tentar buscar todos os usuários para debug
-            all_users = db.execute(text("SELECT USERNAME FROM DB_SCRAPE.SC_SCRAPE.USERS LIMIT 5")).fetchall()
-            print(f"[DEBUG] Usuários encontrados na tabela: {[row[0] for row in all_users]}")
+            log.debug("Usuário não encontrado: %s", username)
             return False
         
         # Acessar colunas por índice para evitar problemas de case
@@ -74,16 +77,16 @@ def authenticate_user(username: str, password: str, db: Session):
         user_username = user_data[1] # USERNAME  
         user_password = user_data[2] # HASHED_PASSWORD
         
-        print(f"[DEBUG] Usuário encontrado: {user_username}, ID: {user_id}")
+        log.debug("Usuário encontrado: %s, ID: %s", user_username, user_id)
         
-        # Verificar senha
-        password_valid = bcrypt_context.verify(password, user_password)
-        print(f"[DEBUG] Verificação de senha para {username}: {'Válida' if password_valid else 'Inválida'}")
+        # Verificar senha (no pool do bcrypt, fora do event loop)
+        password_valid = await password_pool.verify(password, user_password)
+        log.debug("Verificação de senha para %s: %s", username, "Válida" if password_valid else "Inválida")
         
         if not password_valid:
             return False
         
-        print(f"[DEBUG] Autenticação bem-sucedida para: {username}")
+        log.debug("Autenticação bem-sucedida para: %s", username)
         
         # Retorna dicionário com dados do usuário
         return {
@@ -91,8 +94,10 @@ def authenticate_user(username: str, password: str, db: Session):
             "username": user_username
         }
         
+    except PasswordPoolBusy:
+        raise
     except Exception as e:
-        print(f"[ERROR] Erro na autenticação: {str(e)}")
+        log.error("Erro na autenticação: %s", e)
         return False 
 
 def create_access_token(username: str, user_id: int, expires_delta: timedelta):
@@ -102,6 +107,10 @@ def create_access_token(username: str, user_id: int, expires_delta: timedelta):
     return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
 
 async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]):
+    # Token já verificado e ainda dentro do "exp"
+    cached_user = auth_cache.get_token(token)
+    if cached_user is not None:
+        return dict(cached_user)
     try:
         # Decodifica o token
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -117,6 +126,7 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]):
                 detail='Token inválido - dados de usuário ausentes'
             )
         
+        auth_cache.set_token(token, {'username': username, 'id': user_id}, payload.get('exp'))
         return {'username': username, 'id': user_id}
     except JWTError as e:
         raise HTTPException(
@@ -129,10 +139,10 @@ async def create_user(user_request: CreateUserRequest, db: db_dependency):
     """Criar usuário usando INSERT direto no Snowflake"""
     
     # Verificar se usuário já existe
-    check_user = db.execute(
+    check_user = await run_db(lambda: db.execute(
         text("SELECT USERNAME FROM DB_SCRAPE.SC_SCRAPE.USERS WHERE USERNAME = :username OR EMAIL = :email"),
         {"username": user_request.username, "email": user_request.email}
-    ).fetchone()
+    ).fetchone())
     
     if check_user:
         raise HTTPException(
@@ -140,11 +150,14 @@ async def create_user(user_request: CreateUserRequest, db: db_dependency):
             detail="Username ou email já existe"
         )
     
-    # Hash da senha
-    hashed_password = bcrypt_context.hash(user_request.password)
+    # Hash da senha (no pool do bcrypt, fora do event loop)
+    try:
+        hashed_password = await password_pool.hash(user_request.password)
+    except PasswordPoolBusy as e:
+        raise password_pool_busy(e)
     
     # Inserir usuário
-    try:
+    def insert_user():
         db.execute(
             text("""
                 INSERT INTO DB_SCRAPE.SC_SCRAPE.USERS (EMAIL, USERNAME, FIRST_NAME, LAST_NAME, HASHED_PASSWORD, IS_ACTIVE, ROLE)
@@ -160,9 +173,13 @@ async def create_user(user_request: CreateUserRequest, db: db_dependency):
             }
         )
         db.commit()
+
+    try:
+        await run_db(insert_user)
+        auth_cache.forget_user(user_request.username)
         return {"message": "Usuário criado com sucesso"}
     except Exception as e:
-        db.rollback()
+        await run_db(db.rollback)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao criar usuário: {str(e)}"
@@ -170,13 +187,16 @@ async def create_user(user_request: CreateUserRequest, db: db_dependency):
 
 @router.post("/login", response_model=Token)
 async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: db_dependency):
-    print(f"[DEBUG] Tentativa de login para usuário: {form_data.username}")
-    user = authenticate_user(str(form_data.username), str(form_data.password), db)
+    log.debug("Tentativa de login para usuário: %s", form_data.username)
+    try:
+        user = await authenticate_user(str(form_data.username), str(form_data.password), db)
+    except PasswordPoolBusy as e:
+        raise password_pool_busy(e)
     if not user:
-        print(f"[DEBUG] Falha na autenticação para: {form_data.username}")
+        log.debug("Falha na autenticação para: %s", form_data.username)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, 
                             detail="Could not validate the user")
-    print(f"[DEBUG] Login bem-sucedido para: {user['username']}")
+    log.debug("Login bem-sucedido para: %s", user["username"])
     access_token = create_access_token(user["username"], user["id"], timedelta(minutes=20))
     refresh_token = create_access_token(user["username"], user["id"], timedelta(days=7))
     return {'access_token': access_token, 
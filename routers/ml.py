@@ -1,10 +1,27 @@
 from typing import List, Optional
+import asyncio
+import os
 import re
-from fastapi import APIRouter, Depends
+import time
+import pandas as pd
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from pydantic import BaseModel, Field
-from database import get_db
-from models import Books
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from database import get_read_db
+from fast_json import FastJSONResponse, column_records
+from features import build_feature_frame
+from model_runtime import model_runtime
+from models import CatalogBooks
+from snapshot import catalog_snapshot, snapshot_enabled
+from streaming import (
+    FORMAT_PATTERN, MAX_PAGE_SIZE, iter_catalog_rows, page_catalog_rows, set_next_cursor, streaming_response
+)
+
+# Máximo de linhas aceitas por chamada de /predictions/batch
+PREDICTION_MAX_BATCH = int(os.getenv("PREDICTION_MAX_BATCH", "100000"))
+# Micro-batching de /predictions: até N itens ou M milissegundos por lote
+PREDICTION_BATCH_SIZE = int(os.getenv("PREDICTION_BATCH_SIZE", "64"))
+PREDICTION_BATCH_WAIT_MS = float(os.getenv("PREDICTION_BATCH_WAIT_MS", "5"))
 
 router = APIRouter(
     prefix="/api/v1/ml",
@@ -70,41 +87,247 @@ class PredictionOut(BaseModel):
     recommended: bool
     score: float
 
+def feature_row(book) -> dict:
+    return {
+        "title": book.title,
+        "price": parse_price(book.price),
+        "rating": convert_rating(book.rating),
+        "availability": to_availability_flag(book.availability),
+        "category": book.category,
+    }
+
+def training_row(book) -> dict:
+    return {**feature_row(book), "image_url": book.image_url}
+
+def feature_records(books, columns) -> List[dict]:
+    """Features de vários livros de uma vez (features.build_feature_frame)."""
+    frame = build_feature_frame(pd.DataFrame(
+        [(b.title, b.price, b.rating, b.availability, b.category, b.image_url) for b in books],
+        columns=["title", "price", "rating", "availability", "category", "image_url"],
+    ))
+    return column_records(frame, columns)
+
+def feature_response(db: Session, after_id: Optional[int], limit: Optional[int], columns) -> FastJSONResponse:
+    """
+    Resposta JSON das features, serializada direto das colunas.
+
+    Os registros já têm os tipos de FeatureOut/TrainingOut, então não são
+    revalidados pelo response_model (que continua definindo o OpenAPI).
+    """
+    if after_id is None and limit is None:
+        books = catalog_snapshot.rows() if snapshot_enabled() else db.query(CatalogBooks).all()
+        return FastJSONResponse(feature_records(books, columns))
+    page = page_catalog_rows(db, after_id, limit or MAX_PAGE_SIZE)
+    response = FastJSONResponse(feature_records(page, columns))
+    set_next_cursor(response, page, limit or MAX_PAGE_SIZE)
+    return response
+
 @router.get("/features", response_model=List[FeatureOut])
-def get_features(db: Session = Depends(get_db)):
-    books = db.query(Books).all()
-    features: List[FeatureOut] = []
-    for book in books:
-        features.append(FeatureOut(
-            title=book.title,
-            price=parse_price(book.price),
-            rating=convert_rating(book.rating),
-            availability=to_availability_flag(book.availability),
-            category=book.category
-        ))
-    return features
+def get_features(
+    db: Session = Depends(get_read_db),
+    after_id: Optional[int] = Query(None, description="Cursor: livros com id maior que este"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Tamanho da página"),
+    format: str = Query("json", pattern=FORMAT_PATTERN, description="json, ndjson ou csv"),
+):
+    if format != "json":
+        items = (feature_row(book) for book in iter_catalog_rows(after_id, limit))
+        return streaming_response(items, format, list(FeatureOut.model_fields), "features")
+    return feature_response(db, after_id, limit, list(FeatureOut.model_fields))
 
 @router.get("/training-data", response_model=List[TrainingOut])
-def get_training_data(db: Session = Depends(get_db)):
-    books = db.query(Books).all()
-    data: List[TrainingOut] = []
-    for book in books:
-        data.append(TrainingOut(
-            title=book.title,
-            price=parse_price(book.price),
-            rating=convert_rating(book.rating),
-            availability=to_availability_flag(book.availability),
-            category=book.category,
-            image_url=book.image_url
-        ))
-    return data
+def get_training_data(
+    db: Session = Depends(get_read_db),
+    after_id: Optional[int] = Query(None, description="Cursor: livros com id maior que este"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Tamanho da página"),
+    format: str = Query("json", pattern=FORMAT_PATTERN, description="json, ndjson ou csv"),
+):
+    if format != "json":
+        items = (training_row(book) for book in iter_catalog_rows(after_id, limit))
+        return streaming_response(items, format, list(TrainingOut.model_fields), "training-data")
+    return feature_response(db, after_id, limit, list(TrainingOut.model_fields))
+
+prediction_list = TypeAdapter(List[PredictionInput])
+# Só decodifica o array JSON, para contar as linhas antes de validar cada item
+json_list = TypeAdapter(List[object])
+
+def predict_batch(rows: List[dict]):
+    """Pontua as linhas (dicts de PredictionInput) com o modelo carregado, de uma vez."""
+    frame = pd.DataFrame(rows, columns=list(PredictionInput.model_fields))
+    return model_runtime.get().predict(frame)
+
+class PredictionBatcher:
+    """
+    Agrupa predições individuais concorrentes em um único lote.
+
+    Cada chamada de submit entra numa fila; uma tarefa de fundo retira até
+    max_size itens, esperando no máximo max_wait_ms depois do primeiro, e
+    pontua o lote inteiro com predict_batch numa thread. Cada chamador recebe
+    o seu resultado pelo próprio Future.
+    """
+
+    def __init__(self, max_size=PREDICTION_BATCH_SIZE, max_wait_ms=PREDICTION_BATCH_WAIT_MS):
+        self.max_size = max(1, max_size)
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.items = 0
+        self.max_queue_depth = 0
+        self._queue = None
+        self._task = None
+        self._loop = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._queue = asyncio.Queue()
+            self._loop = loop
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, row: dict):
+        """Enfileira uma linha de PredictionInput e aguarda (recommended, score)."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((row, future))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            self.batches += 1
+            self.items += len(batch)
+            try:
+                recommended, score = await asyncio.to_thread(predict_batch, [row for row, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), flag, value in zip(batch, recommended.tolist(), score.tolist()):
+                if not future.done():
+                    future.set_result((flag, value))
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else None,
+            "batch_fill_ratio": round(self.items / (self.batches * self.max_size), 4) if self.batches else None,
+        }
+
+
+prediction_batcher = PredictionBatcher()
 
 @router.post("/predictions", response_model=PredictionOut)
-def get_prediction(input_data: PredictionInput):
-    # Heurística simples (placeholder até ter modelo real)
-    score = 0.30 + 0.10 * input_data.rating + 0.05 * input_data.availability
-    recommended = score > 0.70
-    return PredictionOut(
-        recommended=recommended,
-        score=round(float(score), 2)
-    )
+async def get_prediction(input_data: PredictionInput):
+    recommended, score = await prediction_batcher.submit(input_data.model_dump())
+    return PredictionOut(recommended=recommended, score=score)
+
+@router.get("/predictions/stats")
+async def prediction_statistics():
+    """
+    Retorna o estado do micro-batching de /predictions e do modelo carregado
+
+    Returns
+    -------
+    Profundidade atual e máxima da fila, lotes processados, tamanho médio
+    e taxa de preenchimento dos lotes (itens / (lotes * tamanho máximo))
+    """
+    return {**prediction_batcher.stats(), "model": model_runtime.stats()}
+
+def _validation_detail(error: ValidationError, loc_prefix=()):
+    # Sem "input": em JSON inválido ele traz os bytes brutos do corpo, que não são serializáveis
+    return [
+        {**item, "loc": [*loc_prefix, *item["loc"]]}
+        for item in error.errors(include_url=False, include_context=False, include_input=False)
+    ]
+
+def _too_many_rows():
+    return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                         detail=f"Máximo de {PREDICTION_MAX_BATCH} linhas por chamada")
+
+def _parse_prediction_rows(body: bytes, ndjson: bool) -> List[dict]:
+    """
+    Valida o corpo de /predictions/batch em dicts de PredictionInput.
+
+    O limite de PREDICTION_MAX_BATCH linhas é verificado antes da validação
+    (contando as linhas do NDJSON ou os itens do array já decodificado).
+    """
+    if ndjson:
+        lines = [line for line in body.splitlines() if line.strip()]
+        if len(lines) > PREDICTION_MAX_BATCH:
+            raise _too_many_rows()
+        items = []
+        for number, line in enumerate(lines):
+            try:
+                items.append(PredictionInput.model_validate_json(line))
+            except ValidationError as e:
+                raise HTTPException(status_code=422, detail=_validation_detail(e, ("body", number)))
+    else:
+        try:
+            data = json_list.validate_json(body)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=_validation_detail(e, ("body",)))
+        if len(data) > PREDICTION_MAX_BATCH:
+            raise _too_many_rows()
+        try:
+            items = prediction_list.validate_python(data)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=_validation_detail(e, ("body",)))
+    return [item.model_dump() for item in items]
+
+def _score_prediction_body(body: bytes, ndjson: bool) -> List[dict]:
+    rows = _parse_prediction_rows(body, ndjson)
+    recommended, score = predict_batch(rows)
+    return [
+        {"recommended": flag, "score": value}
+        for flag, value in zip(recommended.tolist(), score.tolist())
+    ]
+
+@router.post(
+    "/predictions/batch",
+    response_model=List[PredictionOut],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": PredictionInput.model_json_schema()}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def get_predictions_batch(request: Request):
+    """
+    Pontua várias linhas em uma chamada: array JSON de PredictionInput ou
+    NDJSON (Content-Type application/x-ndjson, uma linha por objeto).
+    Uma entrada NDJSON é respondida em NDJSON, na mesma ordem.
+    """
+    ndjson = request.headers.get("content-type", "").startswith("application/x-ndjson")
+    body = await request.body()
+    # Validação e pontuação de até PREDICTION_MAX_BATCH linhas fora do event loop, como no /predictions
+    predictions = await asyncio.to_thread(_score_prediction_body, body, ndjson)
+    if ndjson:
+        return streaming_response(predictions, "ndjson", list(PredictionOut.model_fields), "predictions")
+    return predictions
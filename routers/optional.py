@@ -1,14 +1,18 @@
 from pathlib import Path
-from fastapi import HTTPException, Query, Depends
+from fastapi import HTTPException, Query, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from models import Books, Base
+from models import Base
 from starlette import status
 from typing import Optional, Annotated
-from database import session_local, engine
+from database import engine, get_read_db, run_db
 from routers.auth import get_current_user, router as auth_router
+from snapshot import catalog_snapshot, snapshot_enabled
+from aggregates import catalog_aggregates
+from price_index import catalog_price_index
+from streaming import MAX_PAGE_SIZE, TOTAL_COUNT_HEADER
 from fastapi.routing import APIRouter
 
 #Base.metadata.create_all(bind=engine)
@@ -25,15 +29,7 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 BOOKS_CSV_PATH = PROJECT_ROOT / "data" / "books.csv"
 
 
-def get_db():
-    db = session_local()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[Session, Depends(get_read_db)]
 
 @router.get("/api/v1/stats/overview")
 async def collection_statistics(db: db_dependency):
@@ -44,26 +40,10 @@ async def collection_statistics(db: db_dependency):
     -------
     dicionário com as estatísticas
     """
-    from sqlalchemy import func
-
-    total_books = db.query(func.count(Books.id)).scalar()
-    avg_price = db.query(func.avg(Books.price)).scalar()
-    avg_price = round(avg_price, 2) if avg_price is not None else None
-
-    # Get rating distribution
-    rating_counts = (
-        db.query(Books.rating, func.count(Books.rating))
-        .group_by(Books.rating)
-        .order_by(Books.rating)
-        .all()
-    )
-    rating_distribution = {rating: count for rating, count in rating_counts}
-
-    return {
-        "total_livros": total_books,
-        "preço_medio": avg_price,
-        "distribuição_ratings": rating_distribution,
-    }
+    if snapshot_enabled():
+        return catalog_snapshot.overview()
+    await run_db(catalog_aggregates.sync, db)
+    return catalog_aggregates.overview()
 
 
 @router.get("/api/v1/stats/categories")
@@ -75,39 +55,27 @@ async def category_statistics(db: db_dependency):
     -------
     dicionário com as estatísticas
     """
-    from sqlalchemy import func
-
-    results = (
-        db.query(
-            Books.category.label("category"),
-            func.count(Books.title).label("total_livros"),
-            func.avg(Books.price).label("preco_medio"),
-            func.min(Books.price).label("preco_minimo"),
-            func.max(Books.price).label("preco_maximo"),
-        )
-        .group_by(Books.category)
-        .all()
-    )
+    if snapshot_enabled():
+        return catalog_snapshot.category_stats()
+    await run_db(catalog_aggregates.sync, db)
+    return catalog_aggregates.category_stats()
+
+def range_index(db):
+    """Índice de preço/rating: do snapshot ou construído a partir do banco."""
+    return catalog_snapshot.range_index() if snapshot_enabled() else catalog_price_index.index(db)
 
-    return [
-        {
-            "category": row.category,
-            "total_livros": row.total_livros,
-            "preco_medio": (
-                round(row.preco_medio, 2) if row.preco_medio is not None else None
-            ),
-            "preco_minimo": (
-                round(row.preco_minimo, 2) if row.preco_minimo is not None else None
-            ),
-            "preco_maximo": (
-                round(row.preco_maximo, 2) if row.preco_maximo is not None else None
-            ),
-        }
-        for row in results
-    ]
 
 @router.get("/api/v1/books/top-rated")
-async def list_titles_top_rated(db: db_dependency, limit: int = 10):
+async def list_titles_top_rated(
+    db: db_dependency,
+    response: Response,
+    limit: int = Query(10, ge=0),
+    offset: int = Query(0, ge=0),
+    category: Optional[str] = Query(None, description="Filtra pela categoria (exata, sem diferenciar maiúsculas)"),
+    min_price: Optional[float] = Query(None),
+    max_price: Optional[float] = Query(None),
+    count: bool = Query(False, description="Com filtro de preço, inclui o total em X-Total-Count"),
+):
     """
     Retorna os títulos melhores rankeados
 
@@ -115,22 +83,37 @@ async def list_titles_top_rated(db: db_dependency, limit: int = 10):
     ----------
     limit: int
         Número máximo de livros a retornar (default = 10)
+    offset: int
+        Quantos livros pular (paginação); o total vem no cabeçalho X-Total-Count
+    category, min_price, max_price:
+        Filtros opcionais combinados
+    count: bool
+        Com min_price/max_price o total exige percorrer todos os livros
+        filtrados, então X-Total-Count só é enviado se pedido
 
     Returns
     -------
-    Lista com os títulos dos livros mais bem avaliados
+    Lista com os títulos dos livros mais bem avaliados (empates em ordem de id)
     """
-    # Supondo que o campo de ranking seja 'rating' (quanto maior, melhor)
-    top_books = db.query(Books).order_by(Books.rating.desc()).limit(limit).all()
-    return [book.title for book in top_books]
+    total, books = await run_db(
+        lambda: range_index(db).top_rated(limit, offset, category, None, min_price, max_price, count)
+    )
+    if total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(total)
+    return [book["title"] for book in books]
 
 
 @router.get("/api/v1/books/price-range")
 async def price_range(
     current_user: Annotated[dict, Depends(get_current_user)],
     db: db_dependency,
+    response: Response,
     min: float,
     max: float,
+    category: Optional[str] = Query(None, description="Filtra pela categoria (exata, sem diferenciar maiúsculas)"),
+    min_rating: Optional[int] = Query(None, ge=0, le=5),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
 ):
     """
     Retorna livros cujo preço está dentro de um intervalo
@@ -141,11 +124,16 @@ async def price_range(
         Preço mínimo
     max: float
         Preço máximo
+    category, min_rating:
+        Filtros opcionais combinados
+    offset, limit:
+        Paginação; o total vem no cabeçalho X-Total-Count
     Returns
     -------
-    Lista de livros com preços no intervalo [min, max]
+    Lista de livros com preços no intervalo [min, max], do mais barato ao mais caro
     """
-    filtered = db.query(Books).filter(Books.price >= min, Books.price <= max).all()
-    return [book.title for book in filtered]
-
-
+    total, books = await run_db(
+        lambda: range_index(db).price_range(min, max, category, min_rating, offset, limit)
+    )
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    return [book["title"] for book in books]
@@ -1,14 +1,27 @@
+import asyncio
 from pathlib import Path
-from fastapi import HTTPException, Query, Depends
+from fastapi import HTTPException, Query, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from models import Books, Base
+from sqlalchemy import func, select
+from models import Base, Books, CatalogBooks
 from starlette import status
 from typing import Optional, Annotated
-from database import session_local, engine
+from database import db_pool, engine, get_db, get_read_db, pool_stats, run_db
 from routers.auth import get_current_user, router as auth_router
+from cache import catalog_cache
+from auth_cache import auth_cache
+from http_cache import http_cache
+from fast_json import FastJSONResponse
+from replica import read_replica
+from latest import latest_catalog
+from snapshot import COLUMNS, catalog_snapshot, snapshot_enabled
+from search_index import catalog_search
+from streaming import (
+    FORMAT_PATTERN, MAX_PAGE_SIZE, TOTAL_COUNT_HEADER, iter_catalog_rows, page_catalog_rows, set_next_cursor,
+    streaming_response
+)
 from fastapi.routing import APIRouter
 
 #Base.metadata.create_all(bind=engine)
@@ -25,15 +38,14 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 BOOKS_CSV_PATH = PROJECT_ROOT / "data" / "books.csv"
 
 
-def get_db():
-    db = session_local()
-    try:
-        yield db
-    finally:
-        db.close()
+db_dependency = Annotated[Session, Depends(get_read_db)]
+# Histórico de versões: só o banco principal guarda tb_books_to_scrape inteira
+primary_db_dependency = Annotated[Session, Depends(get_db)]
 
 
-db_dependency = Annotated[Session, Depends(get_db)]
+def book_to_dict(book):
+    """Converte um Books do ORM ou uma linha do snapshot em dicionário"""
+    return {column: getattr(book, column) for column in COLUMNS}
 
 
 @router.get("/")
@@ -48,17 +60,89 @@ async def root():
     return {"message": "Bem-vindo à API de Livros 📚! Acesse a documentação interativa em /docs"}
 
 @router.get("/api/v1/books", status_code=status.HTTP_200_OK)
-async def list_books(db: db_dependency):
+async def list_books(
+    db: db_dependency,
+    after_id: Optional[int] = Query(None, description="Cursor: retorna livros com id maior que este"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Tamanho da página"),
+    format: str = Query("json", pattern=FORMAT_PATTERN, description="json, ndjson ou csv"),
+):
     """
     Lista todos os livros disponíveis na base de dados
 
+    Parameters
+    ----------
+    after_id : Optional[int]
+        Cursor da paginação por chave; a resposta traz o próximo cursor no
+        cabeçalho X-Next-After-Id enquanto houver mais páginas
+    limit : Optional[int]
+        Quantidade máxima de livros por página
+    format : str
+        "ndjson" ou "csv" transmitem os livros em streaming, lidos do banco
+        em lotes, sem montar a lista inteira em memória
+
     Returns
     -------
      Uma lista com todos os livros disponíveis
     """
-    return db.query(Books).all()
+    if format != "json":
+        items = (book_to_dict(book) for book in iter_catalog_rows(after_id, limit))
+        return streaming_response(items, format, COLUMNS, "books")
+    if after_id is not None or limit is not None:
+        page = await run_db(page_catalog_rows, db, after_id, limit or MAX_PAGE_SIZE)
+        books = FastJSONResponse([book_to_dict(book) for book in page])
+        set_next_cursor(books, page, limit or MAX_PAGE_SIZE)
+        return books
+    if snapshot_enabled():
+        return FastJSONResponse(catalog_snapshot.list_books())
+    return FastJSONResponse(await run_db(
+        catalog_cache.get_or_load, db, ("list_books",), lambda: [book.to_dict() for book in db.query(CatalogBooks).all()]
+    ))
     # return [book["title"] for book in df_books.to_dict(orient="records") if "title" in book]
 
+@router.get("/api/v1/books/search")
+async def search_books(
+    db: db_dependency,
+    response: Response,
+    title: Optional[str] = Query(None, description="Título parcial"),
+    category: Optional[str] = Query(None, description="Categoria do livro"),
+    fuzzy: bool = Query(False, description="Inclui títulos parecidos (tolera erros de digitação)"),
+    offset: int = Query(0, ge=0, description="Quantos resultados pular"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Tamanho da página"),
+):
+    """
+        Pesquisa livros com base no título e/ou categoria.
+
+    Este endpoint permite filtrar os livros disponíveis com base em uma correspondência parcial
+    no título e/ou na categoria. A busca é case-insensitive e usa um índice de trigramas
+    em memória (search_index.py) em vez de varrer a tabela com ILIKE.
+
+    Parâmetros
+    ----------
+    title : Optional[str]
+        Título parcial do livro a ser pesquisado. Se fornecido, o resultado incluirá
+        apenas livros cujo título contenha esse valor, ordenados por relevância.
+    category : Optional[str]
+        Categoria do livro a ser filtrada. Se fornecido, o resultado incluirá
+        apenas livros dessa categoria.
+    fuzzy : bool
+        Inclui também títulos parecidos com o termo, abaixo das correspondências exatas.
+    offset, limit : int
+        Paginação; o total de resultados vem no cabeçalho X-Total-Count.
+
+    Retorno
+    -------
+    List[dict]
+        Uma lista de dicionários representando os livros que correspondem aos critérios de busca.
+        Cada dicionário contém as colunas da tabela de livros.
+    """
+    def run_search():
+        index = catalog_snapshot.search_index() if snapshot_enabled() else catalog_search.index(db)
+        return index.search(title, category, fuzzy=fuzzy, offset=offset, limit=limit)
+
+    total, books = await run_db(run_search)
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    return books
+
 @router.get("/api/v1/books/{book_id}")
 async def get_book(db: db_dependency, book_id: int):
     """
@@ -77,46 +161,52 @@ async def get_book(db: db_dependency, book_id: int):
     -------
     Um dicionário contendo todas as informações do livro
     """
-    id_book = db.query(Books).filter(Books.id == book_id).first()
+    def load():
+        book = db.query(CatalogBooks).filter(CatalogBooks.id == book_id).first()
+        return book.to_dict() if book is not None else None
+
+    if snapshot_enabled():
+        id_book = catalog_snapshot.get_book(book_id)
+    else:
+        id_book = await run_db(catalog_cache.get_or_load, db, ("get_book", book_id), load)
     if id_book is not None:
         return id_book
     raise HTTPException(status_code=404, detail="Livro não encontrado")
 
 
-@router.get("/api/v1/books/search")
-async def search_books(
-    db: db_dependency,
-    title: Optional[str] = Query(None, description="Título parcial"),
-    category: Optional[str] = Query(None, description="Categoria do livro"),
-):
+@router.get("/api/v1/books/{book_id}/history")
+async def get_book_history(db: primary_db_dependency, book_id: int):
     """
-        Pesquisa livros com base no título e/ou categoria.
-
-    Este endpoint permite filtrar os livros disponíveis com base em uma correspondência parcial
-    no título e/ou na categoria. A busca é case-insensitive.
+    Retorna todas as versões carregadas de um livro, da mais recente para a mais antiga
 
-    Parâmetros
+    Parameters
     ----------
-    title : Optional[str]
-        Título parcial do livro a ser pesquisado. Se fornecido, o resultado incluirá
-        apenas livros cujo título contenha esse valor.
-    category : Optional[str]
-        Categoria do livro a ser filtrada. Se fornecido, o resultado incluirá
-        apenas livros dessa categoria.
+    book_id : int
+        Id do livro
+    Raises
+    ------
+    HTTPException
+        Se o id não foi encontrado em nenhuma carga
 
-    Retorno
+    Returns
     -------
-    List[dict]
-        Uma lista de dicionários representando os livros que correspondem aos critérios de busca.
-        Cada dicionário contém os campos do DataFrame original.
+    Uma lista com uma entrada por carga (METADATA_FILENAME / LOAD_TIMESTAMP)
+    em que o livro aparece
     """
-    query = db.query(Books)
-    if title:
-        query = query.filter(Books.title.ilike(f"%{title}%"))
-    if category:
-        query = query.filter(Books.category.ilike(f"%{category}%"))
-    results = query.all()
-    return [book.__dict__ for book in results]
+    def load():
+        # select do Core: pelo ORM, as versões de um mesmo id viram um único objeto (id é a chave do mapeamento)
+        versions = db.execute(
+            select(Books.__table__)
+            .where(Books.id == book_id)
+            .order_by(Books.load_timestamp.desc(), Books.metadata_filename.desc())
+        ).mappings()
+        return [dict(version) for version in versions]
+
+    versions = await run_db(load)
+    if versions:
+        return versions
+    raise HTTPException(status_code=404, detail="Livro não encontrado")
+
 
 @router.get("/api/v1/categories")
 async def list_categories(db: db_dependency):
@@ -127,8 +217,43 @@ async def list_categories(db: db_dependency):
     -------
     Uma lista contendo todas as categorias disponíveis
     """
-    categories = db.query(Books.category).distinct().all()
-    return [category[0] for category in categories]
+    def load():
+        categories = db.query(CatalogBooks.category).distinct().all()
+        return [category[0] for category in categories]
+
+    if snapshot_enabled():
+        return catalog_snapshot.categories()
+    return await run_db(catalog_cache.get_or_load, db, ("list_categories",), load)
+
+@router.get("/api/v1/cache/stats")
+async def cache_statistics():
+    """
+    Retorna os contadores do cache do catálogo
+
+    Returns
+    -------
+    Um dicionário com hits, misses, evictions, taxa de acerto e a versão
+    da carga em uso, além do estado do snapshot em memória e dos caches
+    da autenticação e do cache HTTP
+    """
+    return {**catalog_cache.stats(), "snapshot": catalog_snapshot.stats(), "auth": auth_cache.stats(),
+            "http": http_cache.stats()}
+
+@router.get("/api/v1/db/stats")
+async def database_statistics():
+    """
+    Retorna o estado do pool de conexões e do pool de threads do banco
+
+    Returns
+    -------
+    Um dicionário com conexões em uso (checked_out), overflow, tempo de
+    espera por conexão, requisições em andamento no pool de threads, o
+    estado da réplica de leitura e da consolidação de tb_books_latest
+    """
+    # A marca d'água é lida do arquivo da réplica; fora do event loop e do pool de threads do banco
+    replica = await asyncio.to_thread(read_replica.stats)
+    return {"connections": pool_stats(), "threads": db_pool.stats(), "replica": replica,
+            "latest": latest_catalog.stats()}
 
 @router.get("/api/v1/health")
 async def health_check(db: db_dependency):
@@ -141,7 +266,7 @@ async def health_check(db: db_dependency):
         Um dicionário json com o status da api e mensagem
     """
     try:
-        db.query(Books).first()
+        await run_db(lambda: db.query(CatalogBooks).first())
 
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -1,14 +1,42 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
-import pandas as pd
 import boto3
+import csv
 import os
-import io
-from urllib.parse import urljoin
 import re
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
 from datetime import datetime
 
+try:
+    import lxml.html as lxml_html
+except ImportError:  # lxml é opcional no pacote da Lambda (layer); sem ele, usa o html.parser do BeautifulSoup
+    lxml_html = None
+
 BASE_URL = "https://books.toscrape.com/"
+TOTAL_PAGES = 50  # O site tem 50 páginas
+BOOKS_PER_PAGE = 20  # e 20 livros por página de listagem (a última pode ter menos)
+
+# Parâmetros do motor de coleta concorrente
+MAX_WORKERS = int(os.getenv("SCRAPER_MAX_WORKERS", "16"))
+REQUESTS_PER_SECOND = float(os.getenv("SCRAPER_REQUESTS_PER_SECOND", "0"))  # 0 = sem limite
+MAX_RETRIES = int(os.getenv("SCRAPER_MAX_RETRIES", "3"))
+BACKOFF_FACTOR = float(os.getenv("SCRAPER_BACKOFF_FACTOR", "0.5"))
+REQUEST_TIMEOUT = float(os.getenv("SCRAPER_REQUEST_TIMEOUT", "30"))
+# Backend de extração: "lxml" (mesmo XPath de scripts/extractors.py) ou "html.parser"
+SCRAPER_PARSER = os.getenv("SCRAPER_PARSER", "lxml" if lxml_html is not None else "html.parser")
+
+# Saída em streaming para o S3 (partes do multipart upload têm no mínimo 5 MiB)
+FIELDNAMES = ["id", "title", "price", "rating", "availability", "category", "image_url"]
+MULTIPART_CHUNK_SIZE = int(os.getenv("S3_MULTIPART_CHUNK_SIZE", str(8 * 1024 * 1024)))
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "snappy")
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "50000"))
 
 def get_rating_value(rating_str):
     rating_map = {
@@ -16,62 +44,429 @@ def get_rating_value(rating_str):
     }
     return rating_map.get(rating_str, 0)
 
-def scrape_books():
-    all_books = []
-
-    for page in range(1, 51):  # O site tem 50 páginas
-        url = f"{BASE_URL}catalogue/page-{page}.html"
-        response = requests.get(url)
-        if response.status_code != 200:
-            print(f"Erro ao acessar {url}")
-            continue
-
-        soup = BeautifulSoup(response.text, "html.parser")
-        books = soup.select("article.product_pod")
-
-        for book in books:
-            title = book.h3.a["title"]
-            relative_url = book.h3.a["href"]
-            book_url = urljoin(BASE_URL + "catalogue/", relative_url)
-
-            # Detalhes do livro
-            book_response = requests.get(book_url)
-            book_soup = BeautifulSoup(book_response.text, "html.parser")
-
-            price = book_soup.select_one("p.price_color").text.replace("£", "")
-            rating = get_rating_value(book.select_one("p.star-rating")["class"][1])
-            availability = book_soup.select_one("p.instock.availability").text.strip()
-            category = book_soup.select("ul.breadcrumb li a")[-1].text.strip()
-            image_rel_url = book_soup.select_one("div.item.active img")["src"]
-            image_url = urljoin(BASE_URL, image_rel_url.replace("../", ""))
-
-            all_books.append({
-                "title": title,
-                "price": float(re.sub(r"[^\d.]", "", price)),
-                "rating": rating,
-                "availability": availability,
-                "category": category,
-                "image_url": image_url
-            })
-
-        print(f"Página {page} raspada com sucesso")
-
-    return all_books
-
-def save_to_s3(books, bucket_name, object_key):
-    df = pd.DataFrame(books)
-    df.index += 1
-    df.index.name = "id"
-    csv_buffer = io.StringIO()
-    df.to_csv(csv_buffer, encoding="utf-8")
-    s3 = boto3.client("s3")
-    s3.put_object(Bucket=bucket_name, Key=object_key, Body=csv_buffer.getvalue())
-    print(f"Dados enviados para s3://{bucket_name}/{object_key}")
+class HostRateLimiter:
+    """
+    Limita a quantidade de requisições por segundo para cada host.
+
+    Cada host recebe "slots" espaçados de 1/requests_per_second segundos;
+    a thread que pede um slot futuro dorme até o horário reservado.
+    """
+
+    def __init__(self, requests_per_second=REQUESTS_PER_SECOND):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def build_session(pool_size=MAX_WORKERS, retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR):
+    """
+    Cria uma sessão HTTP com conexões keep-alive reaproveitadas entre threads
+    e retry com backoff exponencial para falhas de rede, 429 e 5xx.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch_page(session, limiter, url):
+    """Baixa uma página e retorna o HTML, ou None em caso de erro."""
+    limiter.wait(url)
+    try:
+        response = session.get(url, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"Erro ao acessar {url}: {e}")
+        return None
+    if response.status_code != 200:
+        print(f"Erro ao acessar {url}")
+        return None
+    return response.text
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+def extract_listing(html, parser=None):
+    """Valores brutos (título, classe do rating, href) de cada livro de uma página de listagem."""
+    if (parser or SCRAPER_PARSER) == "lxml" and lxml_html is not None:
+        tree = lxml_html.fromstring(html)
+        entries = []
+        for book in tree.xpath(f"//article[{_has_class('product_pod')}]"):
+            link = book.xpath("./h3/a")[0]
+            rating = book.xpath(f".//p[{_has_class('star-rating')}]")[0]
+            entries.append({"title": link.get("title"), "rating": rating.get("class").split()[1],
+                            "href": link.get("href")})
+        return entries
+    soup = BeautifulSoup(html, "html.parser")
+    return [
+        {"title": book.h3.a["title"], "rating": book.select_one("p.star-rating")["class"][1],
+         "href": book.h3.a["href"]}
+        for book in soup.select("article.product_pod")
+    ]
+
+def extract_detail(html, parser=None):
+    """Valores brutos (preço, disponibilidade, categoria, imagem) da página de detalhe."""
+    if (parser or SCRAPER_PARSER) == "lxml" and lxml_html is not None:
+        tree = lxml_html.fromstring(html)
+        return {
+            "price": tree.xpath(f"//p[{_has_class('price_color')}]")[0].text_content(),
+            "availability": tree.xpath(
+                f"//p[{_has_class('instock')} and {_has_class('availability')}]"
+            )[0].text_content().strip(),
+            "category": tree.xpath(f"//ul[{_has_class('breadcrumb')}]/li/a")[-1].text_content().strip(),
+            "image_src": tree.xpath(f"//div[{_has_class('item')} and {_has_class('active')}]//img")[0].get("src"),
+        }
+    soup = BeautifulSoup(html, "html.parser")
+    return {
+        "price": soup.select_one("p.price_color").text,
+        "availability": soup.select_one("p.instock.availability").text.strip(),
+        "category": soup.select("ul.breadcrumb li a")[-1].text.strip(),
+        "image_src": soup.select_one("div.item.active img")["src"],
+    }
+
+def parse_listing(html, base_url=BASE_URL):
+    """Extrai título, rating e URL de detalhe de cada livro de uma página de listagem."""
+    return [
+        {
+            "title": entry["title"],
+            "rating": get_rating_value(entry["rating"]),
+            "url": urljoin(base_url + "catalogue/", entry["href"]),
+        }
+        for entry in extract_listing(html)
+    ]
+
+def listing_ids(page, entries):
+    """
+    Ids dos livros de uma página de listagem, pela posição no site (como em
+    scripts/scraper.py): uma listagem ou um detalhe que falha deixa um
+    buraco nos ids em vez de deslocar os seguintes.
+    """
+    if len(entries) > BOOKS_PER_PAGE:
+        raise ValueError(f"Página {page} com {len(entries)} livros; BOOKS_PER_PAGE = {BOOKS_PER_PAGE}")
+    first = (page - 1) * BOOKS_PER_PAGE + 1
+    return range(first, first + len(entries))
+
+def parse_detail(html, entry, base_url=BASE_URL):
+    """Monta o registro final do livro a partir da página de detalhe."""
+    detail = extract_detail(html)
+
+    price = detail["price"].replace("£", "")
+    availability = detail["availability"]
+    category = detail["category"]
+    image_rel_url = detail["image_src"]
+    image_url = urljoin(base_url, image_rel_url.replace("../", ""))
+
+    return {
+        "title": entry["title"],
+        "price": float(re.sub(r"[^\d.]", "", price)),
+        "rating": entry["rating"],
+        "availability": availability,
+        "category": category,
+        "image_url": image_url
+    }
+
+def iter_books(base_url=BASE_URL, pages=TOTAL_PAGES, max_workers=MAX_WORKERS,
+               requests_per_second=REQUESTS_PER_SECOND, session=None):
+    """
+    Raspa o catálogo usando um pool de threads com concorrência limitada,
+    entregando cada livro assim que sua página termina. Só uma janela de
+    páginas fica em andamento, então a memória não cresce com o catálogo.
+
+    Parameters
+    ----------
+    base_url : str
+        URL raiz do site (permite apontar para um servidor local de testes)
+    pages : int
+        Quantidade de páginas de listagem
+    max_workers : int
+        Número máximo de requisições simultâneas (1 = coleta sequencial)
+    requests_per_second : float
+        Limite de requisições por segundo por host (0 = sem limite)
+    session : requests.Session, optional
+        Sessão HTTP já configurada; por padrão usa build_session()
+
+    Yields
+    ------
+    Dicionários, na mesma ordem do site, com o id da posição do livro na
+    listagem (listing_ids); livros que falham são omitidos sem mudar o id
+    dos demais
+    """
+    session = session or build_session(pool_size=max_workers)
+    limiter = HostRateLimiter(requests_per_second)
+    page_urls = [f"{base_url}catalogue/page-{page}.html" for page in range(1, pages + 1)]
+
+    def scrape_listing(url):
+        html = fetch_page(session, limiter, url)
+        return parse_listing(html, base_url) if html is not None else None
+
+    def scrape_detail(entry):
+        html = fetch_page(session, limiter, entry["url"])
+        return parse_detail(html, entry, base_url) if html is not None else None
+
+    def drain(page, futures):
+        missing = 0
+        for book_id, future in futures:
+            book = future.result()
+            if book is None:
+                missing += 1
+                continue
+            yield {"id": book_id, **book}
+        if missing:
+            print(f"Página {page} raspada com {missing} livros sem detalhe (ids sem registro)")
+        else:
+            print(f"Página {page} raspada com sucesso")
+
+    # Páginas cujos detalhes estão na fila: o suficiente para manter todas as threads ocupadas
+    pages_in_flight = max(2, max_workers // 20 + 2)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        window = deque()
+        for page, entries in enumerate(executor.map(scrape_listing, page_urls), start=1):
+            if entries is None:
+                print(f"Página {page} não raspada; os ids dos livros dela ficam sem registro")
+                continue
+            window.append((page, [(book_id, executor.submit(scrape_detail, entry))
+                                  for book_id, entry in zip(listing_ids(page, entries), entries)]))
+            if len(window) >= pages_in_flight:
+                yield from drain(*window.popleft())
+        while window:
+            yield from drain(*window.popleft())
+
+def scrape_books(*args, **kwargs):
+    """Raspa o catálogo completo e retorna a lista de livros (ver iter_books)."""
+    return list(iter_books(*args, **kwargs))
+
+class S3MultipartWriter:
+    """
+    Stream de texto que envia o conteúdo ao S3 em partes de part_size bytes
+    via multipart upload, mantendo em memória no máximo uma parte.
+
+    Objetos menores que uma parte são enviados com um único put_object.
+    """
+
+    def __init__(self, s3, bucket_name, object_key, part_size=MULTIPART_CHUNK_SIZE):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.object_key = object_key
+        self.part_size = part_size
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+
+    def write(self, text):
+        self._buffer += text.encode("utf-8")
+        if len(self._buffer) >= self.part_size:
+            self._upload_part()
+        return len(text)
+
+    def _upload_part(self):
+        if self._upload_id is None:
+            upload = self.s3.create_multipart_upload(Bucket=self.bucket_name, Key=self.object_key)
+            self._upload_id = upload["UploadId"]
+        number = len(self._parts) + 1
+        part = self.s3.upload_part(
+            Bucket=self.bucket_name, Key=self.object_key, UploadId=self._upload_id,
+            PartNumber=number, Body=bytes(self._buffer),
+        )
+        self._parts.append({"ETag": part["ETag"], "PartNumber": number})
+        self._buffer.clear()
+
+    def close(self):
+        if self._upload_id is None:
+            self.s3.put_object(Bucket=self.bucket_name, Key=self.object_key, Body=bytes(self._buffer))
+        else:
+            if self._buffer:
+                self._upload_part()
+            self.s3.complete_multipart_upload(
+                Bucket=self.bucket_name, Key=self.object_key, UploadId=self._upload_id,
+                MultipartUpload={"Parts": self._parts},
+            )
+        print(f"Dados enviados para s3://{self.bucket_name}/{self.object_key}")
+
+    def abort(self):
+        if self._upload_id is not None:
+            self.s3.abort_multipart_upload(Bucket=self.bucket_name, Key=self.object_key, UploadId=self._upload_id)
+        self._buffer.clear()
+
+class S3CsvSink:
+    """
+    Sink de saída para o S3: grava cada registro em CSV assim que ele é
+    produzido (mesmo formato de save_to_s3), com o id do registro
+    (listing_ids) ou, sem ele, ids 1..n.
+
+    Com rows_per_part, cada parte vira um objeto <chave>_part-00001.csv com
+    cabeçalho próprio; as partes concluídas permanecem no bucket mesmo que a
+    execução falhe depois, e a parte em andamento tem o upload abortado.
+    """
+
+    def __init__(self, bucket_name, object_key, rows_per_part=None, part_size=MULTIPART_CHUNK_SIZE, s3=None):
+        self.bucket_name = bucket_name
+        self.object_key = object_key
+        self.rows_per_part = rows_per_part
+        self.part_size = part_size
+        self.s3 = s3 or boto3.client("s3")
+        self.rows_written = 0
+        self.parts = []
+        self._stream = None
+        self._writer = None
+        self._rows_in_part = 0
+
+    def part_key(self, index):
+        if not self.rows_per_part:
+            return self.object_key
+        stem, dot, suffix = self.object_key.rpartition(".")
+        return f"{stem}_part-{index:05d}{dot}{suffix}" if dot else f"{self.object_key}_part-{index:05d}"
+
+    def write(self, record):
+        if self._writer is None or (self.rows_per_part and self._rows_in_part >= self.rows_per_part):
+            self._rotate()
+        self.rows_written += 1
+        self._rows_in_part += 1
+        self._writer.writerow({"id": self.rows_written, **record})
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def _rotate(self):
+        if self._stream is not None:
+            self._finish_part()
+        key = self.part_key(len(self.parts) + 1)
+        self._stream = S3MultipartWriter(self.s3, self.bucket_name, key, self.part_size)
+        self._writer = csv.DictWriter(self._stream, fieldnames=FIELDNAMES, lineterminator="\n")
+        self._writer.writeheader()
+        self._rows_in_part = 0
+
+    def _finish_part(self):
+        self._stream.close()
+        self.parts.append(self._stream.object_key)
+
+    def close(self):
+        if self._stream is None:
+            self._rotate()
+        self._finish_part()
+        self._stream = self._writer = None
+
+    def abort(self):
+        if self._stream is not None:
+            self._stream.abort()
+        self._stream = self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+class S3ParquetSink:
+    """
+    Sink Parquet para o S3, com o mesmo schema tipado de scripts/sinks.py.
+
+    Os row groups são gravados em um arquivo temporário em /tmp, enviado ao
+    fechar com upload_file (que usa multipart automaticamente). pyarrow só é
+    importado quando OUTPUT_FORMAT=parquet, via layer da Lambda.
+    """
+
+    def __init__(self, bucket_name, object_key, row_group_size=PARQUET_ROW_GROUP_SIZE, s3=None):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([
+            pa.field("id", pa.int64(), nullable=False),
+            pa.field("title", pa.string()),
+            pa.field("price", pa.float64()),
+            pa.field("rating", pa.int64()),
+            pa.field("availability", pa.string()),
+            pa.field("category", pa.string()),
+            pa.field("image_url", pa.string()),
+        ])
+        self.bucket_name = bucket_name
+        self.object_key = object_key
+        self.row_group_size = row_group_size
+        self.s3 = s3 or boto3.client("s3")
+        self.rows_written = 0
+        self.parts = []
+        self._tmp = tempfile.NamedTemporaryFile(suffix=".parquet", delete=False)
+        self._tmp.close()
+        self._writer = pq.ParquetWriter(self._tmp.name, self.schema, compression=PARQUET_COMPRESSION)
+        self._columns = {name: [] for name in FIELDNAMES}
+
+    def write(self, record):
+        self.rows_written += 1
+        row = {"id": self.rows_written, **record}
+        for name in FIELDNAMES:
+            self._columns[name].append(row[name])
+        if len(self._columns["id"]) >= self.row_group_size:
+            self._flush()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def _flush(self):
+        if self._columns["id"]:
+            self._writer.write_batch(self.pa.record_batch(
+                [self._columns[name] for name in FIELDNAMES], schema=self.schema
+            ))
+            self._columns = {name: [] for name in FIELDNAMES}
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        try:
+            self.s3.upload_file(self._tmp.name, self.bucket_name, self.object_key)
+        finally:
+            os.remove(self._tmp.name)
+        self.parts.append(self.object_key)
+        print(f"Dados enviados para s3://{self.bucket_name}/{self.object_key}")
+
+    def abort(self):
+        self._writer.close()
+        os.remove(self._tmp.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def save_to_s3(books, bucket_name, object_key, rows_per_part=None):
+    with S3CsvSink(bucket_name, object_key, rows_per_part=rows_per_part) as sink:
+        sink.write_many(books)
+    return sink.parts
 
 def lambda_handler(event, context):
     bucket_name = os.environ["BUCKET_NAME"]
     current_date = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
-    object_key = os.environ.get("OBJECT_KEY", f"books_{current_date}.csv")
-    books = scrape_books()
-    save_to_s3(books, bucket_name, object_key)
-    return {"status": "success", "total_books": len(books)}
\ No newline at end of file
+    output_format = os.environ.get("OUTPUT_FORMAT", "csv")
+    object_key = os.environ.get("OBJECT_KEY", f"books_{current_date}.{output_format}")
+    if output_format == "parquet":
+        sink = S3ParquetSink(bucket_name, object_key)
+    else:
+        rows_per_part = int(os.environ["ROWS_PER_PART"]) if os.environ.get("ROWS_PER_PART") else None
+        sink = S3CsvSink(bucket_name, object_key, rows_per_part=rows_per_part)
+    with sink:
+        sink.write_many(iter_books())
+    return {"status": "success", "total_books": sink.rows_written, "objects": sink.parts}
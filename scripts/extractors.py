@@ -0,0 +1,111 @@
+import os
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html as lxml_html
+except ImportError:  # lxml é opcional; sem ele os backends BeautifulSoup continuam disponíveis
+    lxml_html = None
+
+DEFAULT_EXTRACTOR = os.getenv("SCRAPER_PARSER", "lxml" if lxml_html is not None else "strainer")
+
+class SoupExtractor:
+    """
+    Extração com a árvore completa do BeautifulSoup (comportamento original).
+
+    Todos os backends devolvem os valores brutos do HTML; a conversão de
+    preço, rating e URLs fica em scraper.parse_listing/parse_detail.
+    """
+
+    name = "html.parser"
+
+    def __init__(self, features="html.parser"):
+        self.features = features
+
+    def _soup(self, html, parse_only=None):
+        return BeautifulSoup(html, self.features, parse_only=parse_only)
+
+    def listing(self, html):
+        soup = self._soup(html, getattr(self, "listing_strainer", None))
+        return [
+            {
+                "title": book.h3.a["title"],
+                "rating": book.select_one("p.star-rating")["class"][1],
+                "href": book.h3.a["href"],
+            }
+            for book in soup.select("article.product_pod")
+        ]
+
+    def detail(self, html):
+        soup = self._soup(html, getattr(self, "detail_strainer", None))
+        return {
+            "price": soup.select_one("p.price_color").text,
+            "availability": soup.select_one("p.instock.availability").text.strip(),
+            "category": soup.select("ul.breadcrumb li a")[-1].text.strip(),
+            "image_src": soup.select_one("div.item.active img")["src"],
+        }
+
+class StrainedSoupExtractor(SoupExtractor):
+    """
+    BeautifulSoup com SoupStrainer: só os elementos usados pelos seletores
+    entram na árvore. A tokenização do html.parser continua sendo o custo
+    principal, então o ganho é moderado; use lxml quando disponível.
+    """
+
+    name = "strainer"
+    listing_strainer = SoupStrainer("article", class_=re.compile(r"\bproduct_pod\b"))
+    detail_strainer = SoupStrainer(class_=re.compile(r"\b(price_color|availability|breadcrumb|item)\b"))
+
+class LxmlExtractor:
+    """Extração com lxml.html e XPath, sem construir a árvore do BeautifulSoup."""
+
+    name = "lxml"
+
+    def __init__(self):
+        if lxml_html is None:
+            raise RuntimeError("Backend 'lxml' indisponível: instale o pacote lxml")
+
+    @staticmethod
+    def _has_class(name):
+        return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+    def listing(self, html):
+        tree = lxml_html.fromstring(html)
+        entries = []
+        for book in tree.xpath(f"//article[{self._has_class('product_pod')}]"):
+            link = book.xpath("./h3/a")[0]
+            rating = book.xpath(f".//p[{self._has_class('star-rating')}]")[0]
+            entries.append({
+                "title": link.get("title"),
+                "rating": rating.get("class").split()[1],
+                "href": link.get("href"),
+            })
+        return entries
+
+    def detail(self, html):
+        tree = lxml_html.fromstring(html)
+        has_class = self._has_class
+        return {
+            "price": tree.xpath(f"//p[{has_class('price_color')}]")[0].text_content(),
+            "availability": tree.xpath(
+                f"//p[{has_class('instock')} and {has_class('availability')}]"
+            )[0].text_content().strip(),
+            "category": tree.xpath(f"//ul[{has_class('breadcrumb')}]/li/a")[-1].text_content().strip(),
+            "image_src": tree.xpath(f"//div[{has_class('item')} and {has_class('active')}]//img")[0].get("src"),
+        }
+
+EXTRACTORS = {
+    SoupExtractor.name: SoupExtractor,
+    StrainedSoupExtractor.name: StrainedSoupExtractor,
+    LxmlExtractor.name: LxmlExtractor,
+}
+
+def available_extractors():
+    """Nomes dos backends utilizáveis neste ambiente."""
+    return [name for name in EXTRACTORS if name != LxmlExtractor.name or lxml_html is not None]
+
+def get_extractor(name=None):
+    name = name or DEFAULT_EXTRACTOR
+    if name not in EXTRACTORS:
+        raise ValueError(f"Parser desconhecido: {name}. Opções: {', '.join(EXTRACTORS)}")
+    return EXTRACTORS[name]()
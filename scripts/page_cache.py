@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parents[1] / "data" / ".page_cache.json"
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+class PageCache:
+    """
+    Cache em disco das páginas já raspadas, usado pelo modo incremental do scraper.
+
+    Para cada URL guarda ETag, Last-Modified, o hash do conteúdo e o resultado
+    do parse (entradas da listagem ou campos do detalhe). Páginas que respondem
+    304, ou cujo hash não mudou, são reaproveitadas sem novo parse.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self.entries = {}
+        self.delta = []  # livros novos ou alterados na última execução, com id
+        self._seen = set()
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def get(self, url):
+        with self._lock:
+            return self.entries.get(url)
+
+    def conditional_headers(self, url):
+        entry = self.get(url) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def conditional_get(self, session, url, **kwargs):
+        """
+        Faz um GET condicional.
+
+        Returns
+        -------
+        (response, entry): entry é a entrada do cache quando a página não mudou
+        (304 ou mesmo hash de conteúdo); caso contrário é None.
+        """
+        response = session.get(url, headers=self.conditional_headers(url), **kwargs)
+        entry = self.get(url)
+        if entry is not None and (
+            response.status_code == 304
+            or (response.status_code == 200 and content_hash(response.content) == entry.get("hash"))
+        ):
+            with self._lock:
+                self._seen.add(url)
+            return response, entry
+        return response, None
+
+    def put(self, url, response, **data):
+        """Registra a versão nova de uma página junto com o resultado do parse."""
+        entry = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "hash": content_hash(response.content),
+            **data,
+        }
+        with self._lock:
+            self.entries[url] = entry
+            self._seen.add(url)
+
+    def update(self, url, **data):
+        with self._lock:
+            self.entries.setdefault(url, {}).update(data)
+            self._seen.add(url)
+
+    def save(self, prune=True):
+        """
+        Grava o cache de forma atômica. Com prune=True descarta URLs que não
+        apareceram nesta execução (livros removidos do site).
+        """
+        with self._lock:
+            if prune:
+                self.entries = {url: e for url, e in self.entries.items() if url in self._seen}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
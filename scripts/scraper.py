@@ -1,11 +1,35 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
+import argparse
 import os
-from urllib.parse import urljoin
 import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urljoin, urlparse
+try:
+    from .extractors import get_extractor, available_extractors
+    from .page_cache import PageCache, DEFAULT_CACHE_PATH
+    from .sinks import LocalCsvSink, SINKS, open_sink
+except ImportError:  # executado como script (python scripts/scraper.py) ou com scripts/ no sys.path
+    from extractors import get_extractor, available_extractors
+    from page_cache import PageCache, DEFAULT_CACHE_PATH
+    from sinks import LocalCsvSink, SINKS, open_sink
 
 BASE_URL = "https://books.toscrape.com/"
+TOTAL_PAGES = 50  # O site tem 50 páginas
+BOOKS_PER_PAGE = 20  # e 20 livros por página de listagem (a última pode ter menos)
+
+# Parâmetros do motor de coleta concorrente
+MAX_WORKERS = int(os.getenv("SCRAPER_MAX_WORKERS", "16"))
+REQUESTS_PER_SECOND = float(os.getenv("SCRAPER_REQUESTS_PER_SECOND", "0"))  # 0 = sem limite
+MAX_RETRIES = int(os.getenv("SCRAPER_MAX_RETRIES", "3"))
+BACKOFF_FACTOR = float(os.getenv("SCRAPER_BACKOFF_FACTOR", "0.5"))
+REQUEST_TIMEOUT = float(os.getenv("SCRAPER_REQUEST_TIMEOUT", "30"))
 
 def get_rating_value(rating_str):
     rating_map = {
@@ -13,56 +37,282 @@ def get_rating_value(rating_str):
     }
     return rating_map.get(rating_str, 0)
 
-def scrape_books():
-    all_books = []
-
-    for page in range(1, 51):  # O site tem 50 páginas
-        url = f"{BASE_URL}catalogue/page-{page}.html"
-        response = requests.get(url)
-        if response.status_code != 200:
-            print(f"Erro ao acessar {url}")
-            continue
-
-        soup = BeautifulSoup(response.text, "html.parser")
-        books = soup.select("article.product_pod")
-
-        for book in books:
-            title = book.h3.a["title"]
-            relative_url = book.h3.a["href"]
-            book_url = urljoin(BASE_URL + "catalogue/", relative_url)
-
-            # Detalhes do livro
-            book_response = requests.get(book_url)
-            book_soup = BeautifulSoup(book_response.text, "html.parser")
-
-            price = book_soup.select_one("p.price_color").text.replace("£", "")
-            rating = get_rating_value(book.select_one("p.star-rating")["class"][1])
-            availability = book_soup.select_one("p.instock.availability").text.strip()
-            category = book_soup.select("ul.breadcrumb li a")[-1].text.strip()
-            image_rel_url = book_soup.select_one("div.item.active img")["src"]
-            image_url = urljoin(BASE_URL, image_rel_url.replace("../", ""))
-
-            all_books.append({
-                "title": title,
-                "price": float(re.sub(r"[^\d.]", "", price)),
-                "rating": rating,
-                "availability": availability,
-                "category": category,
-                "image_url": image_url
-            })
-
-        print(f"Página {page} raspada com sucesso")
-
-    return all_books
-
-def save_to_csv(books, output_path="data/books.csv"):
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    df = pd.DataFrame(books)
-    df.index += 1
-    df.index.name = "id"
-    df.to_csv(output_path, encoding="utf-8")
-    print(f"Dados salvos em {output_path}")
+class HostRateLimiter:
+    """
+    Limita a quantidade de requisições por segundo para cada host.
+
+    Cada host recebe "slots" espaçados de 1/requests_per_second segundos;
+    a thread que pede um slot futuro dorme até o horário reservado.
+    """
+
+    def __init__(self, requests_per_second=REQUESTS_PER_SECOND):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def build_session(pool_size=MAX_WORKERS, retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR):
+    """
+    Cria uma sessão HTTP com conexões keep-alive reaproveitadas entre threads
+    e retry com backoff exponencial para falhas de rede, 429 e 5xx.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch_page(session, limiter, url):
+    """Baixa uma página e retorna o HTML, ou None em caso de erro."""
+    limiter.wait(url)
+    try:
+        response = session.get(url, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"Erro ao acessar {url}: {e}")
+        return None
+    if response.status_code != 200:
+        print(f"Erro ao acessar {url}")
+        return None
+    return response.text
+
+def parse_listing(html, base_url=BASE_URL, extractor=None):
+    """Extrai título, rating e URL de detalhe de cada livro de uma página de listagem."""
+    extractor = extractor or get_extractor()
+    return [
+        {
+            "title": book["title"],
+            "rating": get_rating_value(book["rating"]),
+            "url": urljoin(base_url + "catalogue/", book["href"]),
+        }
+        for book in extractor.listing(html)
+    ]
+
+def listing_ids(page, entries):
+    """
+    Ids dos livros de uma página de listagem, pela posição no site: o
+    i-ésimo livro (a partir de 1) da página p recebe (p - 1) * BOOKS_PER_PAGE + i.
+
+    Assim o id não depende das páginas anteriores: uma listagem ou um
+    detalhe que falha deixa um buraco nos ids em vez de deslocar os seguintes.
+    """
+    if len(entries) > BOOKS_PER_PAGE:
+        raise ValueError(f"Página {page} com {len(entries)} livros; BOOKS_PER_PAGE = {BOOKS_PER_PAGE}")
+    first = (page - 1) * BOOKS_PER_PAGE + 1
+    return range(first, first + len(entries))
+
+def parse_detail(html, base_url=BASE_URL, extractor=None):
+    """Extrai os campos da página de detalhe de um livro."""
+    extractor = extractor or get_extractor()
+    detail = extractor.detail(html)
+
+    price = detail["price"].replace("£", "")
+    image_url = urljoin(base_url, detail["image_src"].replace("../", ""))
+
+    return {
+        "price": float(re.sub(r"[^\d.]", "", price)),
+        "availability": detail["availability"],
+        "category": detail["category"],
+        "image_url": image_url
+    }
+
+def build_record(entry, fields):
+    """Monta o registro final do livro a partir da listagem e do detalhe."""
+    return {
+        "title": entry["title"],
+        "price": fields["price"],
+        "rating": entry["rating"],
+        "availability": fields["availability"],
+        "category": fields["category"],
+        "image_url": fields["image_url"]
+    }
+
+def fetch_if_changed(session, limiter, cache, url):
+    """
+    Versão condicional de fetch_page para o modo incremental.
+
+    Returns
+    -------
+    (response, cached): cached é a entrada do PageCache quando a página não
+    mudou; response é None em caso de erro.
+    """
+    limiter.wait(url)
+    try:
+        response, cached = cache.conditional_get(session, url, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"Erro ao acessar {url}: {e}")
+        return None, None
+    if cached is not None:
+        return response, cached
+    if response.status_code != 200:
+        print(f"Erro ao acessar {url}")
+        return None, None
+    return response, None
+
+def iter_books(base_url=BASE_URL, pages=TOTAL_PAGES, max_workers=MAX_WORKERS,
+               requests_per_second=REQUESTS_PER_SECOND, session=None, cache=None, parser=None):
+    """
+    Raspa o catálogo usando um pool de threads com concorrência limitada,
+    entregando cada livro assim que sua página termina. Só uma janela de
+    páginas fica em andamento, então a memória não cresce com o catálogo.
+
+    Parameters
+    ----------
+    base_url : str
+        URL raiz do site (permite apontar para um servidor local de testes)
+    pages : int
+        Quantidade de páginas de listagem
+    max_workers : int
+        Número máximo de requisições simultâneas (1 = coleta sequencial)
+    requests_per_second : float
+        Limite de requisições por segundo por host (0 = sem limite)
+    session : requests.Session, optional
+        Sessão HTTP já configurada; por padrão usa build_session()
+    cache : PageCache, optional
+        Ativa o modo incremental: requisições condicionais, sem novo parse de
+        páginas inalteradas. Os livros novos ou alterados ficam em cache.delta.
+    parser : str, optional
+        Backend de extração ("lxml", "strainer" ou "html.parser"); por padrão
+        usa SCRAPER_PARSER ou o mais rápido disponível
+
+    Yields
+    ------
+    Dicionários, na mesma ordem do site, com o id da posição do livro na
+    listagem (listing_ids); livros que falham são omitidos sem mudar o id
+    dos demais
+    """
+    session = session or build_session(pool_size=max_workers)
+    limiter = HostRateLimiter(requests_per_second)
+    extractor = get_extractor(parser)
+    page_urls = [f"{base_url}catalogue/page-{page}.html" for page in range(1, pages + 1)]
+
+    def scrape_listing(url):
+        if cache is None:
+            html = fetch_page(session, limiter, url)
+            return parse_listing(html, base_url, extractor) if html is not None else None
+        response, cached = fetch_if_changed(session, limiter, cache, url)
+        if cached is not None:
+            return cached["entries"]
+        if response is None:
+            return None
+        entries = parse_listing(response.text, base_url, extractor)
+        cache.put(url, response, entries=entries)
+        return entries
+
+    def scrape_detail(entry):
+        """Retorna (registro, alterado) ou (None, False) em caso de erro."""
+        url = entry["url"]
+        if cache is None:
+            html = fetch_page(session, limiter, url)
+            return (build_record(entry, parse_detail(html, base_url, extractor)), True) if html is not None else (None, False)
+        previous_record = (cache.get(url) or {}).get("record")
+        response, cached = fetch_if_changed(session, limiter, cache, url)
+        if cached is not None:
+            fields = cached["fields"]
+        elif response is None:
+            return None, False
+        else:
+            fields = parse_detail(response.text, base_url, extractor)
+            cache.put(url, response, fields=fields)
+        record = build_record(entry, fields)
+        cache.update(url, record=record)
+        return record, record != previous_record
+
+    def drain(page, futures):
+        missing = 0
+        for book_id, future in futures:
+            record, changed = future.result()
+            if record is None:
+                missing += 1
+                continue
+            record = {"id": book_id, **record}
+            if cache is not None and changed:
+                cache.delta.append(record)
+            yield record
+        if missing:
+            print(f"Página {page} raspada com {missing} livros sem detalhe (ids sem registro)")
+        else:
+            print(f"Página {page} raspada com sucesso")
+
+    if cache is not None:
+        cache.delta = []
+    # Páginas cujos detalhes estão na fila: o suficiente para manter todas as threads ocupadas
+    pages_in_flight = max(2, max_workers // 20 + 2)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        window = deque()
+        for page, entries in enumerate(executor.map(scrape_listing, page_urls), start=1):
+            if entries is None:
+                print(f"Página {page} não raspada; os ids dos livros dela ficam sem registro")
+                continue
+            window.append((page, [(book_id, executor.submit(scrape_detail, entry))
+                                  for book_id, entry in zip(listing_ids(page, entries), entries)]))
+            if len(window) >= pages_in_flight:
+                yield from drain(*window.popleft())
+        while window:
+            yield from drain(*window.popleft())
+
+def scrape_books(*args, **kwargs):
+    """
+    Raspa o catálogo completo e retorna a lista de livros.
+
+    Aceita os mesmos parâmetros de iter_books; para catálogos grandes prefira
+    iter_books com um sink de sinks.py.
+    """
+    return list(iter_books(*args, **kwargs))
+
+def save_to_csv(books, output_path="data/books.csv", rows_per_part=None):
+    with LocalCsvSink(output_path, rows_per_part=rows_per_part) as sink:
+        sink.write_many(books)
+    return sink.parts
+
+def save_delta(delta, output_dir="data"):
+    """
+    Grava apenas os livros novos ou alterados em books_delta_<timestamp>.csv,
+    mantendo o mesmo id que o livro tem no arquivo completo.
+    """
+    if not delta:
+        print("Nenhum livro novo ou alterado")
+        return None
+    os.makedirs(output_dir, exist_ok=True)
+    current_date = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+    output_path = os.path.join(output_dir, f"books_delta_{current_date}.csv")
+    pd.DataFrame(delta).set_index("id").to_csv(output_path, encoding="utf-8")
+    print(f"{len(delta)} livros novos ou alterados salvos em {output_path}")
+    return output_path
 
 if __name__ == "__main__":
-    books = scrape_books()
-    save_to_csv(books)
+    parser = argparse.ArgumentParser(description="Scraper do books.toscrape.com")
+    parser.add_argument("--incremental", action="store_true",
+                        help="usa o cache de páginas e grava também um arquivo delta")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH,
+                        help="arquivo do cache de páginas do modo incremental")
+    parser.add_argument("--parser", choices=available_extractors(), default=None,
+                        help="backend de extração do HTML")
+    parser.add_argument("--rows-per-part", type=int, default=None,
+                        help="divide a saída em arquivos books_part-NNNNN.csv com até N linhas")
+    parser.add_argument("--format", nargs="+", choices=list(SINKS), default=["csv"],
+                        help="formatos de saída em data/ (ex.: --format csv parquet)")
+    args = parser.parse_args()
+
+    cache = PageCache(args.cache_path) if args.incremental else None
+    with open_sink(args.format, rows_per_part=args.rows_per_part) as sink:
+        sink.write_many(iter_books(cache=cache, parser=args.parser))
+    if cache is not None:
+        save_delta(cache.delta)
+        cache.save()
@@ -0,0 +1,245 @@
+import csv
+import os
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional; sem ele só a saída CSV fica disponível
+    pa = pq = None
+
+FIELDNAMES = ["id", "title", "price", "rating", "availability", "category", "image_url"]
+
+# Schema fixo da saída colunar, espelhando as colunas de models.Books
+# (metadata_filename e load_timestamp são preenchidos na ingestão do Snowflake)
+BOOKS_SCHEMA = pa.schema([
+    pa.field("id", pa.int64(), nullable=False),
+    pa.field("title", pa.string()),
+    pa.field("price", pa.float64()),
+    pa.field("rating", pa.int64()),
+    pa.field("availability", pa.string()),
+    pa.field("category", pa.string()),
+    pa.field("image_url", pa.string()),
+]) if pa is not None else None
+
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "snappy")
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "50000"))
+
+class RecordSink:
+    """
+    Base dos sinks de saída do scraper: grava cada registro assim que ele é
+    produzido, sem acumular o catálogo em memória.
+
+    Os registros do scraper já trazem o id da posição do livro no site
+    (scraper.listing_ids); os que vêm sem id recebem ids em ordem (1..n). Com rows_per_part, a saída é dividida em partes de até
+    rows_per_part linhas, cada uma autocontida (com cabeçalho/schema).
+
+    Subclasses implementam _open_part, _write_row, _finish_part e _abort_part.
+    """
+
+    def __init__(self, rows_per_part=None):
+        self.rows_per_part = rows_per_part
+        self.rows_written = 0
+        self.parts = []
+        self._open = False
+        self._rows_in_part = 0
+
+    def write(self, record):
+        if not self._open or (self.rows_per_part and self._rows_in_part >= self.rows_per_part):
+            self._rotate()
+        self.rows_written += 1
+        self._rows_in_part += 1
+        self._write_row({"id": self.rows_written, **record})
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def _rotate(self):
+        if self._open:
+            self._finish_part()
+        self._open_part(len(self.parts) + 1)
+        self._open = True
+        self._rows_in_part = 0
+
+    def close(self):
+        if not self._open:
+            self._rotate()  # catálogo vazio: ainda gera uma saída só com o cabeçalho
+        self._finish_part()
+        self._open = False
+
+    def abort(self):
+        if self._open:
+            self._abort_part()
+        self._open = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _open_part(self, index):
+        raise NotImplementedError
+
+    def _write_row(self, row):
+        raise NotImplementedError
+
+    def _finish_part(self):
+        raise NotImplementedError
+
+    def _abort_part(self):
+        raise NotImplementedError
+
+class LocalFileSink(RecordSink):
+    """
+    Grava em disco. Cada parte é escrita em um arquivo .tmp e renomeada só
+    quando termina, então uma falha no meio da coleta preserva as partes
+    já concluídas e não sobrescreve o arquivo da execução anterior.
+
+    Sem rotação a saída é output_path; com rotação, <nome>_part-00001.<ext>, ...
+    """
+
+    def __init__(self, output_path, rows_per_part=None):
+        super().__init__(rows_per_part)
+        self.output_path = Path(output_path)
+        self._current_path = None
+
+    def part_path(self, index):
+        if not self.rows_per_part:
+            return self.output_path
+        return self.output_path.with_name(f"{self.output_path.stem}_part-{index:05d}{self.output_path.suffix}")
+
+    def _open_part(self, index):
+        self._current_path = self.part_path(index)
+        self._current_path.parent.mkdir(parents=True, exist_ok=True)
+        self._open_file(self._tmp_path())
+
+    def _finish_part(self):
+        self._close_file()
+        os.replace(self._tmp_path(), self._current_path)
+        self.parts.append(str(self._current_path))
+        print(f"Dados salvos em {self._current_path}")
+
+    def _abort_part(self):
+        self._close_file()
+        print(f"Parte incompleta mantida em {self._tmp_path()}")
+
+    def _tmp_path(self):
+        return self._current_path.with_name(self._current_path.name + ".tmp")
+
+    def _open_file(self, path):
+        raise NotImplementedError
+
+    def _close_file(self):
+        raise NotImplementedError
+
+class LocalCsvSink(LocalFileSink):
+    """Saída CSV, no mesmo formato do antigo DataFrame.to_csv."""
+
+    def __init__(self, output_path="data/books.csv", rows_per_part=None):
+        super().__init__(output_path, rows_per_part)
+        self._stream = None
+        self._writer = None
+
+    def _open_file(self, path):
+        self._stream = open(path, "w", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._stream, fieldnames=FIELDNAMES, lineterminator="\n")
+        self._writer.writeheader()
+
+    def _write_row(self, row):
+        self._writer.writerow(row)
+
+    def _close_file(self):
+        self._stream.close()
+        self._stream = self._writer = None
+
+class LocalParquetSink(LocalFileSink):
+    """
+    Saída Parquet tipada com BOOKS_SCHEMA. Os registros são acumulados só até
+    completar um row group de row_group_size linhas, que é então gravado.
+    """
+
+    def __init__(self, output_path="data/books.parquet", rows_per_part=None,
+                 row_group_size=PARQUET_ROW_GROUP_SIZE, compression=PARQUET_COMPRESSION):
+        if pq is None:
+            raise RuntimeError("Saída Parquet indisponível: instale o pacote pyarrow")
+        super().__init__(output_path, rows_per_part)
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self._writer = None
+        self._columns = None
+
+    def _open_file(self, path):
+        self._writer = pq.ParquetWriter(path, BOOKS_SCHEMA, compression=self.compression)
+        self._columns = {name: [] for name in FIELDNAMES}
+
+    def _write_row(self, row):
+        for name in FIELDNAMES:
+            self._columns[name].append(row[name])
+        if len(self._columns["id"]) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self._columns["id"]:
+            self._writer.write_batch(pa.record_batch(
+                [self._columns[name] for name in FIELDNAMES], schema=BOOKS_SCHEMA
+            ))
+            self._columns = {name: [] for name in FIELDNAMES}
+
+    def _close_file(self):
+        self._flush()
+        self._writer.close()
+        self._writer = self._columns = None
+
+class MultiSink:
+    """Replica cada registro em vários sinks (ex.: CSV e Parquet na mesma coleta)."""
+
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+
+    @property
+    def rows_written(self):
+        return self.sinks[0].rows_written if self.sinks else 0
+
+    @property
+    def parts(self):
+        return [part for sink in self.sinks for part in sink.parts]
+
+    def write(self, record):
+        for sink in self.sinks:
+            sink.write(record)
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def abort(self):
+        for sink in self.sinks:
+            sink.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+SINKS = {
+    "csv": (LocalCsvSink, "data/books.csv"),
+    "parquet": (LocalParquetSink, "data/books.parquet"),
+}
+
+def open_sink(formats=("csv",), rows_per_part=None):
+    """Abre um sink local para cada formato pedido, nos caminhos padrão em data/."""
+    sinks = [SINKS[fmt][0](SINKS[fmt][1], rows_per_part=rows_per_part) for fmt in formats]
+    return sinks[0] if len(sinks) == 1 else MultiSink(sinks)
@@ -18,6 +18,19 @@ CREATE OR REPLACE TABLE DB_SCRAPE.SC_SCRAPE.TB_BOOKS_TO_SCRAPE (
     LOAD_TIMESTAMP TIMESTAMP_LTZ
 );
 
+-- Versão mais recente de cada id (consolidada pela TASK_MERGE_BOOKS_LATEST em ingestion_ddl.sql)
+CREATE TABLE IF NOT EXISTS DB_SCRAPE.SC_SCRAPE.TB_BOOKS_LATEST (
+    id INTEGER PRIMARY KEY,
+    title STRING,
+    price FLOAT,
+    rating INTEGER,
+    availability STRING,
+    category STRING,
+    image_url STRING,
+    METADATA_FILENAME STRING,
+    LOAD_TIMESTAMP TIMESTAMP_LTZ
+);
+
 -- Criação dos usuários
 CREATE USER IF NOT EXISTS amilton_faria PASSWORD = 'alterado' DEFAULT_ROLE = PUBLIC MUST_CHANGE_PASSWORD = TRUE;
 CREATE USER IF NOT EXISTS fernando_bastos PASSWORD = 'alterado' DEFAULT_ROLE = PUBLIC MUST_CHANGE_PASSWORD = TRUE;
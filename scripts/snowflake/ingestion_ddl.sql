@@ -64,18 +64,98 @@ CREATE OR REPLACE PIPE DB_SCRAPE.SC_SCRAPE.PIPE_BOOKS_TO_SCRAPE_AUTO
     FILE_FORMAT = 'DB_SCRAPE.SC_SCRAPE.CSV_FILEFORMAT'
     ON_ERROR = 'CONTINUE';
 
+--Cria um formato de arquivo PARQUET (saída tipada do scraper com OUTPUT_FORMAT=parquet)
+CREATE OR REPLACE FILE FORMAT DB_SCRAPE.SC_SCRAPE.PARQUET_FILEFORMAT
+    TYPE = PARQUET
+    COMPRESSION = AUTO;
+
+--Cria um pipe com ingestão automática para os arquivos Parquet
+--As colunas já chegam tipadas; o cast só ajusta para os tipos da tabela
+CREATE OR REPLACE PIPE DB_SCRAPE.SC_SCRAPE.PIPE_BOOKS_TO_SCRAPE_PARQUET_AUTO
+    AUTO_INGEST = TRUE
+    AS
+    COPY INTO DB_SCRAPE.SC_SCRAPE.TB_BOOKS_TO_SCRAPE (
+        ID,
+        TITLE,
+        PRICE,
+        RATING,
+        AVAILABILITY,
+        CATEGORY,
+        IMAGE_URL,
+        METADATA_FILENAME,
+        LOAD_TIMESTAMP
+    )
+    FROM (
+        SELECT
+            $1:id::INTEGER,
+            $1:title::STRING,
+            $1:price::FLOAT,
+            $1:rating::INTEGER,
+            $1:availability::STRING,
+            $1:category::STRING,
+            $1:image_url::STRING,
+            METADATA$FILENAME,
+            CURRENT_TIMESTAMP()
+        FROM @DB_SCRAPE.SC_SCRAPE.STG_BOOKS_TO_SCRAPE
+    )
+    PATTERN = '.*books.*\.parquet'
+    FILE_FORMAT = 'DB_SCRAPE.SC_SCRAPE.PARQUET_FILEFORMAT'
+    ON_ERROR = 'CONTINUE';
+
 --Mostra os pipes existentes
 SHOW PIPES;
 
 --Verifica o status do pipe automático
 SELECT SYSTEM$PIPE_STATUS('PIPE_BOOKS_TO_SCRAPE_AUTO');
 
+--Cria um stream com as linhas que os pipes acrescentam ao histórico
+CREATE OR REPLACE STREAM DB_SCRAPE.SC_SCRAPE.STR_BOOKS_TO_SCRAPE
+    ON TABLE DB_SCRAPE.SC_SCRAPE.TB_BOOKS_TO_SCRAPE
+    APPEND_ONLY = TRUE;
+
+--Cria uma task que consolida a versão mais recente de cada id em TB_BOOKS_LATEST
+--Só roda quando o stream tem linhas novas; um id só é atualizado se a versão carregada for mais nova
+CREATE OR REPLACE TASK DB_SCRAPE.SC_SCRAPE.TASK_MERGE_BOOKS_LATEST
+    WAREHOUSE = COMPUTE_WH
+    SCHEDULE = '5 MINUTE'
+    WHEN SYSTEM$STREAM_HAS_DATA('DB_SCRAPE.SC_SCRAPE.STR_BOOKS_TO_SCRAPE')
+    AS
+    MERGE INTO DB_SCRAPE.SC_SCRAPE.TB_BOOKS_LATEST latest
+    USING (
+        SELECT ID, TITLE, PRICE, RATING, AVAILABILITY, CATEGORY, IMAGE_URL, METADATA_FILENAME, LOAD_TIMESTAMP
+        FROM DB_SCRAPE.SC_SCRAPE.STR_BOOKS_TO_SCRAPE
+        WHERE ID IS NOT NULL
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY ID ORDER BY LOAD_TIMESTAMP DESC, METADATA_FILENAME DESC) = 1
+    ) loaded
+    ON latest.ID = loaded.ID
+    WHEN MATCHED AND (loaded.LOAD_TIMESTAMP > latest.LOAD_TIMESTAMP
+                      OR (loaded.LOAD_TIMESTAMP = latest.LOAD_TIMESTAMP
+                          AND loaded.METADATA_FILENAME > latest.METADATA_FILENAME)) THEN UPDATE SET
+        TITLE = loaded.TITLE,
+        PRICE = loaded.PRICE,
+        RATING = loaded.RATING,
+        AVAILABILITY = loaded.AVAILABILITY,
+        CATEGORY = loaded.CATEGORY,
+        IMAGE_URL = loaded.IMAGE_URL,
+        METADATA_FILENAME = loaded.METADATA_FILENAME,
+        LOAD_TIMESTAMP = loaded.LOAD_TIMESTAMP
+    WHEN NOT MATCHED THEN INSERT (
+        ID, TITLE, PRICE, RATING, AVAILABILITY, CATEGORY, IMAGE_URL, METADATA_FILENAME, LOAD_TIMESTAMP
+    ) VALUES (
+        loaded.ID, loaded.TITLE, loaded.PRICE, loaded.RATING, loaded.AVAILABILITY, loaded.CATEGORY,
+        loaded.IMAGE_URL, loaded.METADATA_FILENAME, loaded.LOAD_TIMESTAMP
+    );
+
+--Ativa a task (tasks são criadas suspensas)
+ALTER TASK DB_SCRAPE.SC_SCRAPE.TASK_MERGE_BOOKS_LATEST RESUME;
+
 --Concede permissões ao role ROLE_BOOKS_SCRAPE
 GRANT USAGE ON DATABASE DB_SCRAPE TO ROLE ROLE_BOOKS_SCRAPE;
 GRANT USAGE ON SCHEMA DB_SCRAPE.SC_SCRAPE TO ROLE ROLE_BOOKS_SCRAPE;
 GRANT USAGE ON STAGE DB_SCRAPE.SC_SCRAPE.STG_BOOKS_TO_SCRAPE TO ROLE ROLE_BOOKS_SCRAPE;
 GRANT OPERATE ON PIPE DB_SCRAPE.SC_SCRAPE.PIPE_BOOKS_TO_SCRAPE TO ROLE ROLE_BOOKS_SCRAPE;
 GRANT MONITOR ON PIPE DB_SCRAPE.SC_SCRAPE.PIPE_BOOKS_TO_SCRAPE TO ROLE ROLE_BOOKS_SCRAPE;
+GRANT SELECT ON TABLE DB_SCRAPE.SC_SCRAPE.TB_BOOKS_LATEST TO ROLE ROLE_BOOKS_SCRAPE;
 
 --Consulta o histórico de cópia da última hora
 SELECT *
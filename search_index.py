@@ -0,0 +1,191 @@
+import os
+import re
+from collections import defaultdict
+import numpy as np
+from cache import CatalogIndex
+
+# Fração mínima dos trigramas do termo presentes no título na busca tolerante a erros
+SEARCH_FUZZY_THRESHOLD = float(os.getenv("SEARCH_FUZZY_THRESHOLD", "0.5"))
+
+# Peso da pontuação de uma palavra do termo obtida trocando duas letras vizinhas ("lihgt" -> "light")
+SEARCH_TRANSPOSITION_WEIGHT = float(os.getenv("SEARCH_TRANSPOSITION_WEIGHT", "0.9"))
+
+# Pesos do ranking: título igual > começa com o termo > palavra inteira > trecho
+RANK_EXACT, RANK_PREFIX, RANK_WORD, RANK_SUBSTRING = 4.0, 3.0, 2.0, 1.0
+
+
+WORD = re.compile(r"\w+")
+
+
+def trigrams(text):
+    """Trigramas de um texto já em minúsculas, com espaço nas bordas ("  ab" ...)."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def word_trigrams(text):
+    """União dos trigramas de cada palavra, cada uma com as próprias bordas."""
+    return set().union(*map(trigrams, WORD.findall(text)))
+
+
+def transpositions(word):
+    """Variações da palavra com duas letras vizinhas trocadas (o erro de digitação mais comum)."""
+    return {word[:i] + word[i + 1] + word[i] + word[i + 2:] for i in range(len(word) - 1) if word[i] != word[i + 1]}
+
+
+class SearchIndex:
+    """
+    Índice invertido de trigramas sobre os títulos do catálogo.
+
+    Cada trigrama aponta para o array ordenado de posições dos livros que o
+    contêm. Uma busca por trecho intersecta as listas dos trigramas do termo
+    (começando pela menor) e só confere o texto nos candidatos restantes, em
+    vez de varrer todos os títulos como o ILIKE '%termo%'. Com fuzzy=True,
+    cada palavra do termo é comparada aos trigramas das palavras do título
+    (com as bordas de cada palavra, não só do título inteiro), o que tolera
+    erros de digitação. A categoria é filtrada por trecho sobre as poucas
+    categorias distintas.
+    """
+
+    def __init__(self, records):
+        self.records = records
+        self.titles = [(record["title"] or "").lower() for record in records]
+        ids = np.array([record["id"] if record["id"] is not None else -1 for record in records], dtype=np.int64)
+        # Ordem padrão (sem ranking): por id, como a consulta ao banco
+        self.id_order = np.argsort(ids, kind="stable")
+        self.by_category = defaultdict(list)
+        postings = defaultdict(list)
+        self.gram_counts = np.zeros(len(records), dtype=np.int32)
+        # Trigramas do título inteiro (busca por trecho) e de cada palavra (busca tolerante), uma vez por título
+        grams_by_title = {}
+        for position, (record, title) in enumerate(zip(records, self.titles)):
+            self.by_category[(record["category"] or "").lower()].append(position)
+            if title not in grams_by_title:
+                words = word_trigrams(title)
+                grams_by_title[title] = (len(words), tuple(trigrams(title) | words))
+            self.gram_counts[position], grams = grams_by_title[title]
+            for gram in grams:
+                postings[gram].append(position)
+        self.postings = {gram: np.array(positions, dtype=np.int32) for gram, positions in postings.items()}
+        self.by_category = {category: np.array(positions, dtype=np.int32)
+                            for category, positions in self.by_category.items()}
+
+    def __len__(self):
+        return len(self.records)
+
+    # ---------------------------------------------------------------- filtros
+
+    def _category_positions(self, category):
+        category = category.lower()
+        matches = [positions for name, positions in self.by_category.items() if category in name]
+        if not matches:
+            return np.empty(0, dtype=np.int32)
+        return np.sort(np.concatenate(matches))
+
+    def _substring_positions(self, term):
+        """Posições cujo título contém term (minúsculo), como ILIKE '%term%'."""
+        # Trigramas internos do termo: sem as bordas, valem para qualquer ocorrência
+        grams = {term[i:i + 3] for i in range(len(term) - 2)}
+        if not grams:
+            return np.array([i for i, title in enumerate(self.titles) if term in title], dtype=np.int32)
+        lists = sorted((self.postings.get(gram) for gram in grams), key=lambda p: -1 if p is None else len(p))
+        if lists[0] is None:
+            return np.empty(0, dtype=np.int32)
+        candidates = lists[0]
+        for positions in lists[1:]:
+            candidates = np.intersect1d(candidates, positions, assume_unique=True)
+            if len(candidates) == 0:
+                return candidates
+        titles = self.titles
+        return np.array([i for i in candidates if term in titles[i]], dtype=np.int32)
+
+    def _word_coverage(self, word):
+        """Fração dos trigramas da palavra presentes em cada título (array com uma posição por livro)."""
+        grams = trigrams(word)
+        lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not lists:
+            return np.zeros(len(self.records))
+        return np.bincount(np.concatenate(lists), minlength=len(self.records)) / len(grams)
+
+    def _fuzzy_scores(self, term):
+        """
+        Pontuação (0..1) dos títulos parecidos com o termo.
+
+        Cada palavra do termo vale a fração dos seus trigramas encontrados
+        entre os trigramas das palavras do título, ou a de uma variação com
+        duas letras vizinhas trocadas, com peso SEARCH_TRANSPOSITION_WEIGHT.
+        Filtra pela média das palavras e desempata pelo coeficiente de Dice,
+        que favorece títulos curtos.
+        """
+        words = WORD.findall(term)
+        if not words:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        coverage = np.zeros(len(self.records))
+        shared = np.zeros(len(self.records))
+        term_grams = 0
+        for word in words:
+            best = self._word_coverage(word)
+            for variant in transpositions(word):
+                best = np.maximum(best, SEARCH_TRANSPOSITION_WEIGHT * self._word_coverage(variant))
+            coverage += best
+            shared += best * len(trigrams(word))
+            term_grams += len(trigrams(word))
+        coverage /= len(words)
+        positions = np.flatnonzero(coverage >= SEARCH_FUZZY_THRESHOLD)
+        dice = 2.0 * shared[positions] / (term_grams + self.gram_counts[positions])
+        return positions.astype(np.int32), 0.9 * coverage[positions] + 0.1 * dice
+
+    # ----------------------------------------------------------------- busca
+
+    def _rank(self, position, term, word):
+        title = self.titles[position]
+        if title == term:
+            return RANK_EXACT
+        if title.startswith(term):
+            return RANK_PREFIX
+        if word.search(title):
+            return RANK_WORD
+        return RANK_SUBSTRING
+
+    def search(self, title=None, category=None, fuzzy=False, offset=0, limit=None):
+        """
+        Busca por título e/ou categoria (trechos, sem diferenciar maiúsculas).
+
+        Parameters
+        ----------
+        title, category : trechos procurados; sem nenhum, retorna todo o catálogo
+        fuzzy : inclui títulos parecidos com o termo (erros de digitação)
+        offset, limit : paginação sobre o resultado ordenado
+
+        Returns
+        -------
+        (total de resultados, registros da página). Com título, os registros
+        vêm ordenados por relevância (depois por id); sem título, por id.
+        """
+        allowed = self._category_positions(category) if category else None
+        term = title.lower() if title else ""
+        if not term:
+            order = self.id_order if allowed is None else self.id_order[np.isin(self.id_order, allowed)]
+        else:
+            scores = {}
+            exact = self._substring_positions(term)
+            if len(exact):
+                word = re.compile(rf"(?<!\w){re.escape(term)}(?!\w)")
+                scores = {int(position): self._rank(position, term, word) for position in exact}
+            if fuzzy:
+                positions, similarity = self._fuzzy_scores(term)
+                for position, value in zip(positions.tolist(), similarity.tolist()):
+                    # Abaixo de qualquer correspondência exata do trecho
+                    scores.setdefault(position, float(value) * RANK_SUBSTRING * 0.99)
+            candidates = np.fromiter(scores, dtype=np.int64, count=len(scores))
+            if allowed is not None:
+                candidates = candidates[np.isin(candidates, allowed)]
+            ids = [self.records[i]["id"] or 0 for i in candidates.tolist()]
+            ranks = [scores[i] for i in candidates.tolist()]
+            order = candidates[np.lexsort((ids, np.negative(ranks)))] if len(candidates) else candidates
+        total = len(order)
+        end = None if limit is None else offset + limit
+        return total, [self.records[i] for i in order[offset:end].tolist()]
+
+
+catalog_search = CatalogIndex(SearchIndex, "busca")
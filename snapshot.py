@@ -0,0 +1,182 @@
+import asyncio
+import os
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from sqlalchemy import Integer, func, select
+from aggregates import NULLS_FIRST_DIALECTS, CatalogAggregates
+from database import PROJECT_ROOT, read_engine, read_session_local
+from models import CatalogBooks
+from price_index import PriceRatingIndex
+from search_index import SearchIndex
+from app_logging import get_logger
+
+# "database" (padrão): cada requisição consulta o banco
+# "snapshot": o catálogo é carregado em memória e as rotas respondem dele
+CATALOG_BACKEND = os.getenv("CATALOG_BACKEND", "database")
+# Origem do snapshot: "database" (tabela do catálogo, ver models.CATALOG_TABLE) ou caminho de um .csv/.parquet
+SNAPSHOT_SOURCE = os.getenv("SNAPSHOT_SOURCE", "database")
+SNAPSHOT_REFRESH_SECONDS = float(os.getenv("SNAPSHOT_REFRESH_SECONDS", "300"))
+
+log = get_logger("snapshot")
+COLUMNS = [column.key for column in CatalogBooks.__table__.columns]
+INTEGER_COLUMNS = [column.key for column in CatalogBooks.__table__.columns if isinstance(column.type, Integer)]
+BookRow = namedtuple("BookRow", COLUMNS)
+
+
+def snapshot_enabled():
+    return CATALOG_BACKEND == "snapshot"
+
+
+class CatalogSnapshot:
+    """
+    Cópia do catálogo em memória, em arrays colunares (NumPy/pandas).
+
+    Carregada na inicialização da API e recarregada periodicamente quando a
+    versão da origem muda (nova carga no Snowflake ou arquivo modificado).
+    A troca é atômica: as consultas sempre enxergam um snapshot completo.
+    """
+
+    def __init__(self, source=SNAPSHOT_SOURCE):
+        self.source = source
+        self.version = None
+        self.loaded_at = None
+        self._state = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ carga
+
+    def _source_version(self):
+        if self.source == "database":
+            with read_session_local() as db:
+                load_timestamp, metadata_filename = db.query(
+                    func.max(CatalogBooks.load_timestamp), func.max(CatalogBooks.metadata_filename)
+                ).one()
+            return (str(load_timestamp), metadata_filename)
+        path = self._source_path()
+        return (str(path.stat().st_mtime), path.name)
+
+    def _source_path(self):
+        path = Path(self.source)
+        return path if path.is_absolute() else PROJECT_ROOT / path
+
+    def _read_frame(self):
+        if self.source == "database":
+            frame = pd.read_sql(select(CatalogBooks.__table__), read_engine)
+        elif self.source.endswith(".parquet"):
+            frame = pd.read_parquet(self._source_path())
+        else:
+            frame = pd.read_csv(self._source_path())
+        frame.columns = [column.lower() for column in frame.columns]
+        for column in COLUMNS:
+            if column not in frame.columns:
+                frame[column] = None
+        # Com algum NULL, o pandas lê id/rating como float (3.0); Int64 mantém inteiros como o banco
+        for column in INTEGER_COLUMNS:
+            if frame[column].dtype.kind == "f":
+                frame[column] = frame[column].astype("Int64")
+        return frame[COLUMNS].reset_index(drop=True)
+
+    def load(self):
+        """Lê a origem completa e troca o snapshot em uso."""
+        version = self._source_version()
+        frame = self._read_frame()
+        # Registros prontos para JSON (NaN -> None, tipos nativos do Python)
+        records = frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+        ids = frame["id"].fillna(-1).to_numpy(dtype=np.int64)
+        state = {
+            "frame": frame,
+            "records": records,
+            "rows": [BookRow(**record) for record in records],
+            "search": SearchIndex(records),
+            "ranges": PriceRatingIndex(records),
+            "by_id": {},
+            # Ordem por id, para paginação por chave e exportações
+            "id_order": np.argsort(ids, kind="stable"),
+            "sorted_ids": np.sort(ids, kind="stable"),
+            "aggregates": CatalogAggregates.from_rows(
+                records, nulls_first=read_engine.dialect.name in NULLS_FIRST_DIALECTS
+            ),
+        }
+        for record in records:
+            state["by_id"].setdefault(record["id"], record)
+        with self._lock:
+            self._state = state
+            self.version = version
+            self.loaded_at = time.time()
+        log.info("Snapshot do catálogo carregado: %d livros (%s)", len(records), self.source)
+
+    def refresh_if_changed(self):
+        """Recarrega o snapshot se a versão da origem mudou. Retorna True se recarregou."""
+        if self._state is not None and self._source_version() == self.version:
+            return False
+        self.load()
+        return True
+
+    def _current(self):
+        state = self._state
+        if state is None:
+            raise RuntimeError("Snapshot do catálogo ainda não foi carregado")
+        return state
+
+    # -------------------------------------------------------------- consultas
+
+    def rows(self):
+        """Linhas com acesso por atributo, como os objetos Books do ORM."""
+        return self._current()["rows"]
+
+    def iter_rows(self, after_id=None, limit=None):
+        """Linhas em ordem de id, a partir do cursor after_id (exclusivo)."""
+        state = self._current()
+        start = 0 if after_id is None else int(np.searchsorted(state["sorted_ids"], after_id, side="right"))
+        end = len(state["id_order"]) if limit is None else start + limit
+        rows = state["rows"]
+        for i in state["id_order"][start:end]:
+            yield rows[i]
+
+    def list_books(self):
+        return self._current()["records"]
+
+    def get_book(self, book_id):
+        return self._current()["by_id"].get(book_id)
+
+    def search_index(self):
+        return self._current()["search"]
+
+    def categories(self):
+        return self._current()["frame"]["category"].dropna().unique().tolist()
+
+    def overview(self):
+        return self._current()["aggregates"].overview()
+
+    def category_stats(self):
+        return self._current()["aggregates"].category_stats()
+
+    def range_index(self):
+        return self._current()["ranges"]
+
+    def stats(self):
+        state = self._state
+        return {
+            "backend": CATALOG_BACKEND,
+            "source": self.source,
+            "rows": len(state["records"]) if state else 0,
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+        }
+
+
+catalog_snapshot = CatalogSnapshot()
+
+
+async def refresh_snapshot_periodically(snapshot=catalog_snapshot, interval=SNAPSHOT_REFRESH_SECONDS):
+    """Tarefa de fundo da API: verifica a origem a cada interval segundos."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(snapshot.refresh_if_changed)
+        except Exception as e:
+            log.error("Falha ao atualizar o snapshot do catálogo: %s", e)
@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from fastapi.responses import StreamingResponse
+from database import read_session_local
+from models import CatalogBooks
+from snapshot import catalog_snapshot, snapshot_enabled
+
+# Linhas lidas do banco por lote (yield_per) e agrupadas por escrita no socket
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "1000"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+NEXT_CURSOR_HEADER = "X-Next-After-Id"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+FORMAT_PATTERN = "^(json|ndjson|csv)$"
+
+
+def keyset_query(query, after_id=None, limit=None):
+    """Aplica paginação por chave (id) a uma query do catálogo (CatalogBooks)."""
+    query = query.order_by(CatalogBooks.id)
+    if after_id is not None:
+        query = query.filter(CatalogBooks.id > after_id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def iter_catalog_rows(after_id=None, limit=None, batch_size=STREAM_BATCH_SIZE):
+    """
+    Gera os livros em ordem de id, com acesso por atributo.
+
+    No modo snapshot lê da memória; caso contrário abre uma sessão própria
+    (a do Depends já pode ter sido fechada quando o streaming começa) e lê
+    em lotes com yield_per, sem materializar a tabela inteira.
+    """
+    if snapshot_enabled():
+        yield from catalog_snapshot.iter_rows(after_id, limit)
+        return
+    with read_session_local() as db:
+        yield from keyset_query(db.query(CatalogBooks), after_id, limit).yield_per(batch_size)
+
+
+def page_catalog_rows(db, after_id=None, limit=MAX_PAGE_SIZE):
+    """Uma página de livros ordenada por id."""
+    if snapshot_enabled():
+        return list(catalog_snapshot.iter_rows(after_id, limit))
+    return keyset_query(db.query(CatalogBooks), after_id, limit).all()
+
+
+def set_next_cursor(response, rows, limit):
+    """Informa no cabeçalho o cursor da próxima página, se houver."""
+    if limit is not None and len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = str(rows[-1].id)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode_ndjson(items, fieldnames):
+    buffer = []
+    for item in items:
+        buffer.append(json.dumps(item, ensure_ascii=False, default=_json_default))
+        if len(buffer) >= STREAM_BATCH_SIZE:
+            yield "\n".join(buffer) + "\n"
+            buffer = []
+    if buffer:
+        yield "\n".join(buffer) + "\n"
+
+
+def _encode_csv(items, fieldnames):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, lineterminator="\n", extrasaction="ignore")
+    writer.writeheader()
+    for count, item in enumerate(items, start=1):
+        writer.writerow(item)
+        if count % STREAM_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def streaming_response(items, fmt, fieldnames, filename):
+    """
+    Resposta NDJSON ou CSV escrita à medida que os itens são gerados.
+
+    Parameters
+    ----------
+    items : iterável de dicionários
+    fmt : "ndjson" ou "csv"
+    fieldnames : colunas do CSV (ordem do cabeçalho)
+    filename : nome sugerido para download, sem extensão
+    """
+    encoder = _encode_ndjson if fmt == "ndjson" else _encode_csv
+    return StreamingResponse(
+        encoder(items, fieldnames),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )